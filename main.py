@@ -1,39 +1,357 @@
-from playwright.sync_api import sync_playwright, Page
-import requests
-import re
-from src._utils.utils import get_customer_id
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from playwright.sync_api import Browser, BrowserContext, Page
+from datetime import datetime
+from typing import Any, Callable, Optional
+from src._utils.utils import get_customer_id, new_context, open_browser, track_holds
+from main_async import main_async
+from src._utils.booking import (
+    close_client,
+    field_label,
+    hold_id,
+    landing_url,
+    log_click,
+    needs_quantity,
+    payment_unconfirmed,
+    prefill_labels,
+    prewarm,
+    rank_fields,
+    selection_changes,
+    stand_down,
+    wait_for_release,
+)
 from src._utils.date_utils import (
     calculate_request_date,
-    military_to_american,
+    calculate_request_dates,
     format_date_for_calendar,
+    wait_until,
 )
 from src._utils.logger import setup_logger
-from src._utils.field_utils import find_available_fields, FieldInfo, TimeSlotDetail
+from src._utils.timing import ms_since, seconds_until
 from src._utils.env import settings
+from src._utils.api import AVAILABILITY_PATH, CHECKOUT_PATH
+from src._utils.availability_client import AvailabilityClient
+from src._utils.flight_recorder import flight_recording
+from src._utils.http_engine import HttpBookingEngine
+from src._utils.lease import LeaseGuard, exclusive_booking
+from src._utils.metrics import timed_step, track_run
+from src._utils.questions import DEFAULT_ANSWER, fill_questions
+from src._utils.retry import run_step
+from src._utils.scanner import scan_targets
+from src._utils.selectors import (
+    ACTIVITY_DROPDOWN,
+    CALENDAR,
+    CALENDAR_CHANGED_SCRIPT,
+    CALENDAR_INPUT,
+    CONTINUE_BUTTON,
+    CVV_INPUT,
+    DROPDOWN_OPTION,
+    EMAIL_INPUT,
+    LOGGED_IN_SCRIPT,
+    MODAL_CONFIRM_BUTTON,
+    PASSWORD_INPUT,
+    PAY_BUTTON,
+    PAYMENT_IFRAME,
+    POLICY_QUESTION_DROPDOWNS,
+    QUESTIONS_MODAL,
+    RESERVATION_NAME_INPUT,
+    SIGNIN_BUTTON,
+    WAIVER_CHECKBOX,
+)
+from src._utils.waits import start_step_report, timed_wait
+from src._utils.session_cache import (
+    CachedSession,
+    capture_session,
+    clear_session,
+    load_session,
+    probe_session,
+    save_session,
+)
 
 logger = setup_logger()
 
 
-def main():
+def main(release_at: Optional[datetime] = None, browser: Optional[Browser] = None):
     """
     Main function to automate the SF Rec field reservation process.
     Handles login, field selection, form filling, and checkout.
+
+    Args:
+        release_at (Optional[datetime]): When set, runs in armed mode: logs in and stages the
+            form ahead of time, then holds until this instant before selecting a field
+        browser (Optional[Browser]): A shared browser to open this run's context in;
+            a dedicated one is launched otherwise
+    """
+    report = start_step_report()
+    try:
+        with flight_recording(), track_run():
+            if settings.booking_engine == "http":
+                main_http(release_at, browser)
+            elif settings.booking_engine == "async":
+                asyncio.run(main_async(release_at))
+            else:
+                main_browser(release_at, browser)
+    finally:
+        logger.info(f"Waits: {report.summary()}")
+
+
+def main_browser(
+    release_at: Optional[datetime] = None, browser: Optional[Browser] = None
+):
+    """
+    Books by driving the reservation form in the browser.
+
+    Args:
+        release_at (Optional[datetime]): When set, holds until this instant before selecting a field
+        browser (Optional[Browser]): A shared browser to use instead of launching one
+    """
+
+    session = load_session() if settings.session_cache_enabled else None
+
+    # probe the cached session while the browser is starting
+    executor = ThreadPoolExecutor(max_workers=1)
+    session_probe = (
+        executor.submit(copy_context().run, probe_session, session) if session else None
+    )
+    executor.shutdown(wait=False)
+
+    with open_browser(browser) as browser:
+        if session and session_probe and session_probe.result():
+            logger.info("Reusing cached session")
+            context = new_context(browser, session.storage_state)
+            page = context.new_page()
+            customer_id = session.customer_id
+        else:
+            context, page, customer_id = start_session(browser)
+        holds = track_holds(context)
+
+        # each step retries on its own against the live page, so a transient failure
+        # late in the flow doesn't cost a fresh login
+        if release_at:
+            with timed_step("calendar"):
+                request_date = run_step(
+                    "calendar",
+                    lambda: stage_reservation_form(page, prefill_quantity=True),
+                )
+            client = AvailabilityClient.from_page(page, customer_id)
+            client.warm_up()
+            prewarm(client, request_date)
+            logger.info(f"Form staged, holding until release at {release_at}")
+            availability = wait_for_release(client, request_date, release_at)
+
+            # only the first attempt uses the response that showed the slots open
+            first_availability = iter([availability])
+            selected: set[tuple[str, str]] = set()
+            run_step(
+                "selection",
+                lambda: select_field(
+                    page,
+                    request_date,
+                    client,
+                    quantity_prefilled=True,
+                    release_at=release_at,
+                    availability=next(first_availability, None),
+                    selected=selected,
+                ),
+            )
+        else:
+            client = reservation_form(page, customer_id)
+
+        close_client(client)
+
+        with timed_step("questions"):
+            run_step("questions", lambda: details_and_policy_questions(page))
+
+        with exclusive_booking() as lease:
+            if lease is None:
+                stand_down(
+                    HttpBookingEngine.from_session(capture_session(page, customer_id)),
+                    hold_ids(holds),
+                )
+                context.close()
+                return
+
+            with timed_step("confirm"):
+                lease.check()
+                run_step("confirm", lambda: confirm_booking(page))
+            with timed_step("checkout"):
+                run_step("checkout", lambda: checkout_form(page, fence=lease.commit))
+
+        context.close()
+
+
+def main_http(release_at: Optional[datetime] = None, browser: Optional[Browser] = None):
+    """
+    Books through the REST API with HttpBookingEngine. The browser is only launched
+    to log in when there is no usable cached session, and for the PCI payment iframe.
+
+    Args:
+        release_at (Optional[datetime]): When set, holds until this instant before booking
+        browser (Optional[Browser]): A shared browser to use instead of launching one
+    """
+    session = http_session(browser)
+    engine = HttpBookingEngine.from_session(session)
+    try:
+        # only the lease holder holds and confirms, redundant workers wait to take over;
+        # the lease is claimed before the armed wait, so standbys wait it out as well
+        wait_seconds = (
+            settings.lease_wait_seconds + max(0.0, seconds_until(release_at))
+            if release_at
+            else None
+        )
+        with exclusive_booking(wait_seconds=wait_seconds) as lease:
+            if lease is None:
+                logger.info("Another worker has this booking, standing down")
+                return
+            engine.fence = lease.check
+
+            targets = scan_targets()
+            if settings.batch_occurrences > 1 or settings.batch_fields > 1:
+                dates = calculate_request_dates(settings.batch_occurrences)
+                # every item's hold goes out at once, each on its own connection
+                engine.warm_up(len(dates) * settings.batch_fields)
+                if release_at:
+                    logger.info(f"Engine ready, holding until release at {release_at}")
+                    wait_until(release_at)
+
+                results = engine.book_batch(dates)
+                held = [result.reservation_id for result in results if result.success]
+                in_cart = f"{len(held)}/{len(results)} batch items"
+            elif len(targets) > 1:
+                # one connection per concurrent fetch, so the scan pays no handshakes
+                engine.warm_up(min(settings.scan_workers, len(targets)))
+                if release_at:
+                    logger.info(f"Engine ready, holding until release at {release_at}")
+                    wait_until(release_at)
+
+                held = [engine.book_scanned(targets)]
+                in_cart = f"Reservation {held[0]}"
+            else:
+                request_date = calculate_request_date()
+                engine.warm_up()
+
+                availability = None
+                if release_at:
+                    prewarm(engine.availability, request_date)
+                    logger.info(f"Engine ready, holding until release at {release_at}")
+                    availability = wait_for_release(
+                        engine.availability, request_date, release_at
+                    )
+
+                held = [engine.book(request_date, availability)]
+                in_cart = f"Reservation {held[0]}"
+            logger.info(f"Availability latency: {engine.availability.stats.summary()}")
+
+            if release_at:
+                gap_ms = ms_since(release_at)
+                logger.info(f"{in_cart} in cart {gap_ms:.0f}ms after release")
+
+            checkout_held(engine, session, held, lease, browser)  # type: ignore
+    finally:
+        engine.close()
+
+
+def http_session(browser: Optional[Browser] = None) -> CachedSession:
+    """
+    An authenticated session for the REST API: the cached one if it still works,
+    otherwise a fresh login in the browser.
+
+    Args:
+        browser (Optional[Browser]): A shared browser to log in with instead of launching one
+
+    Returns:
+        CachedSession: The session
+    """
+    session = load_session() if settings.session_cache_enabled else None
+
+    if not (session and probe_session(session)):
+        with open_browser(browser) as login_browser:
+            context, page, customer_id = start_session(login_browser)
+            session = capture_session(page, customer_id)
+
+            context.close()
+
+    return session
+
+
+def checkout_held(
+    engine: HttpBookingEngine,
+    session: CachedSession,
+    held: list[int],
+    lease: LeaseGuard,
+    browser: Optional[Browser] = None,
+) -> None:
+    """
+    Pay for reservations the engine put in the cart, in the browser's PCI payment iframe.
+
+    Args:
+        engine (HttpBookingEngine): The engine holding the reservations
+        session (CachedSession): The engine's session, for the browser's storage state
+        held (list[int]): Reservation IDs in the cart
+        lease (LeaseGuard): The booking's lease, committed right before paying
+        browser (Optional[Browser]): A shared browser to use instead of launching one
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=settings.headless)
-        context = browser.new_context()
+    with open_browser(browser) as checkout_browser:
+        context = new_context(checkout_browser, session.storage_state)
+        context.add_cookies(engine.export_cookies())  # type: ignore
         page = context.new_page()
 
-        customer_id = login(page)
+        def checkout() -> None:
+            page.goto(f"{settings.base_url}{CHECKOUT_PATH}")
+            checkout_form(page, fence=lease.commit)
 
-        # TODO: add retry logic here
-        reservation_form(page, customer_id)
-        details_and_policy_questions(page)
-        confirm_booking(page)
-        checkout_form(page)
+        with timed_step("checkout"):
+            run_step("checkout", checkout)
 
         context.close()
-        browser.close()
+
+
+def hold_ids(responses: list[Any]) -> list[int]:
+    """
+    Reservation IDs of the holds a page placed, from the responses track_holds collected.
+
+    Args:
+        responses (list[Any]): Responses to the hold endpoint
+
+    Returns:
+        list[int]: IDs of the holds that went through
+    """
+    held = []
+    for response in responses:
+        try:
+            reservation_id = hold_id(response.json())
+        except Exception:
+            # not a JSON response
+            continue
+        if reservation_id is not None:
+            held.append(reservation_id)
+    return held
+
+
+def start_session(browser: Browser) -> tuple[BrowserContext, Page, int]:
+    """
+    Opens a fresh browser context and logs in, refreshing the session cache.
+
+    Args:
+        browser (Browser): Playwright browser object
+
+    Returns:
+        tuple[BrowserContext, Page, int]: The logged-in context, its page and the customer ID
+    """
+    if settings.session_cache_enabled:
+        clear_session()
+
+    context = new_context(browser)
+    page = context.new_page()
+
+    with timed_step("login"):
+        customer_id = run_step("login", lambda: login(page))
+
+    if settings.session_cache_enabled:
+        save_session(capture_session(page, customer_id))
+
+    return context, page, customer_id
 
 
 def login(page: Page):
@@ -44,33 +362,31 @@ def login(page: Page):
         page (Page): Playwright page object
     """
     page.goto(
-        "https://anc.apm.activecommunities.com/sfrecpark/signin",
+        f"{settings.base_url}/signin",
         wait_until="networkidle",
     )
 
     # email
-    email_input = page.locator(
-        "#main-content-body > div.layout__container--default.an-main__wrapper > div.an-module-container.module-sign > div > div > div > div:nth-child(1) > div.input-group.input-group--m.input-group--ng.intput__clear--detault > input"
-    )
+    email_input = page.locator(EMAIL_INPUT)
     email_input.fill(settings.sf_rec_email)
 
     # password
-    password_input = page.locator(
-        "#main-content-body > div.layout__container--default.an-main__wrapper > div.an-module-container.module-sign > div > div > div > div:nth-child(2) > div.input-group.input-group--m.input-group--ng.intput__clear--detault > input"
-    )
+    password_input = page.locator(PASSWORD_INPUT)
     password_input.fill(settings.sf_rec_password)
 
     # submit button
-    signin_button = page.locator(".btn-super")
+    signin_button = page.locator(SIGNIN_BUTTON)
     signin_button.click()
 
-    page.wait_for_timeout(3000)  # Add delay to ensure login is complete
+    # the redux state carries the customer ID once the signed-in page has loaded
+    with timed_wait("login") as timeout:
+        page.wait_for_function(LOGGED_IN_SCRIPT, timeout=timeout)
 
     # get customer id
     return get_customer_id(page)
 
 
-def reservation_form(page: Page, customer_id: int):
+def reservation_form(page: Page, customer_id: int) -> AvailabilityClient:
     """
     Navigates to the reservation page, selects date, adds reservation name, and finds + selects available fields.
     Checks both primary and alternate times for availability.
@@ -78,17 +394,42 @@ def reservation_form(page: Page, customer_id: int):
     Args:
         page (Page): Playwright page object
         customer_id (int): The customer's ID for the API request
+
+    Returns:
+        AvailabilityClient: The availability client used, with its latency stats
     """
-    page.goto(
-        f"https://anc.apm.activecommunities.com/sfrecpark/reservation/landing/quick?groupId={settings.facility_group_id}",
+    with timed_step("calendar"):
+        request_date = run_step("calendar", lambda: stage_reservation_form(page))
+    client = AvailabilityClient.from_page(page, customer_id)
+    selected: set[tuple[str, str]] = set()
+    run_step(
+        "selection",
+        lambda: select_field(page, request_date, client, selected=selected),
     )
 
+    return client
+
+
+def stage_reservation_form(page: Page, prefill_quantity: bool = False) -> str:
+    """
+    Navigates to the reservation page, selects the date and adds the reservation name.
+    Everything here can happen before the booking window opens.
+
+    Args:
+        page (Page): Playwright page object
+        prefill_quantity (bool): Whether to fill the quantity for every matching field ahead of time
+
+    Returns:
+        str: The requested date in YYYY-MM-DD format
+    """
+    page.goto(landing_url())
+
     request_date = calculate_request_date()
 
     # calendar
-    calendar_button = page.locator(".filter-section__date-time input")
+    calendar_button = page.locator(CALENDAR_INPUT)
     calendar_button.click()
-    calendar = page.locator(".an-calendar")
+    calendar = page.locator(CALENDAR)
 
     # Try to find the date in the current month view
     formatted_date = format_date_for_calendar(request_date)
@@ -98,12 +439,25 @@ def reservation_form(page: Page, customer_id: int):
     while attempt < max_attempts:
         desired_date = calendar.get_by_label(formatted_date)
         if desired_date.is_visible():
-            desired_date.click()
+            # picking a date reloads the availability grid
+            with timed_wait("date") as timeout:
+                with page.expect_response(
+                    lambda response: AVAILABILITY_PATH in response.url,
+                    timeout=timeout,
+                ):
+                    desired_date.click()
             break
 
+        # wait for the next month to render rather than for a fixed delay
+        month_view = calendar.text_content()
         next_button = calendar.get_by_role("button", name="Next")
         next_button.click()
-        page.wait_for_timeout(500)  # Wait for calendar to update
+        with timed_wait("calendar") as timeout:
+            page.wait_for_function(
+                CALENDAR_CHANGED_SCRIPT,
+                arg=[calendar.element_handle(), month_view],
+                timeout=timeout,
+            )
         attempt += 1
 
     if attempt >= max_attempts:
@@ -111,166 +465,136 @@ def reservation_form(page: Page, customer_id: int):
             f"Could not find date {request_date} in calendar after {max_attempts} attempts"
         )
 
-    page.wait_for_timeout(3000)
-
     # reservation name
-    name_input = page.locator("div.event-input .input-group__field")
+    name_input = page.locator(RESERVATION_NAME_INPUT)
     name_input.fill(settings.reservation_name)
 
-    # get availability
-    response = get_availability_details(page, request_date, customer_id)
-    availability = response["body"]["availability"]
-    time_slots = availability["time_slots"]
-    all_fields = availability["resources"]
-
-    fields = [
-        FieldInfo(
-            resource_id=field["resource_id"],
-            resource_name=field["resource_name"],
-            time_slots=time_slots,
-            time_slot_details=[
-                TimeSlotDetail(**detail, time=time)
-                for detail, time in zip(field["time_slot_details"], time_slots)
-            ],
-        )
-        for field in all_fields
-    ]
-
-    # Find available fields
-    available_field, selected_time = find_available_fields(
-        fields=fields,
-        primary_time=settings.desired_time_military,
-        alternate_times=settings.alt_desired_times_military,
-        field_prefix=settings.desired_field_starts_with,
-    )
-
-    if not available_field:
-        logger.error(
-            f"No fields available at {settings.desired_time_military} or any alternate times: {', '.join(settings.alt_desired_times_military)}"
-        )
-        exit()
+    if prefill_quantity:
+        # quantity lives in each field's row, so fill every row we might pick
+        field_cells = page.get_by_label(prefill_labels())
+        for field_cell in field_cells.all():
+            table_header = field_cell.locator("..").locator("..")
+            table_header.locator("input").fill(str(settings.group_quantity))
+
+    return request_date
+
+
+def select_field(
+    page: Page,
+    request_date: str,
+    client: AvailabilityClient,
+    quantity_prefilled: bool = False,
+    release_at: Optional[datetime] = None,
+    availability: Optional[dict] = None,
+    selected: Optional[set[tuple[str, str]]] = None,
+):
+    """
+    Fetches availability, finds + selects an available field and continues to the questions.
+    Checks both primary and alternate times for availability. Safe to retry with the same
+    selected set: cells an earlier attempt clicked are not clicked again, since that would
+    deselect them, and a field it no longer picks is deselected.
 
-    # select field
-    aria_label = available_field.resource_name
-    start_time = military_to_american(selected_time)
-    timeslot_selector = re.compile(f"^{aria_label} {start_time}")
+    Args:
+        page (Page): Playwright page object
+        request_date (str): Date to reserve in YYYY-MM-DD format
+        client (AvailabilityClient): Client to fetch availability with
+        quantity_prefilled (bool): Whether the quantity was already filled by stage_reservation_form
+        release_at (Optional[datetime]): Release instant to measure the time-to-click against
+        availability (Optional[dict]): An availability response that was just fetched; fetched
+            fresh otherwise
+        selected (Optional[set[tuple[str, str]]]): (field name, time) of the cells selected so
+            far, shared between attempts and updated as cells are clicked
+    """
+    if selected is None:
+        selected = set()
 
-    field_cell = page.get_by_label(timeslot_selector)
+    candidate = rank_fields(client, request_date, availability)
 
-    table_header = field_cell.locator("..").locator("..")
+    with timed_step("selection"):
+        if needs_quantity(candidate, quantity_prefilled):
+            field_cell = page.get_by_label(
+                field_label(candidate.resource_name, candidate.start_time)
+            )
+            table_header = field_cell.locator("..").locator("..")
 
-    quantity_stepper = table_header.locator("input")
-    quantity_stepper.fill(str(settings.group_quantity))
+            quantity_stepper = table_header.locator("input")
+            quantity_stepper.fill(str(settings.group_quantity))
 
-    field_cell.click()
+        deselect, select = selection_changes(candidate, selected)
+        for cell in deselect:
+            page.get_by_label(field_label(*cell)).click()
+            selected.discard(cell)
+        for cell in select:
+            page.get_by_label(field_label(*cell)).click()
+            selected.add(cell)
 
-    page.wait_for_timeout(1000)
+        log_click(candidate, release_at)
 
-    confirm_button = page.locator(".booking-detail__btn--continue")
-    confirm_button.click()
+        # the continue button is enabled once the selection registers
+        confirm_button = page.locator(CONTINUE_BUTTON)
+        with timed_wait("field") as timeout:
+            confirm_button.click(timeout=timeout)
 
 
-def get_availability_details(page: Page, request_date: str, customer_id: int):
+def details_and_policy_questions(page: Page):
     """
-    Makes an API request to get field availability details.
+    Fills out the reservation details form including activity type and policy questions.
+    All answers and the waiver are applied in one in-page pass; if that pass can't fill
+    the form, falls back to answering the dropdowns one by one.
 
     Args:
         page (Page): Playwright page object
-        request_date (str): Date to check availability for
-
-    Returns:
-        dict: JSON response containing availability details
     """
-    try:
-        # cserf token and cookies
-        csrf_token = page.evaluate("window.__csrfToken")
-
-        cookies = page.context.cookies()
-        cookie_dict: dict[str, str] = {}
-        for cookie in cookies:
-            if "name" in cookie and "value" in cookie:
-                cookie_dict[cookie["name"]] = cookie["value"]
-
-        # get availability data
-        response = requests.post(
-            url="https://anc.apm.activecommunities.com/sfrecpark/rest/reservation/quickreservation/availability?locale=en-US",
-            json={
-                "facility_group_id": settings.facility_group_id,
-                "customer_id": customer_id,
-                "company_id": 0,
-                "reserve_date": request_date,
-                "resident": False,
-                "reload": False,
-                "change_time_range": False,
-            },
-            cookies=cookie_dict,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-                "x-csrf-token": csrf_token,
-                "x-requested-with": "XMLHttpRequest",
-            },
-        )
 
-        response.raise_for_status()
+    # modal
+    modal = page.locator(QUESTIONS_MODAL)
+    with timed_wait("questions") as timeout:
+        modal.wait_for(state="visible", timeout=timeout)
 
-        return response.json()
-    except Exception as e:
-        raise e
+    try:
+        fill_questions(page)
+    except ValueError as e:
+        logger.warning(f"{e}, answering one by one")
+        fill_questions_stepwise(page)
 
+    # save button
+    save_button = page.get_by_role("button", name="Save")
+    save_button.click()
 
-def details_and_policy_questions(page: Page):
+
+def fill_questions_stepwise(page: Page):
     """
-    Fills out the reservation details form including activity type and policy questions.
+    Answers the activity and policy dropdowns by position and checks the waiver, one click at a time.
 
     Note:
         All selectors are from using the dev tools -> Super ugly
 
     Args:
         page (Page): Playwright page object
-        activity (str): Type of activity to select
     """
 
-    # modal
-    modal = page.locator(".modal.is-open")
-    modal.wait_for(state="visible", timeout=10000)
-
     # activity dropdown
-    activity_dropdown = page.locator(
-        "#main-content-body > div > div.an-module-container > div > div > div.modal-wrap > div.modal.is-open.quick-need-to-answer > section > div.modal-body > div.enroll-question > div.an-survey > fieldset > div > div:nth-child(1) > fieldset > div > div.afx-col.question-answer-container.enroll-question-answer > div > div > div.dropdown__button.input__field"
-    )
+    activity_dropdown = page.locator(ACTIVITY_DROPDOWN)
     activity_dropdown.click()
-    activity_option = page.locator(f"li[title='{settings.sport}']")
+    activity_option = page.locator(DROPDOWN_OPTION.format(settings.sport))
     activity_option.scroll_into_view_if_needed()
     activity_option.click()
 
     # policy questions
-    policy_question_selectors = [
-        "#main-content-body > div > div.an-module-container > div > div > div.modal-wrap > div.modal.is-open.quick-need-to-answer > section > div.modal-body > div.enroll-question > div.an-survey > fieldset > div > div:nth-child(2) > fieldset > div > div.afx-col.question-answer-container.enroll-question-answer > div > div > div.dropdown__button.input__field",
-        "#main-content-body > div > div.an-module-container > div > div > div.modal-wrap > div.modal.is-open.quick-need-to-answer > section > div.modal-body > div.enroll-question > div.an-survey > fieldset > div > div:nth-child(3) > fieldset > div > div.afx-col.question-answer-container.enroll-question-answer > div > div > div.dropdown__button.input__field",
-        "#main-content-body > div > div.an-module-container > div > div > div.modal-wrap > div.modal.is-open.quick-need-to-answer > section > div.modal-body > div.enroll-question > div.an-survey > fieldset > div > div:nth-child(4) > fieldset > div > div.afx-col.question-answer-container.enroll-question-answer > div > div > div.dropdown__button.input__field",
-        "#main-content-body > div > div.an-module-container > div > div > div.modal-wrap > div.modal.is-open.quick-need-to-answer > section > div.modal-body > div.enroll-question > div.an-survey > fieldset > div > div:nth-child(5) > fieldset > div > div.afx-col.question-answer-container.enroll-question-answer > div > div > div.dropdown__button.input__field",
-    ]
-    for selector in policy_question_selectors:
+    for selector in POLICY_QUESTION_DROPDOWNS:
         dropdown = page.locator(selector)
         dropdown.click()
 
         dropdown_parent = dropdown.locator("..")
 
-        yes_option = dropdown_parent.locator("li[title='Yes']")
+        yes_option = dropdown_parent.locator(DROPDOWN_OPTION.format(DEFAULT_ANSWER))
         yes_option.scroll_into_view_if_needed()
         yes_option.click()
 
     # waiver checkbox
-    waiver_checkbox = page.locator(
-        "label:has-text('I have read and agree to ATHLETIC FIELD TERMS AND CONDITIONS') input[type='checkbox']"
-    )
+    waiver_checkbox = page.locator(WAIVER_CHECKBOX)
     waiver_checkbox.check()
 
-    # save button
-    save_button = page.get_by_role("button", name="Save")
-    save_button.click()
-
 
 def confirm_booking(page: Page):
     """
@@ -280,39 +604,60 @@ def confirm_booking(page: Page):
         page (Page): Playwright page object
     """
 
-    # confirm button
-    confirm_button = page.locator(".booking-detail__btn--continue")
-    confirm_button.click()
+    # a retried attempt picks up where the last one stopped
+    if CHECKOUT_PATH not in page.url:
+        modal_confirm_button = page.locator(MODAL_CONFIRM_BUTTON)
+
+        # confirm button
+        if not modal_confirm_button.is_visible():
+            confirm_button = page.locator(CONTINUE_BUTTON)
+            confirm_button.click()
 
-    # confirm button
-    confirm_button = page.locator(".modal-box .btn-strong")
-    confirm_button.click()
+        # confirm button
+        modal_confirm_button.click()
 
-    page.wait_for_timeout(3000)
-    page.wait_for_load_state("networkidle")
+    # confirming navigates to checkout, which is ready once the payment iframe is attached
+    with timed_wait("confirm") as timeout:
+        page.wait_for_url(f"**{CHECKOUT_PATH}*", timeout=timeout)
+        page.locator(PAYMENT_IFRAME).wait_for(state="attached", timeout=timeout)
 
 
-def checkout_form(page: Page):
+def checkout_form(page: Page, fence: Optional[Callable[[], None]] = None):
     """
     Fills out the payment form in the checkout iframe.
 
     Args:
         page (Page): Playwright page object
+        fence (Optional[Callable[[], None]]): Raises if this worker may no longer pay,
+            called right before submitting payment; the booking counts as done from then on
     """
 
     # Need to wait for iframe to be present
-    iframe = page.frame_locator("iframe[name='primaryPCIPaymentIframe']")
+    iframe = page.frame_locator(PAYMENT_IFRAME)
 
     # cvv
-    cvv = iframe.locator(".form-control")
-    cvv.wait_for(state="visible")
+    cvv = iframe.locator(CVV_INPUT)
+    with timed_wait("checkout") as timeout:
+        cvv.wait_for(state="visible", timeout=timeout)
     cvv.fill(settings.cvv)
 
-    # submit button
-    pay_button = page.locator(".pay__button")
-    pay_button.click()
+    # submit button, ready before the click so a failure up to here is still retryable
+    pay_button = page.locator(PAY_BUTTON)
+    with timed_wait("checkout") as timeout:
+        pay_button.wait_for(state="visible", timeout=timeout)
+    checkout_url = page.url
+    if fence:
+        fence()
 
-    page.wait_for_timeout(10000)
+    # from the click on nothing is retried, paying again could double-charge
+    try:
+        pay_button.click()
+
+        # payment is done once checkout navigates to the confirmation
+        with timed_wait("checkout") as timeout:
+            page.wait_for_url(lambda url: url != checkout_url, timeout=timeout)
+    except Exception as e:
+        raise payment_unconfirmed(e) from e
 
 
 if __name__ == "__main__":
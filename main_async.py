@@ -0,0 +1,459 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Optional
+from playwright.async_api import Browser, BrowserContext, Page, async_playwright
+from src._utils.api import AVAILABILITY_PATH, CHECKOUT_PATH
+from src._utils.availability_client import AvailabilityClient
+from src._utils.booking import (
+    close_client,
+    field_label,
+    hold_id,
+    landing_url,
+    log_click,
+    needs_quantity,
+    payment_unconfirmed,
+    prefill_labels,
+    prewarm,
+    rank_fields,
+    selection_changes,
+    stand_down,
+    wait_for_release,
+)
+from src._utils.date_utils import calculate_request_date, format_date_for_calendar
+from src._utils.env import settings
+from src._utils.field_utils import Candidate
+from src._utils.http_engine import HttpBookingEngine
+from src._utils.lease import exclusive_booking_async
+from src._utils.logger import setup_logger
+from src._utils.metrics import timed_step
+from src._utils.questions import DEFAULT_ANSWER, fill_questions_async
+from src._utils.retry import run_step_async
+from src._utils.selectors import (
+    ACTIVITY_DROPDOWN,
+    CALENDAR,
+    CALENDAR_CHANGED_SCRIPT,
+    CALENDAR_INPUT,
+    CONTINUE_BUTTON,
+    CVV_INPUT,
+    DROPDOWN_OPTION,
+    EMAIL_INPUT,
+    LOGGED_IN_SCRIPT,
+    MODAL_CONFIRM_BUTTON,
+    PASSWORD_INPUT,
+    PAY_BUTTON,
+    PAYMENT_IFRAME,
+    POLICY_QUESTION_DROPDOWNS,
+    QUESTIONS_MODAL,
+    RESERVATION_NAME_INPUT,
+    SIGNIN_BUTTON,
+    WAIVER_CHECKBOX,
+)
+from src._utils.session_cache import (
+    CachedSession,
+    build_session,
+    clear_session,
+    load_session,
+    probe_session,
+    save_session,
+)
+from src._utils.utils import (
+    cookies_to_dict,
+    new_context_async,
+    parse_customer_id,
+    track_holds,
+)
+from src._utils.waits import timed_wait
+
+logger = setup_logger()
+
+
+async def main_async(release_at: Optional[datetime] = None):
+    """
+    The browser flow on async Playwright, running work that doesn't need the page
+    alongside it: the availability fetch and candidate ranking run while the UI is still
+    navigating to the date, and the session's auth is extracted in one concurrent batch.
+    A shared sync browser can't be driven from asyncio, so this always launches its own.
+
+    Args:
+        release_at (Optional[datetime]): When set, runs in armed mode: logs in and stages the
+            form ahead of time, then holds until this instant before selecting a field
+    """
+    session = load_session() if settings.session_cache_enabled else None
+
+    # probe the cached session while the browser is starting
+    session_probe = (
+        asyncio.create_task(asyncio.to_thread(probe_session, session))
+        if session
+        else None
+    )
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=settings.headless)
+
+        if session and session_probe and await session_probe:
+            logger.info("Reusing cached session")
+            context = await new_context_async(browser, session.storage_state)
+            page = await context.new_page()
+        else:
+            context, page, session = await start_session(browser)
+        holds = track_holds(context)
+
+        request_date = calculate_request_date()
+        client = AvailabilityClient.from_session(session)
+        ranking: Optional[asyncio.Task[Candidate]] = None
+        try:
+            if release_at:
+                # stage the form while the client's connection warms up
+                with timed_step("calendar"):
+                    await asyncio.gather(
+                        run_step_async(
+                            "calendar",
+                            lambda: stage_reservation_form(
+                                page, request_date, prefill_quantity=True
+                            ),
+                        ),
+                        asyncio.to_thread(client.warm_up),
+                    )
+                await asyncio.to_thread(prewarm, client, request_date)
+                logger.info(f"Form staged, holding until release at {release_at}")
+                availability = await asyncio.to_thread(
+                    wait_for_release, client, request_date, release_at
+                )
+                ranking = asyncio.create_task(
+                    asyncio.to_thread(rank_fields, client, request_date, availability)
+                )
+            else:
+                # availability and ranking don't need the page, so they run while it navigates
+                ranking = asyncio.create_task(
+                    asyncio.to_thread(rank_fields, client, request_date)
+                )
+                with timed_step("calendar"):
+                    await run_step_async(
+                        "calendar", lambda: stage_reservation_form(page, request_date)
+                    )
+
+            with timed_step("selection"):
+                # only the first attempt uses the ranking that ran alongside the page
+                first_candidate = iter([await ranking])
+                selected: set[tuple[str, str]] = set()
+
+                async def select() -> None:
+                    candidate = next(first_candidate, None) or await asyncio.to_thread(
+                        rank_fields, client, request_date
+                    )
+                    await select_field(
+                        page,
+                        candidate,
+                        selected,
+                        quantity_prefilled=bool(release_at),
+                        release_at=release_at,
+                    )
+
+                await run_step_async("selection", select)
+        finally:
+            # the ranking thread uses the client, so it has to finish before the client closes
+            if ranking is not None:
+                await asyncio.gather(ranking, return_exceptions=True)
+            close_client(client)
+
+        with timed_step("questions"):
+            await run_step_async(
+                "questions", lambda: details_and_policy_questions(page)
+            )
+        async with exclusive_booking_async() as lease:
+            if lease is None:
+                await release_page_holds(context, session, holds)
+            else:
+                with timed_step("confirm"):
+                    await asyncio.to_thread(lease.check)
+                    await run_step_async("confirm", lambda: confirm_booking(page))
+                with timed_step("checkout"):
+                    await run_step_async(
+                        "checkout", lambda: checkout_form(page, fence=lease.commit)
+                    )
+
+        await context.close()
+        await browser.close()
+
+
+async def release_page_holds(
+    context: BrowserContext, session: CachedSession, holds: list[Any]
+) -> None:
+    """
+    Release the holds the page placed, over REST on the page's session.
+
+    Args:
+        context (BrowserContext): The page's context, for its current cookies
+        session (CachedSession): The flow's session, for the CSRF token and customer ID
+        holds (list[Any]): Responses to the hold endpoint, from track_holds
+    """
+    held = []
+    for response in holds:
+        try:
+            reservation_id = hold_id(await response.json())
+        except Exception:
+            # not a JSON response
+            continue
+        if reservation_id is not None:
+            held.append(reservation_id)
+
+    engine = HttpBookingEngine(
+        cookies_to_dict(await context.cookies()),
+        session.csrf_token,
+        session.customer_id,
+    )
+    await asyncio.to_thread(stand_down, engine, held)
+
+
+async def start_session(browser: Browser) -> tuple[BrowserContext, Page, CachedSession]:
+    """
+    Opens a fresh browser context and logs in, refreshing the session cache.
+
+    Args:
+        browser (Browser): Async Playwright browser object
+
+    Returns:
+        tuple[BrowserContext, Page, CachedSession]: The logged-in context, its page and session
+    """
+    if settings.session_cache_enabled:
+        clear_session()
+
+    context = await new_context_async(browser)
+    page = await context.new_page()
+
+    with timed_step("login"):
+        customer_id = await run_step_async("login", lambda: login(page))
+
+    # the context-level calls don't queue behind the page evaluation
+    storage_state, csrf_token, cookies = await asyncio.gather(
+        context.storage_state(),
+        page.evaluate("window.__csrfToken"),
+        context.cookies(),
+    )
+    session = build_session(
+        dict(storage_state), csrf_token, cookies_to_dict(cookies), customer_id
+    )
+
+    if settings.session_cache_enabled:
+        save_session(session)
+
+    return context, page, session
+
+
+async def login(page: Page) -> int:
+    """
+    Handles the login process for SF Rec website.
+
+    Args:
+        page (Page): Async Playwright page object
+
+    Returns:
+        int: The customer ID from the user's account
+    """
+    await page.goto(f"{settings.base_url}/signin", wait_until="networkidle")
+
+    await page.locator(EMAIL_INPUT).fill(settings.sf_rec_email)
+    await page.locator(PASSWORD_INPUT).fill(settings.sf_rec_password)
+    await page.locator(SIGNIN_BUTTON).click()
+
+    with timed_wait("login") as timeout:
+        await page.wait_for_function(LOGGED_IN_SCRIPT, timeout=timeout)
+
+    return parse_customer_id(await page.evaluate("window.__reduxInitialState"))
+
+
+async def stage_reservation_form(
+    page: Page, request_date: str, prefill_quantity: bool = False
+) -> None:
+    """
+    Navigates to the reservation page, selects the date and adds the reservation name.
+
+    Args:
+        page (Page): Async Playwright page object
+        request_date (str): Date to reserve in YYYY-MM-DD format
+        prefill_quantity (bool): Whether to fill the quantity for every matching field ahead of time
+    """
+    await page.goto(landing_url())
+
+    await page.locator(CALENDAR_INPUT).click()
+    calendar = page.locator(CALENDAR)
+
+    formatted_date = format_date_for_calendar(request_date)
+    max_attempts = 3  # Maximum number of months to look ahead
+
+    for _ in range(max_attempts):
+        desired_date = calendar.get_by_label(formatted_date)
+        if await desired_date.is_visible():
+            with timed_wait("date") as timeout:
+                async with page.expect_response(
+                    lambda response: AVAILABILITY_PATH in response.url,
+                    timeout=timeout,
+                ):
+                    await desired_date.click()
+            break
+
+        month_view = await calendar.text_content()
+        await calendar.get_by_role("button", name="Next").click()
+        with timed_wait("calendar") as timeout:
+            await page.wait_for_function(
+                CALENDAR_CHANGED_SCRIPT,
+                arg=[await calendar.element_handle(), month_view],
+                timeout=timeout,
+            )
+    else:
+        raise ValueError(
+            f"Could not find date {request_date} in calendar after {max_attempts} attempts"
+        )
+
+    fills = [page.locator(RESERVATION_NAME_INPUT).fill(settings.reservation_name)]
+
+    if prefill_quantity:
+        # quantity lives in each field's row, so fill every row we might pick
+        field_cells = page.get_by_label(prefill_labels())
+        for field_cell in await field_cells.all():
+            table_header = field_cell.locator("..").locator("..")
+            fills.append(
+                table_header.locator("input").fill(str(settings.group_quantity))
+            )
+
+    await asyncio.gather(*fills)
+
+
+async def select_field(
+    page: Page,
+    candidate: Candidate,
+    selected: set[tuple[str, str]],
+    quantity_prefilled: bool = False,
+    release_at: Optional[datetime] = None,
+):
+    """
+    Selects a ranked field and continues to the questions. Safe to retry with the same
+    selected set: cells an earlier attempt clicked are not clicked again, since that would
+    deselect them, and a field that is no longer the candidate is deselected.
+
+    Args:
+        page (Page): Async Playwright page object
+        candidate (Candidate): The field and slots to select
+        selected (set[tuple[str, str]]): (field name, time) of the cells selected so far,
+            shared between attempts and updated as cells are clicked
+        quantity_prefilled (bool): Whether the quantity was already filled by stage_reservation_form
+        release_at (Optional[datetime]): Release instant to measure the time-to-click against
+    """
+    if needs_quantity(candidate, quantity_prefilled):
+        field_cell = page.get_by_label(
+            field_label(candidate.resource_name, candidate.start_time)
+        )
+        table_header = field_cell.locator("..").locator("..")
+        await table_header.locator("input").fill(str(settings.group_quantity))
+
+    deselect, select = selection_changes(candidate, selected)
+    for cell in deselect:
+        await page.get_by_label(field_label(*cell)).click()
+        selected.discard(cell)
+    for cell in select:
+        await page.get_by_label(field_label(*cell)).click()
+        selected.add(cell)
+
+    log_click(candidate, release_at)
+
+    with timed_wait("field") as timeout:
+        await page.locator(CONTINUE_BUTTON).click(timeout=timeout)
+
+
+async def details_and_policy_questions(page: Page):
+    """
+    Fills out the reservation details form including activity type and policy questions,
+    in one in-page pass with a one-by-one fallback.
+
+    Args:
+        page (Page): Async Playwright page object
+    """
+    modal = page.locator(QUESTIONS_MODAL)
+    with timed_wait("questions") as timeout:
+        await modal.wait_for(state="visible", timeout=timeout)
+
+    try:
+        await fill_questions_async(page)
+    except ValueError as e:
+        logger.warning(f"{e}, answering one by one")
+        await fill_questions_stepwise(page)
+
+    await page.get_by_role("button", name="Save").click()
+
+
+async def fill_questions_stepwise(page: Page):
+    """
+    Answers the activity and policy dropdowns by position and checks the waiver, one click at a time.
+
+    Args:
+        page (Page): Async Playwright page object
+    """
+    await page.locator(ACTIVITY_DROPDOWN).click()
+    activity_option = page.locator(DROPDOWN_OPTION.format(settings.sport))
+    await activity_option.scroll_into_view_if_needed()
+    await activity_option.click()
+
+    for selector in POLICY_QUESTION_DROPDOWNS:
+        dropdown = page.locator(selector)
+        await dropdown.click()
+
+        yes_option = dropdown.locator("..").locator(
+            DROPDOWN_OPTION.format(DEFAULT_ANSWER)
+        )
+        await yes_option.scroll_into_view_if_needed()
+        await yes_option.click()
+
+    await page.locator(WAIVER_CHECKBOX).check()
+
+
+async def confirm_booking(page: Page):
+    """
+    Confirms the booking by clicking through confirmation buttons.
+
+    Args:
+        page (Page): Async Playwright page object
+    """
+    # a retried attempt picks up where the last one stopped
+    if CHECKOUT_PATH not in page.url:
+        modal_confirm_button = page.locator(MODAL_CONFIRM_BUTTON)
+        if not await modal_confirm_button.is_visible():
+            await page.locator(CONTINUE_BUTTON).click()
+        await modal_confirm_button.click()
+
+    with timed_wait("confirm") as timeout:
+        await page.wait_for_url(f"**{CHECKOUT_PATH}*", timeout=timeout)
+        await page.locator(PAYMENT_IFRAME).wait_for(state="attached", timeout=timeout)
+
+
+async def checkout_form(page: Page, fence: Optional[Callable[[], None]] = None):
+    """
+    Fills out the payment form in the checkout iframe.
+
+    Args:
+        page (Page): Async Playwright page object
+        fence (Optional[Callable[[], None]]): Raises if this worker may no longer pay,
+            called right before submitting payment; the booking counts as done from then on
+    """
+    cvv = page.frame_locator(PAYMENT_IFRAME).locator(CVV_INPUT)
+    with timed_wait("checkout") as timeout:
+        await cvv.wait_for(state="visible", timeout=timeout)
+    await cvv.fill(settings.cvv)
+
+    pay_button = page.locator(PAY_BUTTON)
+    with timed_wait("checkout") as timeout:
+        await pay_button.wait_for(state="visible", timeout=timeout)
+    checkout_url = page.url
+    if fence:
+        await asyncio.to_thread(fence)
+
+    # from the click on nothing is retried, paying again could double-charge
+    try:
+        await pay_button.click()
+        with timed_wait("checkout") as timeout:
+            await page.wait_for_url(lambda url: url != checkout_url, timeout=timeout)
+    except Exception as e:
+        raise payment_unconfirmed(e) from e
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async())
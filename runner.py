@@ -0,0 +1,138 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+from playwright.sync_api import sync_playwright
+from pydantic import BaseModel
+from main import main
+from src._utils.date_utils import get_release_instant
+from src._utils.env import Settings, default_settings, settings, use_settings
+from src._utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class ProfileResult(BaseModel):
+    name: str
+    success: bool
+    duration_seconds: float
+    error: Optional[str] = None
+
+
+def load_profiles(path: str) -> dict[str, Settings]:
+    """
+    Loads reservation profiles. Each profile is a JSON object with a "name" and any
+    settings to override on top of the environment, e.g.
+
+        [{"name": "tuesday", "desired_weekday": "TUESDAY", "desired_field_starts_with": "FIELD - Main"}]
+
+    Args:
+        path (str): Path to the profiles JSON file
+
+    Returns:
+        dict[str, Settings]: Settings for each profile, keyed by name
+    """
+    with open(path) as f:
+        entries = json.load(f)
+
+    profiles: dict[str, Settings] = {}
+    for entry in entries:
+        overrides = dict(entry)
+        name = overrides.pop("name")
+        # profiles may log in as different users, so don't share a session cache
+        overrides.setdefault("session_cache_path", f".session_cache.{name}.json")
+
+        profiles[name] = Settings(**{**default_settings.model_dump(), **overrides})
+
+    return profiles
+
+
+def run_profile(
+    name: str, profile: Settings, cdp_url: str, release_at: Optional[datetime] = None
+) -> ProfileResult:
+    """
+    Runs one profile's booking in its own context of the shared browser.
+
+    Args:
+        name (str): The profile name
+        profile (Settings): The profile's settings
+        cdp_url (str): CDP endpoint of the shared browser
+        release_at (Optional[datetime]): The release instant, in armed mode. Computed
+            from the profile's schedule_time when not given
+
+    Returns:
+        ProfileResult: How the profile's booking went
+    """
+    started = time.perf_counter()
+
+    with use_settings(profile):
+        if release_at is None and settings.armed_mode:
+            release_at = get_release_instant(settings.schedule_time)
+
+        try:
+            logger.info(f"[{name}] Starting reservation")
+            # sync Playwright is per-thread, so each profile connects to the shared browser
+            with sync_playwright() as p:
+                browser = p.chromium.connect_over_cdp(cdp_url)
+                main(release_at, browser=browser)
+        except Exception as e:
+            logger.error(f"[{name}] Reservation failed: {e}")
+            return ProfileResult(
+                name=name,
+                success=False,
+                duration_seconds=time.perf_counter() - started,
+                error=str(e),
+            )
+
+    logger.info(f"[{name}] Reservation completed")
+    return ProfileResult(
+        name=name, success=True, duration_seconds=time.perf_counter() - started
+    )
+
+
+def run_profiles(
+    path: Optional[str] = None, release_at: Optional[datetime] = None
+) -> list[ProfileResult]:
+    """
+    Runs every profile concurrently, up to max_concurrent_profiles at a time, each in its
+    own BrowserContext of a single Chromium.
+
+    Args:
+        path (Optional[str]): Path to the profiles JSON file, defaults to profiles_path
+        release_at (Optional[datetime]): The release instant, in armed mode, already
+            aligned to the server's clock
+
+    Returns:
+        list[ProfileResult]: One result per profile, in file order
+    """
+    profiles = load_profiles(path or settings.profiles_path)
+    cdp_url = f"http://127.0.0.1:{settings.cdp_port}"
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(
+            headless=settings.headless,
+            args=[f"--remote-debugging-port={settings.cdp_port}"],
+        )
+
+        with ThreadPoolExecutor(
+            max_workers=settings.max_concurrent_profiles
+        ) as executor:
+            results = list(
+                executor.map(
+                    lambda item: run_profile(item[0], item[1], cdp_url, release_at),
+                    profiles.items(),
+                )
+            )
+
+        browser.close()
+
+    for result in results:
+        status = "succeeded" if result.success else f"failed: {result.error}"
+        logger.info(f"[{result.name}] {status} in {result.duration_seconds:.1f}s")
+
+    return results
+
+
+if __name__ == "__main__":
+    run_profiles()
@@ -1,53 +1,304 @@
-import schedule
+import json
+import os
+import resource
+import select
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
 import time
+from datetime import datetime, timedelta
+from typing import Optional
 from src._utils.logger import setup_logger
-from src._utils.env import settings
-from src._utils.test_utils import test_scheduler
-from main import main
+from src._utils.schedule_config import ScheduleConfig, load_schedule_config
+from src._utils.timing import next_fire_time, shift, sleep_until_precise
+
+# The scheduler idles between weekly runs on a small VM next to Chromium, so it only
+# imports the standard library and the modules above. Each run happens in a fresh worker
+# process (worker.py) that does the heavy imports and launches the browser shortly
+# before the fire time, then exits and gives the memory back.
 
 logger = setup_logger()
 
+# How long to wait before restarting a watcher that crashed
+WATCH_RESTART_SECONDS = 60
+# How long to wait before trying again when a worker can't be spawned
+SPAWN_RETRY_SECONDS = 30
+
+
+def now(config: ScheduleConfig) -> datetime:
+    """Current time in the configured timezone."""
+    return datetime.now(config.tzinfo)
+
+
+def next_run(
+    config: ScheduleConfig, after: Optional[datetime] = None
+) -> tuple[datetime, Optional[datetime]]:
+    """
+    Compute when the job fires next, in the configured timezone.
+
+    Args:
+        config (ScheduleConfig): The scheduler's settings
+        after (Optional[datetime]): The fire time of the last handled run; the next one is
+            strictly later, even if that run's worker exited before firing
+
+    Returns:
+        tuple[datetime, Optional[datetime]]: The fire time, and in armed mode the release
+            instant it leads
+    """
+    start = max(now(config), after) if after else now(config)
+    if not config.armed_mode:
+        return next_fire_time(
+            config.weekday, config.time, config.tzinfo, after=start
+        ), None
 
-def job() -> None:
-    """Run the reservation bot."""
+    # In armed mode the schedule time is the release instant, so start early
+    lead = timedelta(minutes=config.armed_lead_minutes)
+    release_at = next_fire_time(
+        config.weekday, config.time, config.tzinfo, after=shift(start, lead)
+    )
+    return shift(release_at, -lead), release_at
+
+
+def rss_mib() -> float:
+    """Resident memory of this process in MiB (peak resident memory off Linux)."""
     try:
-        logger.info("Starting reservation bot...")
-        main()
-        logger.info("Reservation bot completed successfully")
-    except Exception as e:
-        logger.error(f"Error in reservation bot: {e}")
-
-
-def run_scheduler() -> None:
-    """Set up and run the scheduler."""
-    # Parse the schedule time
-    schedule_hour, schedule_minute = map(int, settings.schedule_time.split(":"))
-
-    # Schedule the job
-    if settings.schedule_frequency == "WEEKLY":
-        # Get the weekday method (e.g., schedule.every().wednesday)
-        weekday_method = getattr(schedule.every(), settings.schedule_weekday.lower())
-        # Schedule the job at the specified time
-        weekday_method.at(f"{schedule_hour:02d}:{schedule_minute:02d}").do(job)  # type: ignore
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def serve_metrics(config: ScheduleConfig) -> Optional[str]:
+    """
+    Serve the metrics of every worker run on the metrics port, if enabled. Workers write
+    their samples to a shared directory (prometheus_client's multiprocess mode), which
+    outlives them, so counters keep adding up across runs.
+
+    Args:
+        config (ScheduleConfig): The scheduler's settings
+
+    Returns:
+        Optional[str]: The directory workers should write their samples to
+    """
+    if not config.metrics_enabled:
+        return None
+
+    from prometheus_client import CollectorRegistry, start_http_server
+    from prometheus_client.multiprocess import MultiProcessCollector
+
+    metrics_dir = tempfile.mkdtemp(prefix="sf_rec_metrics_")
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=metrics_dir)
+    start_http_server(config.metrics_port, registry=registry)
+    logger.info(f"Serving metrics on port {config.metrics_port}")
+
+    return metrics_dir
+
+
+def worker_env(metrics_dir: Optional[str]) -> dict[str, str]:
+    """Environment of a child process, pointed at the shared metrics directory."""
+    env = dict(os.environ)
+    if metrics_dir:
+        env["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+    return env
+
+
+def supervise_watcher(metrics_dir: Optional[str]) -> None:
+    """
+    Keep the cancellation watcher (watch.py) running in its own process alongside the
+    schedule, restarting it if it crashes. Returns once it exits cleanly, which it does
+    when every watched date is booked; the scheduler starts it again on its next cycle,
+    when there are new dates to watch.
+
+    Args:
+        metrics_dir (Optional[str]): Directory the watcher writes its metrics to
+    """
+    while True:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "watch"], env=worker_env(metrics_dir)
+        )
+        exit_code = process.wait()
+        if exit_code == 0:
+            logger.info("Watcher finished")
+            return
+
+        logger.warning(
+            f"Watcher exited with code {exit_code}, restarting in {WATCH_RESTART_SECONDS}s"
+        )
+        time.sleep(WATCH_RESTART_SECONDS)
+
+
+def run_worker(
+    fire_at: datetime,
+    release_at: Optional[datetime],
+    metrics_dir: Optional[str],
+    timeout: timedelta,
+) -> bool:
+    """
+    Spawn a worker process for one run and wait for it to finish, logging how long it took
+    to start and how the run went. A worker still running timeout after fire_at is killed
+    along with its browser.
+
+    Args:
+        fire_at (datetime): When the worker should run the job
+        release_at (Optional[datetime]): The release instant, in armed mode
+        metrics_dir (Optional[str]): Directory the worker writes its metrics to
+        timeout (timedelta): How long after fire_at the worker may run
+
+    Returns:
+        bool: True if the run succeeded
+    """
+    plan = {
+        "fire_at": fire_at.isoformat(),
+        "release_at": release_at.isoformat() if release_at else None,
+    }
+    env = worker_env(metrics_dir)
+
+    read_fd, write_fd = os.pipe()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "worker",
+            "--plan",
+            json.dumps(plan),
+            "--report-fd",
+            str(write_fd),
+        ],
+        env=env,
+        pass_fds=(write_fd,),
+        # its own process group, so a hung worker can be killed with its browser
+        start_new_session=True,
+    )
+    os.close(write_fd)
+
+    deadline = fire_at + timeout
+
+    def remaining() -> float:
+        return max(0.0, (deadline - datetime.now(fire_at.tzinfo)).total_seconds())
+
+    result: Optional[dict] = None
+    pending = b""
+    with os.fdopen(read_fd, "rb", buffering=0) as reports:
+        while select.select([reports], [], [], remaining())[0]:
+            chunk = reports.read(65536)
+            if not chunk:
+                break
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                message = json.loads(line)
+                if message["event"] == "ready":
+                    startup_ms = (time.perf_counter() - started) * 1000
+                    logger.info(
+                        f"Worker ready in {startup_ms:.0f}ms "
+                        f"(browser launch {message['launch_ms']:.0f}ms)"
+                    )
+                elif message["event"] == "result":
+                    result = message
+
+    try:
+        exit_code = process.wait(remaining())
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+        logger.error(
+            f"Worker still running {timeout} after firing, killed it"
+            + (" after it reported a result" if result else "")
+        )
+        return False
+
+    if result is None:
+        logger.error(f"Worker exited with code {exit_code} without a result")
+        return False
+
+    first_request = result["first_request_ms"]
+    logger.info(
+        f"Run {'succeeded' if result['success'] else 'failed'}: fired {result['jitter_ms']:+.1f}ms "
+        f"from the scheduled instant, first request "
+        + (
+            f"{first_request:.0f}ms after firing"
+            if first_request is not None
+            else "never made"
+        )
+    )
+    return result["success"]
+
+
+def run_scheduler(run_in_seconds: Optional[float] = None) -> None:
+    """
+    Set up and run the scheduler.
+
+    Args:
+        run_in_seconds (Optional[float]): Run once this many seconds from now instead of on
+            the schedule, to measure worker startup
+    """
+    config = load_schedule_config()
+    metrics_dir = serve_metrics(config)
+
+    if run_in_seconds is not None:
+        fire_at = shift(now(config), timedelta(seconds=run_in_seconds))
+        logger.info(f"Idle RSS: {rss_mib():.1f} MiB")
+        run_worker(
+            fire_at,
+            None,
+            metrics_dir,
+            timedelta(minutes=config.worker_timeout_minutes),
+        )
+        return
+
+    if config.weekday is not None:
         logger.info(
-            f"Scheduled job to run every {settings.schedule_weekday} at {settings.schedule_time} {settings.timezone}"
+            f"Scheduled job to run every {next_run(config)[0]:%A} at {config.time} {config.timezone}"
         )
     else:  # DAILY
-        schedule.every().day.at(f"{schedule_hour:02d}:{schedule_minute:02d}").do(job)  # type: ignore
+        logger.info(f"Scheduled job to run daily at {config.time} {config.timezone}")
+    if config.armed_mode:
         logger.info(
-            f"Scheduled job to run daily at {settings.schedule_time} {settings.timezone}"
+            f"Armed mode: starting {config.armed_lead_minutes} minutes before release"
         )
 
     # Run the scheduler
+    handled: Optional[datetime] = None
+    watcher: Optional[threading.Thread] = None
     while True:
-        schedule.run_pending()
-        time.sleep(60)
+        if config.watch_enabled and not (watcher and watcher.is_alive()):
+            watcher = threading.Thread(
+                target=supervise_watcher, args=(metrics_dir,), daemon=True
+            )
+            watcher.start()
 
+        fire_at, release_at = next_run(config, after=handled)
+        logger.info(f"Next run at {fire_at.isoformat()}, idle RSS {rss_mib():.1f} MiB")
 
-if __name__ == "__main__":
-    import sys
+        # the worker needs time to import, launch the browser and calibrate the clock
+        spawn_at = shift(fire_at, -timedelta(seconds=config.worker_lead_seconds))
+        sleep_until_precise(spawn_at, config.spin_ms)
+        try:
+            run_worker(
+                fire_at,
+                release_at,
+                metrics_dir,
+                timedelta(minutes=config.worker_timeout_minutes),
+            )
+        except OSError as e:
+            # retried for the same run while it is still ahead
+            logger.error(
+                f"Could not spawn the worker: {e}, retrying in {SPAWN_RETRY_SECONDS}s"
+            )
+            time.sleep(SPAWN_RETRY_SECONDS)
+            continue
+        handled = fire_at
 
+
+if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--test":
+        from src._utils.test_utils import test_scheduler
+
         test_scheduler()
+    elif len(sys.argv) > 2 and sys.argv[1] == "--run-in":
+        run_scheduler(run_in_seconds=float(sys.argv[2]))
     else:
         run_scheduler()
@@ -0,0 +1,116 @@
+from typing import Optional
+import requests
+from src._utils.env import settings
+from src._utils.flight_recorder import active_recorder
+from src._utils.metrics import note_request
+
+try:
+    from orjson import loads as decode_json
+except ImportError:  # orjson is optional, it only makes decoding faster
+    from json import loads as decode_json
+
+# REST endpoints of the quick reservation flow, relative to settings.base_url
+AVAILABILITY_PATH = "/rest/reservation/quickreservation/availability"
+RESERVE_PATH = "/rest/reservation/quickreservation/reserve"
+RELEASE_PATH = "/rest/reservation/quickreservation/release"
+QUESTIONS_PATH = "/rest/reservation/quickreservation/questions"
+CONFIRM_PATH = "/rest/reservation/quickreservation/confirm"
+CHECKOUT_PATH = "/checkout"
+
+SUCCESS_RESPONSE_CODE = "0000"
+
+
+def api_url(path: str) -> str:
+    """Build the full URL of a REST endpoint, pinned to the en-US locale."""
+    return f"{settings.base_url}{path}?locale=en-US"
+
+
+def request_timeout() -> tuple[float, float]:
+    """(connect, read) timeout of a REST request."""
+    return (settings.http_connect_timeout_seconds, settings.http_read_timeout_seconds)
+
+
+def api_headers(csrf_token: str) -> dict[str, str]:
+    """Headers the SPA sends with every REST call."""
+    return {
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "x-csrf-token": csrf_token,
+        "x-requested-with": "XMLHttpRequest",
+    }
+
+
+def availability_payload(
+    request_date: str, customer_id: int, facility_group_id: Optional[int] = None
+) -> dict:
+    """Request body for the availability endpoint, for the configured facility group by default."""
+    return {
+        "facility_group_id": facility_group_id or settings.facility_group_id,
+        "customer_id": customer_id,
+        "company_id": 0,
+        "reserve_date": request_date,
+        "resident": False,
+        "reload": False,
+        "change_time_range": False,
+    }
+
+
+def check_response(response: requests.Response) -> dict:
+    """
+    Validates a REST response, both the HTTP status and the response code in the JSON envelope.
+
+    Args:
+        response (requests.Response): The response to check
+
+    Returns:
+        dict: The decoded JSON response
+
+    Raises:
+        ValueError: If the envelope reports a failure
+    """
+    recorder = active_recorder()
+    if recorder:
+        recorder.event(
+            "api",
+            response.status_code,
+            response.request.path_url,
+            round(response.elapsed.total_seconds() * 1000, 1),
+        )
+    response.raise_for_status()
+
+    data = decode_json(response.content)
+    headers = data.get("headers") or {}
+    response_code = headers.get("response_code", SUCCESS_RESPONSE_CODE)
+    if response_code != SUCCESS_RESPONSE_CODE:
+        raise ValueError(
+            f"{response.request.path_url} failed ({response_code}): {headers.get('response_message')}"
+        )
+
+    return data
+
+
+def fetch_availability(
+    cookies: dict[str, str], csrf_token: str, request_date: str, customer_id: int
+) -> dict:
+    """
+    Makes an API request to get field availability details using an authenticated session.
+
+    Args:
+        cookies (dict[str, str]): Session cookies keyed by name
+        csrf_token (str): The page's CSRF token
+        request_date (str): Date to check availability for
+        customer_id (int): The customer's ID
+
+    Returns:
+        dict: JSON response containing availability details
+    """
+    note_request()
+    response = requests.post(
+        url=api_url(AVAILABILITY_PATH),
+        json=availability_payload(request_date, customer_id),
+        cookies=cookies,
+        headers=api_headers(csrf_token),
+        timeout=request_timeout(),
+    )
+
+    return check_response(response)
@@ -0,0 +1,133 @@
+import argparse
+import json
+import random
+import timeit
+import tracemalloc
+from typing import Callable
+from src._utils.api import decode_json
+from src._utils.env import settings
+from src._utils.field_utils import (
+    AvailabilityIndex,
+    parse_fields,
+    preferred_candidates,
+)
+from src._utils.logger import setup_logger
+from src._utils.stub_server import StubState
+
+logger = setup_logger()
+
+PRIMARY_TIME = "20:00:00"
+ALTERNATE_TIMES = ["19:00:00", "18:00:00"]
+FIELD_PREFIX = "FIELD - Main"
+
+
+def synthetic_response(
+    resource_count: int, booked_ratio: float = 0.9, seed: int = 0
+) -> bytes:
+    """
+    Encoded availability response for a synthetic facility group.
+
+    Args:
+        resource_count (int): Number of resources in the group
+        booked_ratio (float): Share of slots already booked
+        seed (int): Seed for which slots are booked
+
+    Returns:
+        bytes: The response body as the availability endpoint would send it
+    """
+    rng = random.Random(seed)
+    state = StubState(resource_count=resource_count)
+    state.always_booked = {
+        (resource["resource_id"], time)
+        for resource in state.resources
+        for time in state.time_slots
+        if rng.random() < booked_ratio
+    }
+
+    envelope = {"headers": {"response_code": "0000"}, "body": state.availability({})}
+    return json.dumps(envelope).encode()
+
+
+def pydantic_path(content: bytes) -> None:
+    # the pre-index reference: a model per field and slot, scanned for the first free match
+    fields = [
+        field
+        for field in parse_fields(json.loads(content))
+        if field.resource_name.startswith(FIELD_PREFIX)
+    ]
+    for time in [PRIMARY_TIME, *ALTERNATE_TIMES]:
+        for field in fields:
+            if any(
+                detail.time == time and not detail.is_booked
+                for detail in field.time_slot_details
+            ):
+                return
+
+
+def index_path(content: bytes) -> None:
+    # what the booking flows run on every availability response
+    preferred_candidates(AvailabilityIndex(decode_json(content)), limit=1)
+
+
+def index_path_stdlib_json(content: bytes) -> None:
+    preferred_candidates(AvailabilityIndex(json.loads(content)), limit=1)
+
+
+PATHS: dict[str, Callable[[bytes], None]] = {
+    "pydantic": pydantic_path,
+    "index": index_path,
+    "index+json": index_path_stdlib_json,
+}
+
+
+def measure(path: Callable[[bytes], None], content: bytes) -> tuple[float, float]:
+    """
+    Best-of-five time and peak memory of one decode + parse + select.
+
+    Returns:
+        tuple[float, float]: Milliseconds per call and peak KiB allocated
+    """
+    timer = timeit.Timer(lambda: path(content))
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=5, number=number)) / number
+
+    tracemalloc.start()
+    path(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best * 1000, peak / 1024
+
+
+def run(sizes: list[int]) -> None:
+    """Log parse + select time and memory of every path for each facility group size."""
+    # rank with the bench's preferences, the way the booking flows rank with the configured ones
+    settings.desired_time_military = PRIMARY_TIME
+    settings.alt_desired_times_military = ALTERNATE_TIMES
+    settings.desired_field_starts_with = FIELD_PREFIX
+    settings.alt_field_prefixes = []
+    settings.field_priorities = {}
+
+    logger.info(f"JSON decoder: {decode_json.__module__}")
+    for size in sizes:
+        content = synthetic_response(size)
+        results = {name: measure(path, content) for name, path in PATHS.items()}
+        baseline_ms = results["pydantic"][0]
+
+        logger.info(
+            f"{size} resources ({len(content) / 1024:.0f} KiB): "
+            + ", ".join(
+                f"{name} {ms:.3f}ms / {kib:.0f} KiB ({baseline_ms / ms:.1f}x)"
+                for name, (ms, kib) in results.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark availability parsing and field selection"
+    )
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 100, 1000, 5000])
+    args = parser.parse_args()
+
+    run(args.sizes)
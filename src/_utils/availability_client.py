@@ -0,0 +1,189 @@
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+import time
+from datetime import datetime
+from typing import Callable, Optional
+import requests
+from playwright.sync_api import Page
+from requests.adapters import HTTPAdapter
+from src._utils.api import (
+    AVAILABILITY_PATH,
+    api_headers,
+    api_url,
+    availability_payload,
+    check_response,
+    request_timeout,
+)
+from src._utils.date_utils import wait_until
+from src._utils.env import settings
+from src._utils.field_utils import AvailabilityIndex, preferred_candidates
+from src._utils.history import record_snapshot
+from src._utils.logger import setup_logger
+from src._utils.metrics import AVAILABILITY_LATENCY, note_request
+from src._utils.session_cache import CachedSession
+from src._utils.timing import seconds_until
+from src._utils.utils import get_cookie_dict, get_csrf_token
+
+logger = setup_logger()
+
+
+class LatencyStats:
+    """Per-request latency samples in milliseconds."""
+
+    def __init__(self):
+        self.samples: list[float] = []
+
+    def record(self, latency_ms: float) -> None:
+        self.samples.append(latency_ms)
+
+    def percentile(self, percent: float) -> float:
+        """Nearest-rank percentile of the recorded samples."""
+        ordered = sorted(self.samples)
+        rank = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def summary(self) -> str:
+        if not self.samples:
+            return "no requests"
+
+        return (
+            f"n={len(self.samples)} min={min(self.samples):.0f}ms "
+            f"p50={statistics.median(self.samples):.0f}ms "
+            f"p95={self.percentile(95):.0f}ms max={max(self.samples):.0f}ms"
+        )
+
+
+def has_open_candidate(response: dict) -> bool:
+    """Whether any of the configured field/time preferences is free in a response."""
+    return bool(preferred_candidates(AvailabilityIndex(response), limit=1))
+
+
+class AvailabilityClient:
+    """
+    Availability fetcher that keeps one pooled keep-alive connection and the auth
+    headers of a session, so repeated fetches skip the TLS handshake and cookie export.
+    """
+
+    def __init__(
+        self,
+        cookies: dict[str, str],
+        csrf_token: str,
+        customer_id: int,
+        session: Optional[requests.Session] = None,
+        pool_size: int = 1,
+    ):
+        self.customer_id = customer_id
+        self.stats = LatencyStats()
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(api_headers(csrf_token))
+            session.cookies.update(cookies)
+        self.session = session
+
+    @classmethod
+    def from_page(cls, page: Page, customer_id: int) -> "AvailabilityClient":
+        """Create a client from a logged-in page's cookies and CSRF token."""
+        return cls(get_cookie_dict(page.context), get_csrf_token(page), customer_id)
+
+    @classmethod
+    def from_session(cls, session: CachedSession) -> "AvailabilityClient":
+        """Create a client from a cached authenticated session."""
+        return cls(session.cookies, session.csrf_token, session.customer_id)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def warm_up(self, connections: int = 1) -> None:
+        """
+        Open connections ahead of time so the TLS handshake is off the critical path.
+
+        Args:
+            connections (int): How many to open at once, one per fetch that will run concurrently
+        """
+        url = settings.base_url
+        note_request()
+        if connections <= 1:
+            self.session.head(url, timeout=request_timeout())
+            return
+
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(
+                executor.map(
+                    lambda _: self.session.head(url, timeout=request_timeout()),
+                    range(connections),
+                )
+            )
+
+    def fetch(self, request_date: str, facility_group_id: Optional[int] = None) -> dict:
+        """
+        Fetch field availability for a date. Safe to call from several threads at once,
+        each concurrent fetch takes its own pooled connection.
+
+        Args:
+            request_date (str): Date to check availability for
+            facility_group_id (Optional[int]): Facility group to check, defaults to the configured one
+
+        Returns:
+            dict: JSON response containing availability details
+        """
+        note_request()
+        started = time.perf_counter()
+        response = self.session.post(
+            api_url(AVAILABILITY_PATH),
+            json=availability_payload(
+                request_date, self.customer_id, facility_group_id
+            ),
+            timeout=request_timeout(),
+        )
+        elapsed = time.perf_counter() - started
+        self.stats.record(elapsed * 1000)
+        AVAILABILITY_LATENCY.observe(elapsed)
+
+        availability = check_response(response)
+        record_snapshot(request_date, availability, facility_group_id)
+
+        return availability
+
+    def poll_until_open(
+        self,
+        request_date: str,
+        start_at: datetime,
+        stop_at: datetime,
+        interval_ms: int,
+        is_open: Callable[[dict], bool] = has_open_candidate,
+    ) -> dict:
+        """
+        Burst-poll availability around release time and return as soon as the target slots open.
+
+        Args:
+            request_date (str): Date to check availability for
+            start_at (datetime): When to start polling
+            stop_at (datetime): When to give up
+            interval_ms (int): Delay between the start of consecutive requests
+            is_open (Callable[[dict], bool]): Whether a response shows the target slots open
+
+        Returns:
+            dict: The first response in which the target slots are open
+
+        Raises:
+            TimeoutError: If the slots did not open before stop_at
+        """
+        wait_until(start_at)
+
+        while True:
+            started = time.perf_counter()
+            response = self.fetch(request_date)
+            if is_open(response):
+                return response
+
+            if seconds_until(stop_at) <= 0:
+                raise TimeoutError(
+                    f"Target slots still closed after polling until {stop_at} ({self.stats.summary()})"
+                )
+
+            elapsed = time.perf_counter() - started
+            time.sleep(max(0.0, interval_ms / 1000 - elapsed))
@@ -0,0 +1,238 @@
+# The parts of the booking flow that don't depend on how the page is driven, shared by
+# the sync (main.py) and async (main_async.py) browser flows. The flows keep only the
+# Playwright calls.
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Optional
+from src._utils.availability_client import AvailabilityClient
+from src._utils.date_utils import military_to_american, wait_until
+from src._utils.env import settings
+from src._utils.field_utils import AvailabilityIndex, Candidate, best_candidate
+from src._utils.http_engine import HttpBookingEngine
+from src._utils.logger import setup_logger
+from src._utils.metrics import timed_step
+from src._utils.timing import ms_since
+
+logger = setup_logger()
+
+# A cell of the availability grid, as (field name, time)
+Cell = tuple[str, str]
+
+
+def landing_url() -> str:
+    return f"{settings.base_url}/reservation/landing/quick?groupId={settings.facility_group_id}"
+
+
+def prefill_labels() -> re.Pattern[str]:
+    """
+    Labels of the grid cells whose rows are prefilled while staging: every preferred
+    field at the primary time.
+
+    Returns:
+        re.Pattern[str]: Pattern matching the cells' aria labels
+    """
+    start_time = military_to_american(settings.desired_time_military)
+    prefixes = "|".join(
+        re.escape(prefix)
+        for prefix in [settings.desired_field_starts_with, *settings.alt_field_prefixes]
+    )
+    return re.compile(f"^({prefixes}).* {start_time}")
+
+
+@lru_cache(maxsize=1024)
+def field_label(resource_name: str, time: str) -> re.Pattern:
+    """
+    Accessible-name pattern of a field's cell at a time in the reservation form.
+
+    Args:
+        resource_name (str): The field's name
+        time (str): The time in 24-hour format
+
+    Returns:
+        re.Pattern: The compiled pattern
+    """
+    return re.compile(f"^{re.escape(resource_name)} {military_to_american(time)}")
+
+
+def prewarm(
+    client: AvailabilityClient,
+    request_date: str,
+    facility_group_id: Optional[int] = None,
+) -> None:
+    """
+    Fetch availability once before the booking window and precompute what ranking and
+    selecting need for its layout: the field weights, which AvailabilityIndex memoizes
+    per layout, and the locators of every eligible field at every acceptable time.
+    Failures are only logged, the booking then computes them on the spot.
+
+    Args:
+        client (AvailabilityClient): A warmed-up client of the booking session
+        request_date (str): Date to fetch, in YYYY-MM-DD format
+        facility_group_id (Optional[int]): Facility group to fetch, defaults to the configured one
+    """
+    facility_group_id = facility_group_id or settings.facility_group_id
+    try:
+        index = AvailabilityIndex(client.fetch(request_date, facility_group_id))
+    except Exception as e:
+        logger.warning(
+            f"Could not prewarm facility group {facility_group_id} before release: {e}"
+        )
+        return
+
+    field_weights = index.field_weights(
+        [settings.desired_field_starts_with, *settings.alt_field_prefixes],
+        settings.field_priorities,
+    )
+    for position in field_weights:
+        for time in [
+            settings.desired_time_military,
+            *settings.alt_desired_times_military,
+        ]:
+            field_label(index.resource_names[position], time)
+
+
+def rank_fields(
+    client: AvailabilityClient, request_date: str, availability: Optional[dict] = None
+) -> Candidate:
+    """
+    Fetches availability if needed and picks the best field.
+
+    Args:
+        client (AvailabilityClient): Client to fetch availability with
+        request_date (str): Date to reserve in YYYY-MM-DD format
+        availability (Optional[dict]): An availability response that was just fetched;
+            fetched fresh otherwise
+
+    Returns:
+        Candidate: The field and slots to select
+
+    Raises:
+        ValueError: If none of the preferred fields and times are available
+    """
+    if availability is None:
+        with timed_step("availability"):
+            availability = client.fetch(request_date)
+
+    return best_candidate(AvailabilityIndex(availability))
+
+
+def needs_quantity(candidate: Candidate, quantity_prefilled: bool) -> bool:
+    # prefilled rows only cover the primary time
+    return (
+        not quantity_prefilled or candidate.start_time != settings.desired_time_military
+    )
+
+
+def selection_changes(
+    candidate: Candidate, selected: set[Cell]
+) -> tuple[list[Cell], list[Cell]]:
+    """
+    The clicks that turn the current selection into the candidate's. Cells that are
+    already selected are left alone, since clicking them again would deselect them.
+
+    Args:
+        candidate (Candidate): The field and slots to select
+        selected (set[Cell]): The cells selected so far
+
+    Returns:
+        tuple[list[Cell], list[Cell]]: Cells to deselect, then cells to select
+    """
+    wanted = [(candidate.resource_name, time) for time in candidate.times]
+    return (
+        [cell for cell in selected if cell not in wanted],
+        [cell for cell in wanted if cell not in selected],
+    )
+
+
+def log_click(candidate: Candidate, release_at: Optional[datetime]) -> None:
+    if release_at:
+        gap_ms = ms_since(release_at)
+        logger.info(
+            f"Clicked {candidate.resource_name} at {military_to_american(candidate.start_time)} {gap_ms:.0f}ms after release"
+        )
+
+
+def wait_for_release(
+    client: AvailabilityClient, request_date: str, release_at: datetime
+) -> Optional[dict]:
+    """
+    Holds until the booking window opens. With burst polling enabled, starts polling
+    availability shortly before release and returns as soon as the target slots open.
+
+    Args:
+        client (AvailabilityClient): Warmed-up availability client
+        request_date (str): Date to reserve in YYYY-MM-DD format
+        release_at (datetime): The release instant
+
+    Returns:
+        Optional[dict]: The availability response that showed the slots open, when burst polling
+    """
+    if not settings.burst_poll_enabled:
+        wait_until(release_at)
+        return None
+
+    return client.poll_until_open(
+        request_date,
+        start_at=release_at - timedelta(milliseconds=settings.burst_poll_lead_ms),
+        stop_at=release_at + timedelta(seconds=settings.burst_poll_window_seconds),
+        interval_ms=settings.burst_poll_interval_ms,
+    )
+
+
+def close_client(client: AvailabilityClient) -> None:
+    logger.info(f"Availability latency: {client.stats.summary()}")
+    client.close()
+
+
+def hold_id(body: Any) -> Optional[int]:
+    """
+    The reservation ID in a response to the hold endpoint.
+
+    Args:
+        body (Any): The response's JSON body
+
+    Returns:
+        Optional[int]: The ID, or None if the hold was rejected
+    """
+    try:
+        return body["body"]["reservation"]["reservation_id"]
+    except (KeyError, TypeError):
+        return None
+
+
+def release_holds(engine: HttpBookingEngine, held: list[int]) -> None:
+    """
+    Give up holds when another worker has the booking, so the slots don't sit in this
+    worker's cart until the site times them out.
+
+    Args:
+        engine (HttpBookingEngine): An engine on the session that placed the holds
+        held (list[int]): Reservation IDs to release
+    """
+    for reservation_id in held:
+        try:
+            engine.release(reservation_id)
+        except Exception as e:
+            logger.warning(f"Could not release reservation {reservation_id}: {e}")
+
+
+def stand_down(engine: HttpBookingEngine, held: list[int]) -> None:
+    """
+    Release a page's holds over REST because another worker has the booking.
+
+    Args:
+        engine (HttpBookingEngine): An engine on the page's session, closed afterwards
+        held (list[int]): Reservation IDs the page placed
+    """
+    logger.info("Another worker has this booking, releasing its hold")
+    try:
+        release_holds(engine, held)
+    finally:
+        engine.close()
+
+
+def payment_unconfirmed(error: Exception) -> ValueError:
+    return ValueError(
+        f"Payment may have been submitted but no confirmation loaded ({error}); check the account before booking again"
+    )
@@ -0,0 +1,186 @@
+import argparse
+import math
+import time
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from http.client import HTTPConnection, HTTPSConnection
+from typing import NamedTuple, Optional
+from urllib.parse import urlparse
+from src._utils.env import settings
+from src._utils.logger import setup_logger
+from src._utils.timing import shift
+
+logger = setup_logger()
+
+# Slack when aiming a request at the server's next second boundary
+MIN_AIM_LEAD_SECONDS = 0.005
+
+
+class ClockOffset(NamedTuple):
+    """How far the server's clock runs ahead of the local one (negative when behind)."""
+
+    offset_ms: float
+    # half the width of the interval the true offset is known to lie in
+    uncertainty_ms: float
+    samples: int
+    best_rtt_ms: float
+
+    @property
+    def delta(self) -> timedelta:
+        return timedelta(milliseconds=self.offset_ms)
+
+    def to_local(self, server_instant: datetime) -> datetime:
+        """The local instant at which the server's clock reads server_instant."""
+        return shift(server_instant, -self.delta)
+
+    def summary(self) -> str:
+        return (
+            f"{self.offset_ms:+.0f}ms ±{self.uncertainty_ms:.0f}ms "
+            f"(n={self.samples} best rtt={self.best_rtt_ms:.0f}ms)"
+        )
+
+
+def measure_clock_offset(
+    url: str,
+    samples: int = 10,
+    timeout: float = 5.0,
+    deadline: Optional[float] = None,
+) -> ClockOffset:
+    """
+    Estimate the server's clock offset from the Date headers of HEAD requests.
+
+    A Date header only has one-second resolution, but it still bounds the offset: the
+    server stamped it somewhere between sending the request and receiving the response,
+    so offset lies in [date - received, date + 1s - sent]. Each sample narrows the
+    intersection of these intervals, and after the first one every request is aimed at
+    the moment the server's clock would tick over if the offset were the midpoint, which
+    about halves the interval each time, down to the round-trip time.
+
+    Sampling stops early at the deadline, and the offset is estimated from the samples
+    gathered by then.
+
+    Args:
+        url (str): An endpoint of the server
+        samples (int): Number of requests to make
+        timeout (float): Socket timeout in seconds
+        deadline (Optional[float]): Unix time by which sampling has to be done
+
+    Returns:
+        ClockOffset: The estimated offset, its uncertainty and the best round-trip time
+
+    Raises:
+        ValueError: If the server doesn't send Date headers, or no sample was taken
+            before the deadline
+    """
+    parsed = urlparse(url)
+    connection_class = HTTPSConnection if parsed.scheme == "https" else HTTPConnection
+    connection = connection_class(parsed.netloc, timeout=timeout)
+    path = parsed.path or "/"
+
+    lower, upper = -math.inf, math.inf
+    best_rtt = math.inf
+    used = 0
+
+    try:
+        for sample in range(samples):
+            if sample:
+                midpoint = (lower + upper) / 2
+                # local time at which a request reaches the server as its clock ticks over
+                now = time.time()
+                aim_at = (
+                    math.ceil(now + MIN_AIM_LEAD_SECONDS + midpoint + best_rtt / 2)
+                    - midpoint
+                    - best_rtt / 2
+                )
+                if deadline is not None and aim_at + best_rtt > deadline:
+                    logger.warning(
+                        f"Clock calibration reached its deadline after {used} samples"
+                    )
+                    break
+                time.sleep(max(0.0, aim_at - time.time()))
+
+            if deadline is not None:
+                # a slow response must not hold the sampling past the deadline either
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                connection.timeout = min(timeout, remaining)
+                if connection.sock:
+                    connection.sock.settimeout(connection.timeout)
+
+            sent = time.time()
+            try:
+                connection.request("HEAD", path)
+                response = connection.getresponse()
+                response.read()
+            except OSError:
+                if deadline is None or time.time() < deadline or not used:
+                    raise
+                logger.warning(
+                    f"Clock calibration reached its deadline after {used} samples"
+                )
+                break
+            received = time.time()
+
+            date = response.getheader("Date")
+            if not date:
+                raise ValueError(f"{url} did not send a Date header")
+
+            server_second = parsedate_to_datetime(date).timestamp()
+            sample_lower = server_second - received
+            sample_upper = server_second + 1 - sent
+            best_rtt = min(best_rtt, received - sent)
+
+            if sample_lower > upper or sample_upper < lower:
+                # e.g. a load balancer in front of servers whose clocks disagree
+                logger.warning(
+                    f"Clock sample {sample + 1} disagrees with the others, skipping it"
+                )
+                continue
+
+            lower, upper = max(lower, sample_lower), min(upper, sample_upper)
+            used += 1
+    finally:
+        connection.close()
+
+    if not used:
+        raise ValueError(f"No usable clock samples from {url}")
+
+    return ClockOffset(
+        offset_ms=(lower + upper) / 2 * 1000,
+        uncertainty_ms=(upper - lower) / 2 * 1000,
+        samples=used,
+        best_rtt_ms=best_rtt * 1000,
+    )
+
+
+def calibrate(deadline: Optional[datetime] = None) -> ClockOffset:
+    """
+    Measure the booking site's clock offset using the configured base URL and sample count.
+
+    Args:
+        deadline (Optional[datetime]): When sampling has to stop, keeping the samples
+            gathered so far
+
+    Returns:
+        ClockOffset: The estimated offset
+    """
+    offset = measure_clock_offset(
+        settings.base_url,
+        settings.clock_calibration_samples,
+        deadline=deadline.timestamp() if deadline else None,
+    )
+    logger.info(f"Server clock offset: {offset.summary()}")
+    return offset
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the booking site's clock offset"
+    )
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--samples", type=int, default=10)
+    args = parser.parse_args()
+
+    offset = measure_clock_offset(args.url or settings.base_url, args.samples)
+    logger.info(f"Server clock offset: {offset.summary()}")
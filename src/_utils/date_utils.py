@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from src._utils.env import Weekday, settings, WEEKDAY_MAP
+from src._utils.timing import next_fire_time, sleep_until_precise
 
 
 def get_next_occurrence(weekday: Weekday, time: str) -> str:
@@ -13,8 +14,8 @@ def get_next_occurrence(weekday: Weekday, time: str) -> str:
     Returns:
         str: The date of the next occurrence in YYYY-MM-DD format
     """
-    # Get current date
-    current_date = datetime.now()
+    # Get current date in the configured timezone, not the VM's
+    current_date = datetime.now(settings.tzinfo)
 
     # Parse the target time
     target_hour, target_minute, _ = map(int, time.split(":"))
@@ -56,6 +57,49 @@ def calculate_request_date() -> str:
     return get_next_occurrence(settings.desired_weekday, settings.desired_time_military)
 
 
+def calculate_request_dates(count: int) -> list[str]:
+    """
+    Calculate consecutive occurrences of the desired date, starting with calculate_request_date.
+
+    Args:
+        count (int): Number of occurrences
+
+    Returns:
+        list[str]: Dates in YYYY-MM-DD format, earliest first
+    """
+    first = datetime.strptime(calculate_request_date(), "%Y-%m-%d")
+    step = timedelta(days=1 if settings.reservation_frequency == "DAILY" else 7)
+
+    return [(first + step * index).strftime("%Y-%m-%d") for index in range(count)]
+
+
+# Armed mode
+def get_release_instant(time: str) -> datetime:
+    """
+    Get the next instant at which the booking window opens, in the configured timezone.
+
+    Args:
+        time (str): The release time in 24-hour format (e.g., "10:00")
+
+    Returns:
+        datetime: The next occurrence of the release time
+    """
+    return next_fire_time(None, time, settings.tzinfo)
+
+
+def wait_until(target: datetime) -> float:
+    """
+    Block until the given instant is reached.
+
+    Args:
+        target (datetime): The instant to wait for
+
+    Returns:
+        float: How late the wait returned, in milliseconds
+    """
+    return sleep_until_precise(target, settings.scheduler_spin_ms)
+
+
 # Formatting
 def military_to_american(military_time: str) -> str:
     """Convert military time (HH:MM:SS) to American time (H:MM AM/PM)"""
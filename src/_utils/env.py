@@ -1,6 +1,9 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import Literal
+from typing import Any, Iterator, Literal, Optional, cast
 from enum import Enum
 from zoneinfo import ZoneInfo
 
@@ -45,16 +48,123 @@ class Settings(BaseSettings):
     # Field Preferences
     desired_field_starts_with: str
     facility_group_id: int = 28
+    alt_field_prefixes: list[str] = []
+    field_priorities: dict[str, int] = {}
+    time_weights: dict[str, float] = {}
+    slot_count: int = 1
+
+    # Scan Settings
+    # consecutive occurrences of the desired date to consider, starting at occurrences_ahead
+    scan_occurrences: int = 1
+    alt_facility_group_ids: list[int] = []
+    scan_workers: int = 8
+
+    # Batch Settings
+    # book this many consecutive occurrences of the desired date, and this many fields on each
+    batch_occurrences: int = 1
+    batch_fields: int = 1
+
+    # Watch Settings
+    # dates to watch for cancellations, defaults to the next watch_occurrences occurrences
+    watch_dates: list[str] = []
+    watch_occurrences: int = 4
+    watch_min_interval_seconds: float = 10.0
+    watch_max_interval_seconds: float = 120.0
+    # book desired slots as soon as they open, rather than only logging them
+    watch_book: bool = True
+    # run the watcher alongside the scheduler
+    watch_enabled: bool = False
+
+    # Coordination Settings
+    # lets redundant workers race for the same booking while only one confirms and pays
+    coordination_enabled: bool = False
+    coordination_path: str = "coordination.db"
+    # defaults to host:pid
+    worker_name: str = ""
+    lease_ttl_seconds: float = 5.0
+    # how long a worker that lost the lease stands by to take over from a stalled leader
+    lease_wait_seconds: float = 120.0
 
     # Activity Settings
     sport: str
     reservation_name: str
     group_quantity: int = 15
+    # answers to reservation questions by (part of) their text, e.g. {"insured": "Yes"}
+    question_answers: dict[str, str] = {}
+
+    # Site Settings
+    base_url: str = "https://anc.apm.activecommunities.com/sfrecpark"
+    booking_engine: Literal["browser", "async", "http"] = "browser"
+    http_pool_size: int = 4
+    race_candidates: int = 1
+    # (connect, read) timeouts of every REST request, so a hung connection fails fast
+    http_connect_timeout_seconds: float = 3.0
+    http_read_timeout_seconds: float = 10.0
+
+    # Request Filter Settings
+    request_filter_enabled: bool = True
+    blocked_resource_types: list[str] = ["image", "media", "font"]
+    blocked_url_patterns: list[str] = [
+        r"google-analytics\.com",
+        r"googletagmanager\.com",
+        r"doubleclick\.net",
+        r"facebook\.(net|com)/.*(tr|fbevents)",
+        r"hotjar\.com",
+        r"nr-data\.net",
+        r"newrelic\.com",
+        r"fullstory\.com",
+        r"clarity\.ms",
+    ]
+    allowed_url_patterns: list[str] = []
+
+    # Record/Replay Settings
+    record_har_path: Optional[str] = None
+    replay_har_path: Optional[str] = None
 
     # Deployment Settings
     headless: bool = False
     max_retries: int = 3
     retry_delay: int = 5
+    metrics_enabled: bool = True
+    metrics_port: int = 9091
+    # per-wait timeout overrides in ms, e.g. {"login": 20000}
+    wait_timeouts_ms: dict[str, int] = {}
+
+    # Flight Recorder Settings
+    # keeps the last network events and step timings of a run, saved only if it fails
+    flight_recorder_enabled: bool = True
+    flight_recorder_events: int = 500
+    flight_recorder_dir: str = "flight_recordings"
+    flight_recorder_keep: int = 20
+
+    # Session Cache Settings
+    session_cache_enabled: bool = True
+    session_cache_path: str = ".session_cache.json"
+    session_cache_ttl_minutes: int = 60
+
+    # Facility Cache Settings
+    # fields, time slots and questions of each facility group, kept across runs
+    facility_cache_enabled: bool = True
+    facility_cache_path: str = ".facility_cache.json"
+
+    # Armed Mode Settings
+    armed_mode: bool = False
+    armed_lead_minutes: int = 5
+
+    # Availability Polling Settings
+    burst_poll_enabled: bool = False
+    burst_poll_lead_ms: int = 500
+    burst_poll_window_seconds: int = 10
+    burst_poll_interval_ms: int = 250
+
+    # Availability History Settings
+    history_enabled: bool = True
+    history_path: str = "availability_history.db"
+
+    # Profile Runner Settings
+    profiles_path: str = "profiles.json"
+    max_concurrent_profiles: int = 2
+    cdp_port: int = 9222
 
     # Payment Settings
     cvv: str
@@ -64,16 +174,72 @@ class Settings(BaseSettings):
     schedule_time: str = "10:00"
     schedule_frequency: Literal["WEEKLY", "DAILY"] = "WEEKLY"
     timezone: str = "America/Los_Angeles"  # Pacific Time
+    scheduler_spin_ms: int = 50
+    # how long before the fire time the scheduler spawns the worker process
+    worker_lead_seconds: int = 60
+    # how long after the fire time a worker may run before the scheduler kills it
+    worker_timeout_minutes: int = 15
+    clock_calibration_enabled: bool = True
+    clock_calibration_samples: int = 10
+    clock_calibration_lead_seconds: int = 30
 
     @property
     def tzinfo(self) -> ZoneInfo:
         """Get the timezone info object."""
         return ZoneInfo(self.timezone)
 
+    @model_validator(mode="after")
+    def check_calibration_lead(self) -> "Settings":
+        # the worker calibrates the clock, so it has to be running by then
+        if (
+            self.clock_calibration_enabled
+            and self.worker_lead_seconds <= self.clock_calibration_lead_seconds
+        ):
+            raise ValueError(
+                f"WORKER_LEAD_SECONDS ({self.worker_lead_seconds}) must be greater than "
+                f"CLOCK_CALIBRATION_LEAD_SECONDS ({self.clock_calibration_lead_seconds})"
+            )
+        return self
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = False
 
 
-settings = Settings()  # type: ignore
+default_settings = Settings()  # type: ignore
+_active_settings: ContextVar[Settings] = ContextVar("active_settings")
+
+
+class _ActiveSettings:
+    """
+    Stands in for the Settings of the profile running in the current context,
+    falling back to the settings loaded from the environment.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(_active_settings.get(default_settings), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(_active_settings.get(default_settings), name, value)
+
+
+settings = cast(Settings, _ActiveSettings())
+
+
+@contextmanager
+def use_settings(profile: Settings) -> Iterator[Settings]:
+    """
+    Make `settings` resolve to a profile's settings within the current context (thread).
+
+    Args:
+        profile (Settings): The profile's settings
+
+    Yields:
+        Settings: The active profile settings
+    """
+    token = _active_settings.set(profile)
+    try:
+        yield profile
+    finally:
+        _active_settings.reset(token)
@@ -0,0 +1,175 @@
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from pydantic import BaseModel, ValidationError
+from src._utils.env import settings
+from src._utils.logger import setup_logger
+from src._utils.questions import choose_answer
+
+logger = setup_logger()
+
+
+class QuestionLayout(BaseModel):
+    question_id: int
+    prompt: str
+    answers: list[str]
+
+
+class FacilityMetadata(BaseModel):
+    """
+    The static part of a facility group that otherwise costs a round trip inside the
+    booking window: its reservation questions and waivers.
+    """
+
+    facility_group_id: int
+    # learned from the first booking's questions, None until then
+    questions: Optional[list[QuestionLayout]] = None
+    waiver_ids: Optional[list[int]] = None
+    updated_at: datetime
+
+
+class FacilityCache(BaseModel):
+    entries: dict[int, FacilityMetadata] = {}
+
+
+class PreparedFacility:
+    """
+    The answers to a facility group's cached questions under the current preferences,
+    computed once per process so answering inside the booking window only looks them up.
+    """
+
+    def __init__(self, metadata: FacilityMetadata):
+        self.metadata = metadata
+        self.answers: Optional[list[dict]] = None
+        if metadata.questions is not None:
+            answers = [
+                (question, choose_answer(question.prompt, question.answers))
+                for question in metadata.questions
+            ]
+            if all(answer in question.answers for question, answer in answers):
+                self.answers = [
+                    {"question_id": question.question_id, "answer": answer}
+                    for question, answer in answers
+                ]
+
+
+_lock = threading.Lock()
+_cache: Optional[FacilityCache] = None
+# by facility group and preferences, since profiles in one process can differ
+_prepared: dict[tuple, PreparedFacility] = {}
+
+
+def _prepared_key(facility_group_id: int) -> tuple:
+    return (
+        facility_group_id,
+        settings.sport,
+        tuple(settings.question_answers.items()),
+    )
+
+
+def _forget_prepared(facility_group_id: int) -> None:
+    for key in [key for key in _prepared if key[0] == facility_group_id]:
+        del _prepared[key]
+
+
+def _load() -> FacilityCache:
+    global _cache
+    if _cache is not None:
+        return _cache
+
+    path = Path(settings.facility_cache_path)
+    _cache = FacilityCache()
+    if settings.facility_cache_enabled and path.exists():
+        try:
+            _cache = FacilityCache.model_validate_json(path.read_text())
+        except (OSError, ValidationError) as e:
+            logger.warning(f"Ignoring unreadable facility cache: {e}")
+    return _cache
+
+
+def _save(cache: FacilityCache) -> None:
+    if not settings.facility_cache_enabled:
+        return
+    try:
+        path = Path(settings.facility_cache_path)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(cache.model_dump_json())
+        temporary.replace(path)
+    except OSError as e:
+        logger.warning(f"Could not save the facility cache: {e}")
+
+
+def prepared(facility_group_id: int) -> Optional[PreparedFacility]:
+    """
+    The prepared metadata of a facility group, if it is cached.
+
+    Args:
+        facility_group_id (int): The facility group
+
+    Returns:
+        Optional[PreparedFacility]: The derived results, None if the group isn't cached
+    """
+    if not settings.facility_cache_enabled:
+        return None
+
+    key = _prepared_key(facility_group_id)
+    with _lock:
+        if key not in _prepared:
+            metadata = _load().entries.get(facility_group_id)
+            if metadata is None:
+                return None
+            _prepared[key] = PreparedFacility(metadata)
+        return _prepared[key]
+
+
+def remember_questions(
+    facility_group_id: int, questions: list[dict], waiver_ids: list[int]
+) -> None:
+    """
+    Store a facility group's questions after a booking, so the next one can answer them
+    without loading them first. Nothing is written if they haven't changed.
+
+    Args:
+        facility_group_id (int): The facility group the reservation is in
+        questions (list[dict]): The questions, as the API returns them
+        waiver_ids (list[int]): The waivers to accept
+    """
+    if not settings.facility_cache_enabled:
+        return
+
+    layouts = [QuestionLayout.model_validate(question) for question in questions]
+    with _lock:
+        cache = _load()
+        metadata = cache.entries.get(facility_group_id)
+        if metadata is None:
+            metadata = FacilityMetadata(
+                facility_group_id=facility_group_id, updated_at=datetime.now()
+            )
+        elif metadata.questions == layouts and metadata.waiver_ids == waiver_ids:
+            return
+
+        cache.entries[facility_group_id] = metadata.model_copy(
+            update={
+                "questions": layouts,
+                "waiver_ids": waiver_ids,
+                "updated_at": datetime.now(),
+            }
+        )
+        _forget_prepared(facility_group_id)
+        _save(cache)
+
+
+def forget_questions(facility_group_id: int) -> None:
+    """Drop a facility group's cached questions, e.g. after the site rejected them."""
+    with _lock:
+        cache = _load()
+        metadata = cache.entries.get(facility_group_id)
+        if metadata is None or metadata.questions is None:
+            return
+
+        cache.entries[facility_group_id] = metadata.model_copy(
+            update={"questions": None, "waiver_ids": None}
+        )
+        _forget_prepared(facility_group_id)
+        _save(cache)
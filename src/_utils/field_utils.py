@@ -1,6 +1,9 @@
-from typing import List, Optional, Tuple
+import heapq
+import sys
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 from pydantic import BaseModel, Field
 from pydantic import ConfigDict
+from src._utils.env import settings
 
 
 class TimeSlotDetail(BaseModel):
@@ -17,55 +20,310 @@ class FieldInfo(BaseModel):
     time_slot_details: List[TimeSlotDetail]
 
 
-def find_available_fields(
-    fields: List[FieldInfo],
-    primary_time: str,
-    alternate_times: Optional[List[str]] = None,
-    field_prefix: Optional[str] = None,
-) -> Tuple[Optional[FieldInfo], str]:
+def parse_fields(response: dict) -> List[FieldInfo]:
     """
-    Find available fields matching the specified criteria.
+    Build field models from an availability API response.
 
     Args:
-        fields (List[FieldInfo]): List of fields to search through
-        primary_time (str): Primary time to check for availability
-        alternate_times (Optional[List[str]]): List of alternate times to check if primary time is unavailable
-        field_prefix (Optional[str]): Prefix to filter field names by
+        response (dict): JSON response from the availability endpoint
 
     Returns:
-        Tuple[Optional[FieldInfo], str]: Tuple containing the available field (if any) and the selected time
+        List[FieldInfo]: One entry per resource in the facility group
     """
-    # Filter fields by prefix if specified
-    if field_prefix:
-        fields = [
-            field for field in fields if field.resource_name.startswith(field_prefix)
-        ]
+    availability = response["body"]["availability"]
+    time_slots = availability["time_slots"]
 
-    # Try primary time first
-    available_fields = [
-        field
-        for field in fields
-        if any(
-            detail.time == primary_time and not detail.is_booked
-            for detail in field.time_slot_details
+    return [
+        FieldInfo(
+            resource_id=field["resource_id"],
+            resource_name=field["resource_name"],
+            time_slots=time_slots,
+            time_slot_details=[
+                TimeSlotDetail(**detail, time=time)
+                for detail, time in zip(field["time_slot_details"], time_slots)
+            ],
         )
+        for field in availability["resources"]
     ]
 
-    selected_time = primary_time
-
-    # If no fields available at primary time and alternate times are specified, try each alternate time
-    if not available_fields and alternate_times:
-        for alt_time in alternate_times:
-            available_fields = [
-                field
-                for field in fields
-                if any(
-                    detail.time == alt_time and not detail.is_booked
-                    for detail in field.time_slot_details
+
+# Layouts whose field weights are kept per set of preferences, see AvailabilityIndex.field_weights
+MAX_MEMOIZED_LAYOUTS = 16
+_weights_memo: Dict[tuple, List[Tuple[List[int], List[str], Dict[int, int]]]] = {}
+
+
+class Candidate(NamedTuple):
+    resource_id: int
+    resource_name: str
+    start_time: str
+    times: Tuple[str, ...]
+    # (time weight, field weight, free run), compared in that order
+    score: Tuple[float, float, int]
+
+
+class AvailabilityIndex:
+    """
+    Precomputed view of one availability response: which resources are free at each time,
+    plus a free-slot bitmask per resource for constant-time contiguous block checks.
+    Built straight from the response JSON, without a model per resource or slot.
+    Build it once per response and rank against it as often as needed.
+    """
+
+    def __init__(self, response: dict):
+        availability = response["body"]["availability"]
+
+        # interned, so every lookup by time compares by identity first
+        self.time_slots: List[str] = [
+            sys.intern(time) for time in availability["time_slots"]
+        ]
+        self.slot_positions: Dict[str, int] = {
+            time: position for position, time in enumerate(self.time_slots)
+        }
+        self.resource_ids: List[int] = []
+        self.resource_names: List[str] = []
+        self.free_masks: List[int] = []
+        self.free_at: Dict[str, List[int]] = {time: [] for time in self.time_slots}
+
+        for position, resource in enumerate(availability["resources"]):
+            self.resource_ids.append(resource["resource_id"])
+            self.resource_names.append(resource["resource_name"])
+
+            free_mask = 0
+            for slot, detail in enumerate(resource["time_slot_details"]):
+                if not detail["status"]:
+                    free_mask |= 1 << slot
+                    self.free_at[self.time_slots[slot]].append(position)
+            self.free_masks.append(free_mask)
+
+    def free_run(self, position: int, slot: int) -> int:
+        """Number of consecutive free slots for a resource starting at a slot."""
+        remaining = self.free_masks[position] >> slot
+        # trailing ones of the shifted mask
+        return (~remaining & (remaining + 1)).bit_length() - 1
+
+    def field_weights(
+        self,
+        field_prefixes: Sequence[str],
+        field_priorities: Optional[Dict[str, int]] = None,
+    ) -> Dict[int, int]:
+        """
+        Weight of every resource eligible under the given prefixes and priorities.
+        A facility group's fields rarely change, so the weights are memoized per layout:
+        a response with the same fields as an earlier one (e.g. the one fetched to
+        prewarm) costs two list comparisons instead of a prefix match per field.
+        The returned dict is shared and must not be modified.
+
+        Args:
+            field_prefixes (Sequence[str]): Allowed name prefixes, most preferred first; empty allows all
+            field_priorities (Optional[Dict[str, int]]): Explicit weights by resource name, these
+                resources are eligible even if no prefix matches
+
+        Returns:
+            Dict[int, int]: Weight keyed by resource position
+        """
+        field_priorities = field_priorities or {}
+        layouts = _weights_memo.setdefault(
+            (tuple(field_prefixes), tuple(sorted(field_priorities.items()))), []
+        )
+        for resource_ids, resource_names, memoized in layouts:
+            if (
+                resource_ids == self.resource_ids
+                and resource_names == self.resource_names
+            ):
+                return memoized
+
+        weights: Dict[int, int] = {}
+
+        for position, name in enumerate(self.resource_names):
+            if name in field_priorities:
+                weights[position] = field_priorities[name]
+                continue
+            if not field_prefixes:
+                weights[position] = 0
+                continue
+            for rank, prefix in enumerate(field_prefixes):
+                if name.startswith(prefix):
+                    weights[position] = len(field_prefixes) - rank - 1
+                    break
+
+        layouts.append((self.resource_ids, self.resource_names, weights))
+        if len(layouts) > MAX_MEMOIZED_LAYOUTS:
+            layouts.pop(0)
+
+        return weights
+
+
+def rank_candidates(
+    index: AvailabilityIndex,
+    times: Sequence[str],
+    field_prefixes: Sequence[str] = (),
+    field_priorities: Optional[Dict[str, int]] = None,
+    time_weights: Optional[Dict[str, float]] = None,
+    slot_count: int = 1,
+    limit: Optional[int] = None,
+) -> List[Candidate]:
+    """
+    Rank every free field/time block, best first.
+
+    Scores are compared lexicographically: time preference dominates, then field weight,
+    then how far the free run extends past the block (longer runs are easier to extend),
+    whatever the size of the configured weights.
+
+    Args:
+        index (AvailabilityIndex): Index of the availability response
+        times (Sequence[str]): Acceptable start times, most preferred first
+        field_prefixes (Sequence[str]): Acceptable field name prefixes, most preferred first
+        field_priorities (Optional[Dict[str, int]]): Explicit weights by resource name
+        time_weights (Optional[Dict[str, float]]): Explicit weights by start time, defaults to
+            the order of times
+        slot_count (int): Number of contiguous slots each candidate must cover
+        limit (Optional[int]): Maximum number of candidates to return
+
+    Returns:
+        List[Candidate]: Ranked candidates
+    """
+    time_weights = time_weights or {}
+    field_weights = index.field_weights(field_prefixes, field_priorities)
+
+    scored: List[Candidate] = []
+    for order, time in enumerate(times):
+        slot = index.slot_positions.get(time)
+        if slot is None:
+            continue
+
+        block_times = tuple(index.time_slots[slot : slot + slot_count])
+        if len(block_times) < slot_count:
+            continue
+
+        time_weight = time_weights.get(time, len(times) - order)
+        for position in index.free_at[time]:
+            field_weight = field_weights.get(position)
+            if field_weight is None:
+                continue
+
+            run = index.free_run(position, slot)
+            if run < slot_count:
+                continue
+
+            scored.append(
+                Candidate(
+                    resource_id=index.resource_ids[position],
+                    resource_name=index.resource_names[position],
+                    start_time=time,
+                    times=block_times,
+                    score=(time_weight, field_weight, run),
                 )
-            ]
-            if available_fields:
-                selected_time = alt_time
-                break
+            )
+
+    if limit is not None:
+        return heapq.nlargest(limit, scored, key=lambda candidate: candidate.score)
+
+    return sorted(scored, key=lambda candidate: candidate.score, reverse=True)
+
+
+def preferred_candidates(
+    index: AvailabilityIndex, limit: Optional[int] = None
+) -> List[Candidate]:
+    """
+    Rank candidates using the configured time and field preferences.
+
+    Args:
+        index (AvailabilityIndex): Index of the availability response
+        limit (Optional[int]): Maximum number of candidates to return
+
+    Returns:
+        List[Candidate]: Ranked candidates
+    """
+    return rank_candidates(
+        index,
+        times=[settings.desired_time_military, *settings.alt_desired_times_military],
+        field_prefixes=[
+            settings.desired_field_starts_with,
+            *settings.alt_field_prefixes,
+        ],
+        field_priorities=settings.field_priorities,
+        time_weights=settings.time_weights,
+        slot_count=settings.slot_count,
+        limit=limit,
+    )
+
+
+def no_fields_error() -> ValueError:
+    return ValueError(
+        f"No fields available at {settings.desired_time_military} or any alternate times: {', '.join(settings.alt_desired_times_military)}"
+    )
+
+
+def best_candidate(index: AvailabilityIndex) -> Candidate:
+    """
+    The top-ranked candidate under the configured preferences.
+
+    Args:
+        index (AvailabilityIndex): Index of the availability response
+
+    Returns:
+        Candidate: The field and slots to book
+
+    Raises:
+        ValueError: If none of the preferred fields and times are available
+    """
+    candidates = preferred_candidates(index, limit=1)
+    if not candidates:
+        raise no_fields_error()
+
+    return candidates[0]
+
+
+def adjacent_group(
+    index: AvailabilityIndex, candidates: List[Candidate], count: int
+) -> List[Candidate]:
+    """
+    Pick candidates on count different fields at the same start time, preferring fields that
+    are next to each other in the facility group's order. Start times are tried in the order
+    of their best candidate.
+
+    Args:
+        index (AvailabilityIndex): Index the candidates were ranked from
+        candidates (List[Candidate]): Ranked candidates
+        count (int): Number of fields wanted
+
+    Returns:
+        List[Candidate]: The group, best first; the best candidates on distinct fields
+            when no start time has count free fields
+    """
+    positions = {
+        resource_id: position for position, resource_id in enumerate(index.resource_ids)
+    }
+    by_time: Dict[str, List[Candidate]] = {}
+    for candidate in candidates:
+        by_time.setdefault(candidate.start_time, []).append(candidate)
+
+    for group in by_time.values():
+        if len(group) < count:
+            continue
+
+        ordered = sorted(group, key=lambda candidate: positions[candidate.resource_id])
+        runs = [
+            ordered[start : start + count]
+            for start in range(len(ordered) - count + 1)
+            if positions[ordered[start + count - 1].resource_id]
+            - positions[ordered[start].resource_id]
+            == count - 1
+        ]
+        if not runs:
+            return group[:count]
+
+        # one start time, so only the field weights and free runs differ
+        best_run = max(
+            runs,
+            key=lambda run: (
+                sum(candidate.score[1] for candidate in run),
+                sum(candidate.score[2] for candidate in run),
+            ),
+        )
+        return sorted(best_run, key=lambda candidate: candidate.score, reverse=True)
 
-    return (available_fields[0] if available_fields else None, selected_time)
+    distinct: Dict[int, Candidate] = {}
+    for candidate in candidates:
+        distinct.setdefault(candidate.resource_id, candidate)
+    return list(distinct.values())[:count]
@@ -0,0 +1,274 @@
+import argparse
+import json
+import shutil
+import time
+import timeit
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from src._utils.env import settings
+from src._utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Longest URL kept per network event
+MAX_URL_LENGTH = 300
+# Budget for the failure screenshot, so a hung page can't hold up the error report
+SCREENSHOT_TIMEOUT_MS = 3000
+
+
+class FlightRecorder:
+    """
+    Bounded in-memory record of one run: the last network events, step timings and the
+    page the run was on. Nothing is written while the run goes well. Recording an event is
+    a tuple append to a ring buffer. The page's DOM and a screenshot are only captured
+    when a step fails, and everything is flushed to disk only if the run fails.
+    """
+
+    def __init__(self, capacity: int):
+        self.started = time.perf_counter()
+        self.events: deque[tuple] = deque(maxlen=capacity)
+        self.steps: deque[tuple] = deque(maxlen=capacity)
+        self.page: Any = None
+        self.failure: Optional[dict[str, Any]] = None
+        # time spent inside the recorder's hooks, to keep its overhead measured
+        self.overhead_ns = 0
+        self.hooks = 0
+
+    def _elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def event(self, kind: str, *detail: Any) -> None:
+        """Record a network or run event."""
+        started = time.perf_counter_ns()
+        self.events.append((self._elapsed_ms(), kind, *detail))
+        self.overhead_ns += time.perf_counter_ns() - started
+        self.hooks += 1
+
+    def step(self, name: str, duration_ms: float, error: Optional[str]) -> None:
+        """Record a step's timing, and the URL the run was on when it ended."""
+        started = time.perf_counter_ns()
+        url = self.page.url if self.page is not None else None
+        self.steps.append((self._elapsed_ms(), name, duration_ms, error, url))
+        self.overhead_ns += time.perf_counter_ns() - started
+        self.hooks += 1
+
+    def attach(self, context: Any) -> None:
+        """
+        Record a browser context's network events and follow its newest page. Works
+        with sync and async contexts: the handlers only read local request attributes.
+
+        Args:
+            context (Any): A sync or async BrowserContext
+        """
+
+        def on_page(page: Any) -> None:
+            self.page = page
+
+        context.on("page", on_page)
+        context.on(
+            "request",
+            lambda request: self.event(
+                "request", request.method, request.url[:MAX_URL_LENGTH]
+            ),
+        )
+        context.on(
+            "response",
+            lambda response: self.event(
+                "response", response.status, response.url[:MAX_URL_LENGTH]
+            ),
+        )
+        context.on(
+            "requestfailed",
+            lambda request: self.event(
+                "failed", request.failure, request.url[:MAX_URL_LENGTH]
+            ),
+        )
+
+    def capture(self, step: str) -> None:
+        """
+        Capture the page's DOM and a screenshot at the first failure, while the page is
+        still open.
+
+        Args:
+            step (str): The step that failed
+        """
+        if self.failure is not None:
+            return
+
+        self.failure = {"step": step, "url": None, "html": None, "screenshot": None}
+        if self.page is None or self.page.is_closed():
+            return
+        try:
+            self.failure["url"] = self.page.url
+            self.failure["html"] = self.page.content()
+            self.failure["screenshot"] = self.page.screenshot(
+                timeout=SCREENSHOT_TIMEOUT_MS, full_page=True
+            )
+        except Exception as e:
+            logger.warning(f"Could not capture the page after {step} failed: {e}")
+
+    async def capture_async(self, step: str) -> None:
+        """Async version of capture, for async pages."""
+        if self.failure is not None:
+            return
+
+        self.failure = {"step": step, "url": None, "html": None, "screenshot": None}
+        if self.page is None or self.page.is_closed():
+            return
+        try:
+            self.failure["url"] = self.page.url
+            self.failure["html"] = await self.page.content()
+            self.failure["screenshot"] = await self.page.screenshot(
+                timeout=SCREENSHOT_TIMEOUT_MS, full_page=True
+            )
+        except Exception as e:
+            logger.warning(f"Could not capture the page after {step} failed: {e}")
+
+    def flush(self, directory: str, error: BaseException) -> Path:
+        """
+        Write the recording of a failed run to a new folder under directory.
+
+        Args:
+            directory (str): Where recordings are kept
+            error (BaseException): The run's error
+
+        Returns:
+            Path: The recording's folder
+        """
+        failed_steps = [name for _, name, _, step_error, _ in self.steps if step_error]
+        if self.failure:
+            step = self.failure["step"]
+        else:
+            step = failed_steps[0] if failed_steps else "other"
+        path = Path(directory) / f"{datetime.now():%Y%m%d-%H%M%S}-{step}"
+        path.mkdir(parents=True, exist_ok=True)
+
+        page_url = self.failure["url"] if self.failure else None
+        (path / "error.txt").write_text(
+            f"Failed step: {step}\nPage: {page_url or '-'}\n\n"
+            + "".join(traceback.format_exception(error)),
+            encoding="utf-8",
+        )
+        with open(path / "events.jsonl", "w", encoding="utf-8") as f:
+            for at_ms, kind, *detail in self.events:
+                f.write(
+                    json.dumps(
+                        {"at_ms": round(at_ms, 1), "kind": kind, "detail": detail}
+                    )
+                    + "\n"
+                )
+        (path / "steps.json").write_text(
+            json.dumps(
+                [
+                    {
+                        "ended_at_ms": round(at_ms, 1),
+                        "step": name,
+                        "duration_ms": round(duration_ms, 1),
+                        "error": step_error,
+                        "url": url,
+                    }
+                    for at_ms, name, duration_ms, step_error, url in self.steps
+                ],
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        if self.failure and self.failure["html"] is not None:
+            (path / "page.html").write_text(self.failure["html"], encoding="utf-8")
+        if self.failure and self.failure["screenshot"] is not None:
+            (path / "screenshot.png").write_bytes(self.failure["screenshot"])
+
+        return path
+
+    def overhead_summary(self) -> str:
+        return f"{self.overhead_ns / 1e6:.2f}ms over {self.hooks} events and steps"
+
+
+_active_recorder: ContextVar[Optional[FlightRecorder]] = ContextVar(
+    "active_recorder", default=None
+)
+
+
+def active_recorder() -> Optional[FlightRecorder]:
+    """The current run's recorder, if recording."""
+    return _active_recorder.get()
+
+
+def prune_recordings(directory: str, keep: int) -> None:
+    """Delete all but the newest keep recordings."""
+    recordings = sorted(path for path in Path(directory).iterdir() if path.is_dir())
+    for path in recordings[: max(0, len(recordings) - keep)]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@contextmanager
+def flight_recording() -> Iterator[Optional[FlightRecorder]]:
+    """
+    Record a run in the current context, and flush the recording to flight_recorder_dir
+    if the run raises.
+
+    Yields:
+        Optional[FlightRecorder]: The recorder, or None when the recorder is disabled
+    """
+    if not settings.flight_recorder_enabled:
+        yield None
+        return
+
+    recorder = FlightRecorder(settings.flight_recorder_events)
+    token = _active_recorder.set(recorder)
+    try:
+        yield recorder
+    except BaseException as e:
+        try:
+            path = recorder.flush(settings.flight_recorder_dir, e)
+            prune_recordings(
+                settings.flight_recorder_dir, settings.flight_recorder_keep
+            )
+            logger.error(f"Run failed, flight recording saved to {path}")
+        except Exception as flush_error:
+            logger.warning(f"Could not save the flight recording: {flush_error}")
+        raise
+    finally:
+        logger.info(f"Flight recorder overhead: {recorder.overhead_summary()}")
+        _active_recorder.reset(token)
+
+
+def run_bench(events_per_step: int, capacity: int) -> None:
+    """
+    Measure the recorder's happy-path cost per step: one step timing plus
+    events_per_step network events.
+
+    Args:
+        events_per_step (int): Network events per step
+        capacity (int): Ring buffer size
+    """
+    recorder = FlightRecorder(capacity)
+
+    def one_step() -> None:
+        for _ in range(events_per_step):
+            recorder.event("request", "GET", "https://example.com/sfrecpark/rest/x")
+        recorder.step("bench", 12.5, None)
+
+    runs = 2000
+    best = min(timeit.repeat(one_step, number=runs, repeat=5)) / runs
+    logger.info(
+        f"{events_per_step} events + 1 step: {best * 1e6:.1f}µs per step "
+        f"(ring of {capacity})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the flight recorder's overhead per step"
+    )
+    parser.add_argument("--events-per-step", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--capacity", type=int, default=500)
+    args = parser.parse_args()
+
+    for events_per_step in args.events_per_step:
+        run_bench(events_per_step, args.capacity)
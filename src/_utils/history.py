@@ -0,0 +1,381 @@
+import argparse
+import sqlite3
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from typing import NamedTuple, Optional
+from src._utils.env import settings
+from src._utils.field_utils import AvailabilityIndex
+from src._utils.logger import setup_logger
+
+logger = setup_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS slot_layouts (
+    id INTEGER PRIMARY KEY,
+    time_slots TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS resources (
+    facility_group_id INTEGER NOT NULL,
+    resource_id INTEGER NOT NULL,
+    resource_name TEXT NOT NULL,
+    PRIMARY KEY (facility_group_id, resource_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    facility_group_id INTEGER NOT NULL,
+    request_date TEXT NOT NULL,
+    layout_id INTEGER NOT NULL REFERENCES slot_layouts (id),
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    fetches INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS snapshots_by_date
+    ON snapshots (facility_group_id, request_date, first_seen);
+CREATE TABLE IF NOT EXISTS snapshot_masks (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+    resource_id INTEGER NOT NULL,
+    -- little-endian bytes, SQLite integers overflow past 63 slots
+    free_mask BLOB NOT NULL,
+    PRIMARY KEY (snapshot_id, resource_id)
+) WITHOUT ROWID;
+"""
+
+
+class SlotLifetime(NamedTuple):
+    """One stretch of time a field's slot was free."""
+
+    request_date: str
+    resource_name: str
+    time: str
+    opened_at: datetime
+    # None while the slot was still free at the last snapshot
+    taken_at: Optional[datetime]
+    # False when the slot was already free in the first snapshot of its date, so the
+    # real opening happened before anything was recorded
+    observed_opening: bool
+
+
+class AvailabilityHistory:
+    """
+    SQLite store of availability snapshots. A snapshot is one free-slot bitmask per
+    resource; fetches that show nothing new only extend the previous snapshot's
+    last_seen, so the store grows with changes rather than with polling frequency.
+    """
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def record(
+        self,
+        facility_group_id: int,
+        request_date: str,
+        response: dict,
+        fetched_at: Optional[float] = None,
+    ) -> None:
+        """
+        Store an availability response.
+
+        Args:
+            facility_group_id (int): The facility group the response is for
+            request_date (str): The date the response is for, in YYYY-MM-DD format
+            response (dict): JSON response from the availability endpoint
+            fetched_at (Optional[float]): When it was fetched as a Unix timestamp, defaults to now
+        """
+        fetched_at = fetched_at or time.time()
+        index = AvailabilityIndex(response)
+        masks = dict(zip(index.resource_ids, index.free_masks))
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO slot_layouts (time_slots) VALUES (?)",
+                (",".join(index.time_slots),),
+            )
+            (layout_id,) = self.connection.execute(
+                "SELECT id FROM slot_layouts WHERE time_slots = ?",
+                (",".join(index.time_slots),),
+            ).fetchone()
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO resources VALUES (?, ?, ?)",
+                [
+                    (facility_group_id, resource_id, name)
+                    for resource_id, name in zip(
+                        index.resource_ids, index.resource_names
+                    )
+                ],
+            )
+
+            latest = self.connection.execute(
+                "SELECT id, layout_id FROM snapshots WHERE facility_group_id = ? AND request_date = ? "
+                "ORDER BY first_seen DESC LIMIT 1",
+                (facility_group_id, request_date),
+            ).fetchone()
+            if latest and latest[1] == layout_id and self._masks(latest[0]) == masks:
+                self.connection.execute(
+                    "UPDATE snapshots SET last_seen = MAX(last_seen, ?), fetches = fetches + 1 WHERE id = ?",
+                    (fetched_at, latest[0]),
+                )
+                return
+
+            snapshot_id = self.connection.execute(
+                "INSERT INTO snapshots (facility_group_id, request_date, layout_id, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (facility_group_id, request_date, layout_id, fetched_at, fetched_at),
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO snapshot_masks VALUES (?, ?, ?)",
+                [
+                    (snapshot_id, resource_id, encode_mask(mask))
+                    for resource_id, mask in masks.items()
+                ],
+            )
+
+    def _masks(self, snapshot_id: int) -> dict[int, int]:
+        return {
+            resource_id: decode_mask(mask)
+            for resource_id, mask in self.connection.execute(
+                "SELECT resource_id, free_mask FROM snapshot_masks WHERE snapshot_id = ?",
+                (snapshot_id,),
+            )
+        }
+
+    def lifetimes(
+        self, facility_group_id: int, request_date: Optional[str] = None
+    ) -> list[SlotLifetime]:
+        """
+        Replay the stored snapshots into the stretches each slot was free.
+
+        Args:
+            facility_group_id (int): The facility group to analyze
+            request_date (Optional[str]): Limit to one date, defaults to all
+
+        Returns:
+            list[SlotLifetime]: Every free stretch, in order of opening per date
+        """
+        names = dict(
+            self.connection.execute(
+                "SELECT resource_id, resource_name FROM resources WHERE facility_group_id = ?",
+                (facility_group_id,),
+            ).fetchall()
+        )
+        layouts = {
+            layout_id: time_slots.split(",")
+            for layout_id, time_slots in self.connection.execute(
+                "SELECT id, time_slots FROM slot_layouts"
+            )
+        }
+
+        query = (
+            "SELECT s.request_date, s.id, s.layout_id, s.first_seen, m.resource_id, m.free_mask "
+            "FROM snapshots s JOIN snapshot_masks m ON m.snapshot_id = s.id "
+            "WHERE s.facility_group_id = ?"
+        )
+        params: list = [facility_group_id]
+        if request_date:
+            query += " AND s.request_date = ?"
+            params.append(request_date)
+        query += " ORDER BY s.request_date, s.first_seen, s.id"
+
+        lifetimes: list[SlotLifetime] = []
+        for date, date_rows in groupby(
+            self.connection.execute(query, params), key=itemgetter(0)
+        ):
+            # (resource_id, time) -> (opened_at, observed_opening) for slots free so far
+            open_slots: dict[tuple[int, str], tuple[float, bool]] = {}
+            first_snapshot = True
+
+            for (_, layout_id, seen_at), rows in groupby(
+                date_rows, key=itemgetter(1, 2, 3)
+            ):
+                time_slots = layouts[layout_id]
+                free_now: set[tuple[int, str]] = set()
+                for *_, resource_id, stored in rows:
+                    mask = decode_mask(stored)
+                    free_now.update(
+                        (resource_id, slot_time)
+                        for slot, slot_time in enumerate(time_slots)
+                        if mask >> slot & 1
+                    )
+
+                for key in open_slots.keys() - free_now:
+                    opened, observed = open_slots.pop(key)
+                    lifetimes.append(
+                        self._lifetime(date, names, *key, opened, seen_at, observed)
+                    )
+                for key in free_now - open_slots.keys():
+                    open_slots[key] = (seen_at, not first_snapshot)
+                first_snapshot = False
+
+            for key, (opened, observed) in open_slots.items():
+                lifetimes.append(
+                    self._lifetime(date, names, *key, opened, None, observed)
+                )
+
+        return lifetimes
+
+    @staticmethod
+    def _lifetime(
+        request_date: str,
+        names: dict[int, str],
+        resource_id: int,
+        slot_time: str,
+        opened: float,
+        taken: Optional[float],
+        observed: bool,
+    ) -> SlotLifetime:
+        return SlotLifetime(
+            request_date=request_date,
+            resource_name=names.get(resource_id, str(resource_id)),
+            time=slot_time,
+            opened_at=datetime.fromtimestamp(opened, settings.tzinfo),
+            taken_at=datetime.fromtimestamp(taken, settings.tzinfo) if taken else None,
+            observed_opening=observed,
+        )
+
+
+def encode_mask(mask: int) -> bytes:
+    return mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+
+
+def decode_mask(stored: "bytes | int") -> int:
+    # stores written before masks were BLOBs hold plain integers
+    return stored if isinstance(stored, int) else int.from_bytes(stored, "little")
+
+
+def release_times(lifetimes: list[SlotLifetime]) -> dict[str, datetime]:
+    """When slots first opened for each date, from openings that were actually observed."""
+    releases: dict[str, datetime] = {}
+    for lifetime in lifetimes:
+        if lifetime.observed_opening:
+            releases[lifetime.request_date] = min(
+                releases.get(lifetime.request_date, lifetime.opened_at),
+                lifetime.opened_at,
+            )
+    return releases
+
+
+def typical_release_time(lifetimes: list[SlotLifetime]) -> Optional[str]:
+    """
+    Median time of day slots open at, a candidate for SCHEDULE_TIME in armed mode.
+
+    Returns:
+        Optional[str]: Time in HH:MM:SS format, or None without observed openings
+    """
+    releases = release_times(lifetimes).values()
+    if not releases:
+        return None
+
+    seconds = statistics.median(
+        release.hour * 3600
+        + release.minute * 60
+        + release.second
+        + release.microsecond / 1e6
+        for release in releases
+    )
+    return f"{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{int(seconds % 60):02d}"
+
+
+def median_seconds_to_taken(lifetimes: list[SlotLifetime]) -> dict[str, float]:
+    """How fast each field gets taken after its slots open, in seconds."""
+    durations: dict[str, list[float]] = {}
+    for lifetime in lifetimes:
+        if lifetime.observed_opening and lifetime.taken_at:
+            durations.setdefault(lifetime.resource_name, []).append(
+                (lifetime.taken_at - lifetime.opened_at).total_seconds()
+            )
+    return {name: statistics.median(values) for name, values in durations.items()}
+
+
+def median_free_seconds_by_time(lifetimes: list[SlotLifetime]) -> dict[str, float]:
+    """How long each time slot stays free, in seconds; slots never taken are left out."""
+    durations: dict[str, list[float]] = {}
+    for lifetime in lifetimes:
+        if lifetime.taken_at:
+            durations.setdefault(lifetime.time, []).append(
+                (lifetime.taken_at - lifetime.opened_at).total_seconds()
+            )
+    return {
+        slot_time: statistics.median(values)
+        for slot_time, values in sorted(durations.items())
+    }
+
+
+# Snapshots are written on one background thread so recording stays off the request path
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+_stores: dict[str, AvailabilityHistory] = {}
+
+
+def record_snapshot(
+    request_date: str, response: dict, facility_group_id: Optional[int] = None
+) -> None:
+    """
+    Queue an availability response for the history store, if enabled.
+
+    Args:
+        request_date (str): The date the response is for, in YYYY-MM-DD format
+        response (dict): JSON response from the availability endpoint
+        facility_group_id (Optional[int]): The facility group the response is for,
+            defaults to the configured one
+    """
+    if not settings.history_enabled:
+        return
+
+    _writer.submit(
+        _record,
+        settings.history_path,
+        facility_group_id or settings.facility_group_id,
+        request_date,
+        response,
+        time.time(),
+    )
+
+
+def _record(
+    path: str,
+    facility_group_id: int,
+    request_date: str,
+    response: dict,
+    fetched_at: float,
+) -> None:
+    try:
+        if path not in _stores:
+            _stores[path] = AvailabilityHistory(path)
+        _stores[path].record(facility_group_id, request_date, response, fetched_at)
+    except Exception as e:
+        logger.warning(f"Could not record availability snapshot: {e}")
+
+
+def report(path: str, facility_group_id: int) -> None:
+    """Log when slots open, how fast fields go and which times stay free longest."""
+    history = AvailabilityHistory(path)
+    lifetimes = history.lifetimes(facility_group_id)
+    history.close()
+
+    logger.info(f"{len(lifetimes)} free stretches recorded")
+    for request_date, released in sorted(release_times(lifetimes).items()):
+        logger.info(f"{request_date}: slots opened at {released.isoformat()}")
+    logger.info(f"Typical release time: {typical_release_time(lifetimes)}")
+    for name, seconds in sorted(median_seconds_to_taken(lifetimes).items()):
+        logger.info(f"{name}: taken {seconds:.1f}s after opening (median)")
+    for slot_time, seconds in median_free_seconds_by_time(lifetimes).items():
+        logger.info(f"{slot_time}: stays free {seconds:.1f}s (median)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze recorded availability")
+    parser.add_argument("--path", default=None)
+    parser.add_argument("--facility-group-id", type=int, default=None)
+    args = parser.parse_args()
+
+    report(
+        args.path or settings.history_path,
+        args.facility_group_id or settings.facility_group_id,
+    )
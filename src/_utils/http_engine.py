@@ -0,0 +1,443 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Callable, Optional
+from urllib.parse import urlparse
+import requests
+from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
+from src._utils.api import (
+    CONFIRM_PATH,
+    QUESTIONS_PATH,
+    RELEASE_PATH,
+    RESERVE_PATH,
+    api_headers,
+    api_url,
+    check_response,
+    request_timeout,
+)
+from src._utils.availability_client import AvailabilityClient
+from src._utils.env import settings
+from src._utils.facility_cache import forget_questions, prepared, remember_questions
+from src._utils.field_utils import (
+    AvailabilityIndex,
+    Candidate,
+    adjacent_group,
+    no_fields_error,
+    preferred_candidates,
+)
+from src._utils.logger import setup_logger
+from src._utils.metrics import note_request, timed_step
+from src._utils.questions import choose_answer
+from src._utils.racing import race
+from src._utils.scanner import ScannedCandidate, ScanTarget, scan, scan_candidates
+from src._utils.session_cache import CachedSession
+
+logger = setup_logger()
+
+
+class BatchItemResult(BaseModel):
+    request_date: str
+    resource_name: Optional[str] = None
+    start_time: Optional[str] = None
+    reservation_id: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None and self.reservation_id is not None
+
+
+class HttpBookingEngine:
+    """
+    Books a field with direct REST calls instead of driving the DOM.
+    Only the PCI payment iframe still needs a browser.
+    """
+
+    def __init__(self, cookies: dict[str, str], csrf_token: str, customer_id: int):
+        self.customer_id = customer_id
+
+        self.session = requests.Session()
+        # racing holds, concurrent scans and batch holds each need their own connection
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max(
+                settings.http_pool_size,
+                settings.race_candidates,
+                settings.scan_workers,
+                settings.batch_occurrences * settings.batch_fields,
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(api_headers(csrf_token))
+        self.session.cookies.update(cookies)
+
+        self.availability = AvailabilityClient(
+            cookies, csrf_token, customer_id, session=self.session
+        )
+        # raises if this worker may no longer confirm, checked right before each confirm
+        self.fence: Optional[Callable[[], None]] = None
+
+    @classmethod
+    def from_session(cls, session: CachedSession) -> "HttpBookingEngine":
+        """Create an engine from a cached authenticated session."""
+        return cls(session.cookies, session.csrf_token, session.customer_id)
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+
+    def _post(self, path: str, payload: dict) -> dict:
+        note_request()
+        return check_response(
+            self.session.post(api_url(path), json=payload, timeout=request_timeout())
+        )
+
+    def warm_up(self, connections: int = 1) -> None:
+        """
+        Open pooled connections ahead of time so the TLS handshake is off the critical path.
+
+        Args:
+            connections (int): How many to open, one per request that will run concurrently
+        """
+        self.availability.warm_up(connections)
+
+    def reserve(
+        self,
+        request_date: str,
+        candidate: Candidate,
+        facility_group_id: Optional[int] = None,
+    ) -> int:
+        """
+        Place a hold on a field's time slots.
+
+        Args:
+            request_date (str): Date to reserve in YYYY-MM-DD format
+            candidate (Candidate): The field and contiguous slots to hold
+            facility_group_id (Optional[int]): The field's facility group, defaults to the configured one
+
+        Returns:
+            int: The reservation ID of the hold
+        """
+        response = self._post(
+            RESERVE_PATH,
+            {
+                "facility_group_id": facility_group_id or settings.facility_group_id,
+                "customer_id": self.customer_id,
+                "reserve_date": request_date,
+                "event_name": settings.reservation_name,
+                "attendee": settings.group_quantity,
+                "resources": [
+                    {"resource_id": candidate.resource_id, "start_time": time}
+                    for time in candidate.times
+                ],
+            },
+        )
+        return response["body"]["reservation"]["reservation_id"]
+
+    def release(self, reservation_id: int) -> None:
+        """
+        Give up a hold so the slot goes back to the pool.
+
+        Args:
+            reservation_id (int): The reservation ID of the hold
+        """
+        self._post(RELEASE_PATH, {"reservation_id": reservation_id})
+
+    def answer_questions(
+        self, reservation_id: int, facility_group_id: Optional[int] = None
+    ) -> bool:
+        """
+        Answer the activity and policy questions and accept the waiver. When the facility
+        group's questions are cached, the prepared answers are sent straight away, saving
+        the round trip that loads the questions; if the site rejects them, the cache entry
+        is dropped and the questions are loaded as usual.
+
+        Args:
+            reservation_id (int): The reservation ID of the hold
+            facility_group_id (Optional[int]): The hold's facility group, defaults to the
+                configured one
+
+        Returns:
+            bool: True if the cached answers were used
+        """
+        facility_group_id = facility_group_id or settings.facility_group_id
+        facility = prepared(facility_group_id)
+        if facility and facility.answers is not None:
+            try:
+                self._post(
+                    QUESTIONS_PATH,
+                    {
+                        "reservation_id": reservation_id,
+                        "answers": facility.answers,
+                        "waiver_ids": facility.metadata.waiver_ids,
+                    },
+                )
+                return True
+            except (ValueError, requests.HTTPError) as e:
+                logger.info(
+                    f"Cached questions of facility group {facility_group_id} were rejected ({e}), reloading them"
+                )
+                forget_questions(facility_group_id)
+
+        response = check_response(
+            self.session.get(
+                api_url(QUESTIONS_PATH),
+                params={"reservation_id": reservation_id},
+                timeout=request_timeout(),
+            )
+        )
+        body = response["body"]
+
+        answers = []
+        for question in body["questions"]:
+            answer = choose_answer(question["prompt"], question["answers"])
+            if answer not in question["answers"]:
+                raise ValueError(f"Don't know how to answer: {question['prompt']}")
+
+            answers.append({"question_id": question["question_id"], "answer": answer})
+
+        waiver_ids = [waiver["waiver_id"] for waiver in body["waivers"]]
+        self._post(
+            QUESTIONS_PATH,
+            {
+                "reservation_id": reservation_id,
+                "answers": answers,
+                "waiver_ids": waiver_ids,
+            },
+        )
+        remember_questions(facility_group_id, body["questions"], waiver_ids)
+
+        return False
+
+    def confirm(self, reservation_id: int) -> None:
+        """
+        Move the reservation into the cart so it is ready for checkout.
+
+        Args:
+            reservation_id (int): The reservation ID of the hold
+        """
+        self._post(CONFIRM_PATH, {"reservation_id": reservation_id})
+
+    def book(self, request_date: str, availability: Optional[dict] = None) -> int:
+        """
+        Find an available field and take it all the way to the cart.
+        Checks both primary and alternate times for availability, racing holds on the
+        top race_candidates fields and keeping the first that succeeds.
+
+        Args:
+            request_date (str): Date to reserve in YYYY-MM-DD format
+            availability (Optional[dict]): An availability response that was just fetched,
+                e.g. by burst polling; fetched fresh otherwise
+
+        Returns:
+            int: The reservation ID now in the cart
+        """
+        if availability is None:
+            with timed_step("availability"):
+                availability = self.availability.fetch(request_date)
+
+        with timed_step("selection"):
+            index = AvailabilityIndex(availability)
+            target = ScanTarget(request_date, settings.facility_group_id)
+            candidates = [
+                ScannedCandidate(target, candidate)
+                for candidate in preferred_candidates(
+                    index, limit=settings.race_candidates
+                )
+            ]
+            scanned, reservation_id = self._hold(candidates)
+
+        return self._complete(reservation_id, scanned.facility_group_id)
+
+    def book_scanned(self, targets: Optional[list[ScanTarget]] = None) -> int:
+        """
+        Scan several dates and facility groups at once and take the best free field
+        across all of them to the cart, racing holds like book.
+
+        Args:
+            targets (Optional[list[ScanTarget]]): Dates and facility groups to scan,
+                defaults to the configured scan matrix
+
+        Returns:
+            int: The reservation ID now in the cart
+        """
+        with timed_step("availability"):
+            candidates = scan(self.availability, targets)
+
+        return self.book_candidates(candidates)
+
+    def book_candidates(self, candidates: list[ScannedCandidate]) -> int:
+        """
+        Take the best of already ranked candidates to the cart, racing holds like book.
+
+        Args:
+            candidates (list[ScannedCandidate]): Candidates, best first
+
+        Returns:
+            int: The reservation ID now in the cart
+        """
+        with timed_step("selection"):
+            scanned, reservation_id = self._hold(candidates[: settings.race_candidates])
+
+        return self._complete(reservation_id, scanned.facility_group_id)
+
+    def book_batch(self, dates: list[str]) -> list[BatchItemResult]:
+        """
+        Book batch_fields fields on each of several dates into one cart. Every date is
+        fetched at once and every item's hold is placed at once, so the slots are exposed to
+        other bookers for about one round trip. Each date's fields share one start time and
+        are next to each other when possible; an item whose hold is taken falls back to the
+        date's next best free field. Items that fail are released and reported, the rest
+        stay in the cart for a single checkout.
+
+        Args:
+            dates (list[str]): Dates to reserve in YYYY-MM-DD format
+
+        Returns:
+            list[BatchItemResult]: One result per item, by date
+
+        Raises:
+            ValueError: If no item made it into the cart
+        """
+        targets = [ScanTarget(date, settings.facility_group_id) for date in dates]
+
+        def pool(index: AvailabilityIndex) -> list[Candidate]:
+            ranked = preferred_candidates(index)
+            group = adjacent_group(index, ranked, settings.batch_fields)
+            return group + [candidate for candidate in ranked if candidate not in group]
+
+        with timed_step("availability"):
+            pools = scan_candidates(self.availability, targets, rank=pool)
+
+        locks = {target: threading.Lock() for target in pools}
+
+        def take(target: ScanTarget) -> tuple[Candidate, int]:
+            while True:
+                with locks[target]:
+                    if not pools[target]:
+                        raise ValueError("No fields left")
+                    candidate = pools[target].pop(0)
+                try:
+                    return candidate, self.reserve(
+                        target.request_date, candidate, target.facility_group_id
+                    )
+                except ValueError as e:
+                    logger.info(
+                        f"Hold attempt failed: {candidate.resource_name} at {candidate.start_time} on {target.request_date}: {e}"
+                    )
+
+        items = [target for target in targets for _ in range(settings.batch_fields)]
+        results: list[BatchItemResult] = []
+        with timed_step("selection"):
+            executor = ThreadPoolExecutor(max_workers=len(items))
+            # each hold runs in a copy of the caller's context so profile settings carry over
+            holds = [
+                executor.submit(copy_context().run, take, target)
+                if target in pools
+                else None
+                for target in items
+            ]
+            executor.shutdown(wait=True)
+
+        for target, hold in zip(items, holds):
+            result = BatchItemResult(request_date=target.request_date)
+            results.append(result)
+            if hold is None:
+                result.error = "Could not load availability"
+                continue
+            if hold.exception() is not None:
+                result.error = str(hold.exception())
+                continue
+
+            candidate, reservation_id = hold.result()
+            result.resource_name = candidate.resource_name
+            result.start_time = candidate.start_time
+            try:
+                self._complete(reservation_id, target.facility_group_id)
+                result.reservation_id = reservation_id
+            except Exception as e:
+                result.error = str(e)
+
+        for result in results:
+            item = f"{result.request_date}: {result.resource_name or '-'} at {result.start_time or '-'}"
+            if result.success:
+                logger.info(f"{item} in cart (reservation {result.reservation_id})")
+            else:
+                logger.warning(f"{item} failed: {result.error}")
+
+        if not any(result.success for result in results):
+            raise ValueError(
+                f"None of the {len(results)} batch items made it into the cart"
+            )
+
+        return results
+
+    def _hold(self, candidates: list[ScannedCandidate]) -> tuple[ScannedCandidate, int]:
+        if not candidates:
+            raise no_fields_error()
+
+        def attempt(scanned: ScannedCandidate) -> int:
+            try:
+                return self.reserve(
+                    scanned.request_date, scanned.candidate, scanned.facility_group_id
+                )
+            except ValueError as e:
+                raise ValueError(
+                    f"{scanned.resource_name} at {scanned.start_time}: {e}"
+                ) from e
+
+        scanned, reservation_id = race(candidates, attempt, self.release)
+        logger.info(
+            f"Holding {scanned.resource_name} at {scanned.start_time} on {scanned.request_date} "
+            f"(facility group {scanned.facility_group_id}, reservation {reservation_id})"
+        )
+
+        return scanned, reservation_id
+
+    def _complete(self, reservation_id: int, facility_group_id: int) -> int:
+        # a hold that can't be confirmed goes back to the pool rather than sit in the cart
+        try:
+            with timed_step("questions"):
+                cached = self.answer_questions(reservation_id, facility_group_id)
+            with timed_step("confirm"):
+                if self.fence:
+                    self.fence()
+                try:
+                    self.confirm(reservation_id)
+                except ValueError:
+                    if not cached:
+                        raise
+                    # the site took the cached answers but wants something else now
+                    logger.info("Confirm failed after cached answers, answering again")
+                    forget_questions(facility_group_id)
+                    self.answer_questions(reservation_id, facility_group_id)
+                    self.confirm(reservation_id)
+        except Exception:
+            try:
+                self.release(reservation_id)
+            except Exception as e:
+                logger.warning(f"Could not release reservation {reservation_id}: {e}")
+            raise
+
+        return reservation_id
+
+    def export_cookies(self) -> list[dict]:
+        """
+        Cookies of the engine's session in the shape BrowserContext.add_cookies expects,
+        so a browser can pick up the cart for checkout.
+
+        Returns:
+            list[dict]: Playwright cookie dicts
+        """
+        hostname: Optional[str] = urlparse(settings.base_url).hostname
+        return [
+            {
+                "name": cookie.name,
+                "value": cookie.value or "",
+                "domain": cookie.domain or hostname,
+                "path": cookie.path or "/",
+            }
+            for cookie in self.session.cookies
+        ]
@@ -0,0 +1,514 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, NamedTuple, Optional, Protocol
+from src._utils.date_utils import calculate_request_date
+from src._utils.env import settings
+from src._utils.logger import setup_logger
+
+logger = setup_logger()
+
+# How often a worker waiting on someone else's lease checks whether it can take over
+LEASE_POLL_SECONDS = 0.05
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT,
+    token INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+"""
+
+
+class Lease(NamedTuple):
+    """
+    The right to finish one booking until expires_at. Tokens only ever go up for a name,
+    so a holder whose token is no longer current has been replaced, whatever it believes.
+    """
+
+    name: str
+    holder: str
+    token: int
+    expires_at: float
+
+
+class LeaseCoordinator(Protocol):
+    """
+    A store every worker racing for the same booking can reach. Expiry is judged by the
+    store, so backends shared across nodes should use the store's clock.
+    """
+
+    def acquire(self, name: str, holder: str, ttl_seconds: float) -> Optional[Lease]:
+        """Take the lease if it is free or expired, with a new, higher token."""
+        ...
+
+    def renew(self, lease: Lease, ttl_seconds: float) -> Optional[Lease]:
+        """Extend the lease if its token is still current; None if it was lost."""
+        ...
+
+    def release(self, lease: Lease) -> None:
+        """Give the lease up early, so a waiting worker takes over right away."""
+        ...
+
+    def complete(self, lease: Lease) -> bool:
+        """Mark the booking done so nobody takes over; False if the token was not current."""
+        ...
+
+    def is_complete(self, name: str) -> bool:
+        """Whether some worker already finished the booking."""
+        ...
+
+
+class SqliteLeaseCoordinator:
+    """
+    LeaseCoordinator on a SQLite file, for workers on one machine (or a shared volume).
+    Every call runs in its own short IMMEDIATE transaction on a fresh connection, so
+    processes and heartbeat threads never share a connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        connection = sqlite3.connect(path, timeout=10)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def acquire(self, name: str, holder: str, ttl_seconds: float) -> Optional[Lease]:
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT token, expires_at, completed FROM leases WHERE name = ?",
+                (name,),
+            ).fetchone()
+            if row is not None and (row[2] or row[1] > now):
+                return None
+
+            lease = Lease(name, holder, (row[0] if row else 0) + 1, now + ttl_seconds)
+            connection.execute(
+                "INSERT OR REPLACE INTO leases (name, holder, token, expires_at) VALUES (?, ?, ?, ?)",
+                (name, holder, lease.token, lease.expires_at),
+            )
+            return lease
+
+    def renew(self, lease: Lease, ttl_seconds: float) -> Optional[Lease]:
+        now = time.time()
+        with self._transaction() as connection:
+            renewed = connection.execute(
+                "UPDATE leases SET expires_at = ? "
+                "WHERE name = ? AND token = ? AND expires_at > ? AND NOT completed",
+                (now + ttl_seconds, lease.name, lease.token, now),
+            ).rowcount
+        return lease._replace(expires_at=now + ttl_seconds) if renewed else None
+
+    def release(self, lease: Lease) -> None:
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE leases SET holder = NULL, expires_at = 0 "
+                "WHERE name = ? AND token = ? AND NOT completed",
+                (lease.name, lease.token),
+            )
+
+    def complete(self, lease: Lease) -> bool:
+        now = time.time()
+        with self._transaction() as connection:
+            return bool(
+                connection.execute(
+                    "UPDATE leases SET completed = 1 "
+                    "WHERE name = ? AND token = ? AND expires_at > ?",
+                    (lease.name, lease.token, now),
+                ).rowcount
+            )
+
+    def is_complete(self, name: str) -> bool:
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT completed FROM leases WHERE name = ?", (name,)
+            ).fetchone()
+        return bool(row and row[0])
+
+
+class LeaseGuard:
+    """
+    Keeps a lease alive from a heartbeat thread while its holder books. If the holder's
+    process stalls, so does the heartbeat, the lease expires and a waiting worker takes
+    over with a higher token; check() then fails when the stalled holder resumes, before
+    it can confirm or pay.
+    """
+
+    def __init__(
+        self,
+        coordinator: Optional[LeaseCoordinator],
+        lease: Optional[Lease],
+        ttl_seconds: float,
+    ):
+        self.coordinator = coordinator
+        self.lease = lease
+        self.ttl_seconds = ttl_seconds
+        self.lost = False
+        self.committed = False
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._heartbeat = threading.Thread(target=self._beat, daemon=True)
+        if coordinator is not None:
+            self._heartbeat.start()
+
+    @property
+    def token(self) -> Optional[int]:
+        return self.lease.token if self.lease else None
+
+    def _renew(self) -> None:
+        with self._lock:
+            if self.lost or self.coordinator is None or self.lease is None:
+                return
+            renewed = self.coordinator.renew(self.lease, self.ttl_seconds)
+            if renewed is None:
+                self.lost = True
+                logger.warning(
+                    f"Lost lease {self.lease.name} (token {self.lease.token})"
+                )
+            else:
+                self.lease = renewed
+
+    def _beat(self) -> None:
+        while not self._stopped.wait(self.ttl_seconds / 3):
+            try:
+                self._renew()
+            except Exception as e:
+                # the next beat may get through before the lease runs out
+                logger.warning(f"Could not renew lease: {e}")
+
+    def check(self) -> None:
+        """
+        Prove the lease is still held with the same token, right before an irreversible
+        step. Renews it, so nobody can take over for another ttl.
+
+        Raises:
+            ValueError: If the lease was lost to another worker
+        """
+        self._renew()
+        if self.lost:
+            raise ValueError(
+                f"Lease {self.lease.name} was taken over by another worker"  # type: ignore
+            )
+
+    def commit(self) -> None:
+        """
+        Prove the lease is still held right before a step that must not happen twice
+        (submitting payment), and mark the booking done at once. Whatever happens after,
+        even a crash or a payment that never confirms, no other worker takes over.
+
+        Raises:
+            ValueError: If the lease was lost to another worker
+        """
+        self.check()
+        with self._lock:
+            if self.coordinator is not None and self.lease is not None:
+                if not self.coordinator.complete(self.lease):
+                    self.lost = True
+                    raise ValueError(
+                        f"Lease {self.lease.name} was taken over by another worker"
+                    )
+            self.committed = True
+
+    def stop(self, completed: bool) -> None:
+        """
+        Stop the heartbeat, and either mark the booking done or hand it to the next worker.
+        A committed booking stays done either way.
+
+        Args:
+            completed (bool): Whether the booking went through
+        """
+        self._stopped.set()
+        if self.coordinator is None or self.lease is None:
+            return
+        with self._lock:
+            if self.lost or self.committed:
+                return
+            if completed:
+                if not self.coordinator.complete(self.lease):
+                    logger.warning(
+                        f"Lease {self.lease.name} expired before the booking was marked done"
+                    )
+            else:
+                self.coordinator.release(self.lease)
+
+
+def claim(
+    coordinator: LeaseCoordinator,
+    name: str,
+    holder: str,
+    ttl_seconds: float,
+    wait_seconds: float,
+) -> Optional[Lease]:
+    """
+    Take the lease, or wait for it: a worker that loses stays ready to take over if the
+    leader releases the lease or stops renewing it.
+
+    Args:
+        coordinator (LeaseCoordinator): The shared lease store
+        name (str): The booking being coordinated
+        holder (str): This worker's name
+        ttl_seconds (float): How long the lease lasts without a renewal
+        wait_seconds (float): How long to wait for a handoff
+
+    Returns:
+        Optional[Lease]: The lease, or None if the booking was completed by another
+            worker or no handoff came in time
+    """
+    deadline = time.monotonic() + wait_seconds
+    waiting = False
+    while True:
+        lease = coordinator.acquire(name, holder, ttl_seconds)
+        if lease is not None:
+            logger.info(f"{holder} holds lease {name} with token {lease.token}")
+            return lease
+        if coordinator.is_complete(name):
+            logger.info(f"Lease {name} was completed by another worker")
+            return None
+        if time.monotonic() >= deadline:
+            logger.info(f"No handoff of lease {name} within {wait_seconds:.0f}s")
+            return None
+        if not waiting:
+            logger.info(f"Lease {name} is held by another worker, standing by")
+            waiting = True
+        time.sleep(LEASE_POLL_SECONDS)
+
+
+def worker_name() -> str:
+    """This worker's name in leases: the configured one, or host and process id."""
+    return settings.worker_name or f"{socket.gethostname()}:{os.getpid()}"
+
+
+def booking_lease_name(request_date: Optional[str] = None) -> str:
+    """
+    Name of the lease for a booking; the same on every worker racing for it.
+
+    Args:
+        request_date (Optional[str]): Date of the booking, defaults to this run's
+
+    Returns:
+        str: The lease name
+    """
+    return f"{settings.facility_group_id}:{request_date or calculate_request_date()}:{settings.desired_time_military}"
+
+
+@contextmanager
+def exclusive_booking(
+    coordinator: Optional[LeaseCoordinator] = None,
+    name: Optional[str] = None,
+    wait_seconds: Optional[float] = None,
+) -> Iterator[Optional[LeaseGuard]]:
+    """
+    Let only one of several redundant workers finish the booking. Yields a guard whose
+    check() must pass right before each irreversible step and whose commit() must pass
+    right before paying, or None when another worker booked it. The lease is marked done
+    if the block finishes or once commit() passed, and released for the next worker if
+    it raises before that. Without coordination enabled, yields a guard that always passes.
+
+    Args:
+        coordinator (Optional[LeaseCoordinator]): The shared lease store, defaults to the
+            SQLite store at coordination_path
+        name (Optional[str]): The booking's lease, defaults to booking_lease_name()
+        wait_seconds (Optional[float]): How long a standby waits for a handoff, defaults
+            to lease_wait_seconds
+
+    Yields:
+        Optional[LeaseGuard]: The guard, or None if this worker should stand down
+    """
+    guard = _claim_guard(coordinator, name, wait_seconds)
+    if guard is None:
+        yield None
+        return
+
+    completed = False
+    try:
+        yield guard
+        completed = True
+    finally:
+        guard.stop(completed)
+
+
+@asynccontextmanager
+async def exclusive_booking_async(
+    coordinator: Optional[LeaseCoordinator] = None,
+    name: Optional[str] = None,
+    wait_seconds: Optional[float] = None,
+) -> AsyncIterator[Optional[LeaseGuard]]:
+    """
+    Async version of exclusive_booking. Waiting for the lease and handing it back run
+    in a thread, so the event loop keeps going meanwhile.
+    """
+    guard = await asyncio.to_thread(_claim_guard, coordinator, name, wait_seconds)
+    if guard is None:
+        yield None
+        return
+
+    completed = False
+    try:
+        yield guard
+        completed = True
+    finally:
+        await asyncio.to_thread(guard.stop, completed)
+
+
+def _claim_guard(
+    coordinator: Optional[LeaseCoordinator],
+    name: Optional[str],
+    wait_seconds: Optional[float] = None,
+) -> Optional[LeaseGuard]:
+    if not settings.coordination_enabled:
+        return LeaseGuard(None, None, settings.lease_ttl_seconds)
+
+    coordinator = coordinator or SqliteLeaseCoordinator(settings.coordination_path)
+    lease = claim(
+        coordinator,
+        name or booking_lease_name(),
+        worker_name(),
+        settings.lease_ttl_seconds,
+        settings.lease_wait_seconds if wait_seconds is None else wait_seconds,
+    )
+    if lease is None:
+        return None
+
+    return LeaseGuard(coordinator, lease, settings.lease_ttl_seconds)
+
+
+def _demo_worker(
+    path: str,
+    name: str,
+    index: int,
+    ttl_seconds: float,
+    stall: bool,
+    ambiguous: bool,
+    paid: "multiprocessing.Queue[tuple[str, int]]",
+) -> None:
+    holder = f"worker-{index}:{os.getpid()}"
+    coordinator = SqliteLeaseCoordinator(path)
+    lease = claim(coordinator, name, holder, ttl_seconds, wait_seconds=ttl_seconds * 4)
+    if lease is None:
+        return
+
+    guard = LeaseGuard(coordinator, lease, ttl_seconds)
+    completed = False
+    try:
+        if stall:
+            # freeze the whole worker, heartbeat included, past the lease's expiry
+            guard._stopped.set()
+            logger.info(f"{holder} stalling for {ttl_seconds * 2:.1f}s")
+            time.sleep(ttl_seconds * 2)
+        time.sleep(0.2)  # confirm
+        guard.commit()
+        paid.put((holder, lease.token))  # checkout
+        if ambiguous:
+            raise ValueError("payment submitted but no confirmation loaded")
+        completed = True
+    except ValueError as e:
+        logger.warning(f"{holder} did not finish: {e}")
+    finally:
+        guard.stop(completed)
+
+
+def run_demo(
+    path: str,
+    workers: int,
+    ttl_seconds: float,
+    stall: bool,
+    ambiguous: bool = False,
+) -> list[tuple[str, int]]:
+    """
+    Race several worker processes for one lease and check exactly one of them pays.
+    With stall, the first leader freezes past its lease so a follower takes over. With
+    ambiguous, the first leader's payment goes out but never confirms.
+
+    Args:
+        path (str): Path of the SQLite lease store
+        workers (int): Number of worker processes
+        ttl_seconds (float): Lease time-to-live
+        stall (bool): Whether the first leader stalls
+        ambiguous (bool): Whether the first leader fails after paying
+
+    Returns:
+        list[tuple[str, int]]: The (holder, token) of the worker that paid
+
+    Raises:
+        ValueError: If anything other than exactly one worker paid
+    """
+    name = f"demo:{time.time()}"
+    SqliteLeaseCoordinator(path)
+    paid: "multiprocessing.Queue[tuple[str, int]]" = multiprocessing.Queue()
+
+    def start(index: int) -> multiprocessing.Process:
+        return multiprocessing.Process(
+            target=_demo_worker,
+            args=(
+                path,
+                name,
+                index,
+                ttl_seconds,
+                stall and index == 0,
+                ambiguous and index == 0,
+                paid,
+            ),
+        )
+
+    # the first worker starts a moment early so it is the one that stalls
+    processes = [start(index) for index in range(workers)]
+    processes[0].start()
+    time.sleep(0.1)
+    for process in processes[1:]:
+        process.start()
+    for process in processes:
+        process.join()
+
+    payments = []
+    while not paid.empty():
+        payments.append(paid.get())
+    logger.info(f"Paid: {payments}")
+    if len(payments) != 1:
+        raise ValueError(f"Expected exactly one payment, got {len(payments)}")
+
+    return payments
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Race worker processes for one booking lease"
+    )
+    parser.add_argument("--path", default="coordination_demo.db")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ttl", type=float, default=1.0)
+    parser.add_argument(
+        "--stall", action="store_true", help="Freeze the first leader past its lease"
+    )
+    parser.add_argument(
+        "--ambiguous",
+        action="store_true",
+        help="Fail the first leader after its payment goes out",
+    )
+    args = parser.parse_args()
+
+    run_demo(args.path, args.workers, args.ttl, args.stall, args.ambiguous)
@@ -0,0 +1,122 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from prometheus_client import Counter, Gauge, Histogram
+from src._utils.flight_recorder import active_recorder
+from src._utils.logger import setup_logger
+
+logger = setup_logger()
+
+STEP_DURATION = Histogram(
+    "sf_rec_step_duration_seconds",
+    "Duration of each booking step",
+    ["step"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+AVAILABILITY_LATENCY = Histogram(
+    "sf_rec_availability_latency_seconds",
+    "Latency of availability endpoint requests",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.15, 0.25, 0.5, 1, 2.5, 5),
+)
+RUNS = Counter(
+    "sf_rec_runs_total",
+    "Booking runs by result and the step a failed run stopped at",
+    ["result", "failed_step"],
+)
+FIRE_JITTER = Histogram(
+    "sf_rec_fire_jitter_seconds",
+    "How far from the scheduled instant the scheduler fired (positive when late)",
+    buckets=(-0.01, -0.001, 0, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1),
+)
+LAST_FIRE_JITTER = Gauge(
+    "sf_rec_last_fire_jitter_seconds",
+    "Fire jitter of the most recent scheduled run",
+    # runs happen in short-lived worker processes, keep the latest one's value
+    multiprocess_mode="mostrecent",
+)
+FIRE_TO_FIRST_REQUEST = Histogram(
+    "sf_rec_fire_to_first_request_seconds",
+    "Time from a scheduled run firing to its first request to the booking site",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# steps that raised during the current run, innermost first; a list rather than a
+# plain value so steps running in a copied context (asyncio tasks) still report back
+_failed_steps: ContextVar[Optional[list[str]]] = ContextVar(
+    "failed_steps", default=None
+)
+
+# perf_counter() of the last mark_fired() until its first request is noted
+_fired_at: Optional[float] = None
+_first_request_ms: Optional[float] = None
+
+
+@contextmanager
+def timed_step(step: str) -> Iterator[None]:
+    """
+    Time a booking step into the step duration histogram. When the step raises,
+    it is remembered as the run's failed step.
+
+    Args:
+        step (str): The step name (login, calendar, availability, selection, questions,
+            confirm or checkout)
+    """
+    started = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)
+        failed_steps = _failed_steps.get()
+        if failed_steps is not None:
+            failed_steps.append(step)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        STEP_DURATION.labels(step=step).observe(duration)
+        recorder = active_recorder()
+        if recorder:
+            recorder.step(step, duration * 1000, error)
+
+
+@contextmanager
+def track_run() -> Iterator[None]:
+    """Count a booking run as a success, or as a failure labeled by the step it failed at."""
+    failed_steps: list[str] = []
+    _failed_steps.set(failed_steps)
+    try:
+        yield
+    except Exception:
+        failed_step = failed_steps[0] if failed_steps else "other"
+        RUNS.labels(result="failure", failed_step=failed_step).inc()
+        raise
+    RUNS.labels(result="success", failed_step="").inc()
+
+
+def observe_fire_jitter(jitter_ms: float) -> None:
+    """Record how far from the scheduled instant the scheduler fired."""
+    FIRE_JITTER.observe(jitter_ms / 1000)
+    LAST_FIRE_JITTER.set(jitter_ms / 1000)
+
+
+def mark_fired() -> None:
+    """Start timing a scheduled run's fire-to-first-request gap."""
+    global _fired_at, _first_request_ms
+    _fired_at, _first_request_ms = time.perf_counter(), None
+
+
+def note_request() -> None:
+    """Record the first request to the booking site since mark_fired; later calls do nothing."""
+    global _fired_at, _first_request_ms
+    if _fired_at is None:
+        return
+
+    elapsed = time.perf_counter() - _fired_at
+    _fired_at, _first_request_ms = None, elapsed * 1000
+    FIRE_TO_FIRST_REQUEST.observe(elapsed)
+
+
+def first_request_ms() -> Optional[float]:
+    """Fire-to-first-request gap of the last scheduled run, once it made a request."""
+    return _first_request_ms
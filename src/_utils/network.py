@@ -0,0 +1,212 @@
+import argparse
+import re
+import time
+from typing import Optional
+from playwright.async_api import BrowserContext as AsyncBrowserContext
+from playwright.async_api import Route as AsyncRoute
+from playwright.sync_api import BrowserContext, Route, sync_playwright
+from src._utils.env import settings
+from src._utils.logger import setup_logger
+
+logger = setup_logger()
+
+# URLs that requests of each blockable resource type are served from, so only those
+# requests are routed through Python
+RESOURCE_TYPE_URLS = {
+    "image": r"\.(?:png|jpe?g|gif|webp|avif|svg|ico|bmp)(?:[?#]|$)",
+    "media": r"\.(?:mp4|webm|ogg|mp3|wav|m4a|mov)(?:[?#]|$)",
+    "font": r"\.(?:woff2?|ttf|otf|eot)(?:[?#]|$)",
+    "stylesheet": r"\.css(?:[?#]|$)",
+    "script": r"\.m?js(?:[?#]|$)",
+}
+
+
+class RequestFilter:
+    """
+    Decides which requests a browser context lets through. Allow patterns win over
+    everything else, and requests from child frames (the PCI payment iframe) are
+    never blocked.
+    """
+
+    def __init__(
+        self,
+        blocked_resource_types: list[str],
+        blocked_url_patterns: list[str],
+        allowed_url_patterns: list[str],
+    ):
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.blocked_url = _compile(blocked_url_patterns)
+        self.allowed_url = _compile(allowed_url_patterns)
+        self.blocked = 0
+
+    @classmethod
+    def from_settings(cls) -> "RequestFilter":
+        return cls(
+            settings.blocked_resource_types,
+            settings.blocked_url_patterns,
+            settings.allowed_url_patterns,
+        )
+
+    def route_pattern(self) -> "Optional[re.Pattern[str] | str]":
+        """
+        The URLs worth routing: the blocked URL patterns plus the file extensions of the
+        blocked resource types. Playwright matches these in the browser, so allowed
+        requests never wait on a Python round-trip (under the sync API, routed requests
+        stall while the main thread busy-waits for the release instant). Falls back to
+        routing everything if a blocked resource type has no known extensions.
+
+        Returns:
+            Optional[re.Pattern[str] | str]: The pattern to route, or None if nothing is blocked
+        """
+        unmatched = self.blocked_resource_types - RESOURCE_TYPE_URLS.keys()
+        if unmatched:
+            logger.warning(
+                f"Routing every request to block resource types {sorted(unmatched)}"
+            )
+            return "**/*"
+
+        return _compile(
+            [RESOURCE_TYPE_URLS[kind] for kind in sorted(self.blocked_resource_types)]
+            + ([self.blocked_url.pattern] if self.blocked_url else [])
+        )
+
+    def should_block(self, url: str, resource_type: str, main_frame: bool) -> bool:
+        if not main_frame:
+            return False
+        if self.allowed_url and self.allowed_url.search(url):
+            return False
+
+        return resource_type in self.blocked_resource_types or bool(
+            self.blocked_url and self.blocked_url.search(url)
+        )
+
+    def _blocks(self, route: "Route | AsyncRoute") -> bool:
+        request = route.request
+        try:
+            main_frame = request.frame.parent_frame is None
+        except Exception:
+            # service worker requests have no frame
+            main_frame = True
+
+        blocked = self.should_block(request.url, request.resource_type, main_frame)
+        self.blocked += blocked
+        return blocked
+
+    def handle(self, route: Route) -> None:
+        if self._blocks(route):
+            route.abort("blockedbyclient")
+        else:
+            route.continue_()
+
+    async def handle_async(self, route: AsyncRoute) -> None:
+        if self._blocks(route):
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+
+def _compile(patterns: list[str]) -> Optional[re.Pattern[str]]:
+    return (
+        re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+        if patterns
+        else None
+    )
+
+
+def apply_request_filter(context: BrowserContext) -> None:
+    """Block unneeded requests on a context, if request filtering is enabled."""
+    if not settings.request_filter_enabled:
+        return
+
+    request_filter = RequestFilter.from_settings()
+    pattern = request_filter.route_pattern()
+    if pattern:
+        context.route(pattern, request_filter.handle)
+
+
+async def apply_request_filter_async(context: AsyncBrowserContext) -> None:
+    """Block unneeded requests on an async context, if request filtering is enabled."""
+    if not settings.request_filter_enabled:
+        return
+
+    request_filter = RequestFilter.from_settings()
+    pattern = request_filter.route_pattern()
+    if pattern:
+        await context.route(pattern, request_filter.handle_async)
+
+
+def benchmark(url: str, runs: int = 3) -> None:
+    """
+    Load a page with and without request filtering and log the bytes transferred and
+    time until the page is interactive (DOMContentLoaded) and settled (network idle).
+
+    Args:
+        url (str): The page to load
+        runs (int): Loads per mode, to average out noise
+    """
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+
+        for filtered in (False, True):
+            loads = []
+            for _ in range(runs):
+                context = browser.new_context()
+                request_filter = RequestFilter.from_settings()
+                pattern = request_filter.route_pattern()
+                if filtered and pattern:
+                    context.route(pattern, request_filter.handle)
+                page = context.new_page()
+
+                finished = []
+                page.on("requestfinished", finished.append)
+
+                started = time.perf_counter()
+                page.goto(url, wait_until="domcontentloaded")
+                interactive = time.perf_counter() - started
+                page.wait_for_load_state("networkidle")
+                settled = time.perf_counter() - started
+
+                transferred = 0
+                for request in finished:
+                    sizes = request.sizes()
+                    transferred += (
+                        sizes["responseBodySize"] + sizes["responseHeadersSize"]
+                    )
+
+                loads.append(
+                    (
+                        interactive,
+                        settled,
+                        transferred,
+                        len(finished),
+                        request_filter.blocked,
+                    )
+                )
+                context.close()
+
+            interactive, settled, transferred, requests, blocked = (
+                sum(values) / runs for values in zip(*loads)
+            )
+            logger.info(
+                f"{'filtered' if filtered else 'unfiltered'}: interactive {interactive * 1000:.0f}ms, "
+                f"settled {settled * 1000:.0f}ms, {transferred / 1024:.0f} KiB over "
+                f"{requests:.0f} requests ({blocked:.0f} blocked)"
+            )
+
+        browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark request filtering")
+    parser.add_argument(
+        "--url",
+        help="Page to load, defaults to the reservation landing page",
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    benchmark(
+        args.url
+        or f"{settings.base_url}/reservation/landing/quick?groupId={settings.facility_group_id}",
+        args.runs,
+    )
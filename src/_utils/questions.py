@@ -0,0 +1,80 @@
+from typing import Optional
+from playwright.async_api import Page as AsyncPage
+from playwright.sync_api import Page
+from src._utils.env import settings
+from src._utils.logger import setup_logger
+from src._utils.selectors import FILL_QUESTIONS_SCRIPT, WAIVER_LABEL_TEXT
+
+logger = setup_logger()
+
+# Answers used when no QUESTION_ANSWERS rule matches a question, first one offered wins
+DEFAULT_ANSWER = "Yes"
+
+
+def answer_fallbacks() -> list[str]:
+    return [settings.sport, DEFAULT_ANSWER]
+
+
+def choose_answer(prompt: str, options: list[str]) -> Optional[str]:
+    """
+    Pick the answer to a reservation question. A question_answers rule whose text appears
+    in the prompt (case-insensitive) wins; otherwise the sport, then "Yes", if offered.
+
+    Args:
+        prompt (str): The question text
+        options (list[str]): The answers offered
+
+    Returns:
+        Optional[str]: The answer, or None if no rule or fallback applies
+    """
+    for text, answer in settings.question_answers.items():
+        if text.lower() in prompt.lower():
+            return answer
+
+    return next((answer for answer in answer_fallbacks() if answer in options), None)
+
+
+def _fill_arguments() -> dict:
+    return {
+        "rules": list(settings.question_answers.items()),
+        "fallbacks": answer_fallbacks(),
+        "waiverText": WAIVER_LABEL_TEXT,
+    }
+
+
+def _check_fill(result: dict) -> None:
+    if result["problems"]:
+        raise ValueError(
+            f"Could not fill the questions: {'; '.join(result['problems'])}"
+        )
+
+    logger.info(
+        f"Answered {result['answered']} questions and {result['waivers']} waivers in one pass"
+    )
+
+
+def fill_questions(page: Page) -> None:
+    """
+    Answer every question in the open reservation modal and accept the waivers in a single
+    in-page script, matched by question text so the order of the questions doesn't matter.
+
+    Args:
+        page (Page): Playwright page object with the questions modal open
+
+    Raises:
+        ValueError: If a question has no usable answer or the form doesn't read back as filled
+    """
+    _check_fill(page.evaluate(FILL_QUESTIONS_SCRIPT, _fill_arguments()))
+
+
+async def fill_questions_async(page: AsyncPage) -> None:
+    """
+    Async version of fill_questions.
+
+    Args:
+        page (AsyncPage): Async Playwright page object with the questions modal open
+
+    Raises:
+        ValueError: If a question has no usable answer or the form doesn't read back as filled
+    """
+    _check_fill(await page.evaluate(FILL_QUESTIONS_SCRIPT, _fill_arguments()))
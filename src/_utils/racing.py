@@ -0,0 +1,68 @@
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from typing import Callable, Optional, TypeVar
+from src._utils.logger import setup_logger
+
+logger = setup_logger()
+
+Candidate = TypeVar("Candidate")
+Hold = TypeVar("Hold")
+
+
+def race(
+    candidates: list[Candidate],
+    attempt: Callable[[Candidate], Hold],
+    release: Callable[[Hold], None],
+) -> tuple[Candidate, Hold]:
+    """
+    Attempt a hold on every candidate at once and keep the first one that succeeds.
+    Returns as soon as there is a winner; holds that succeed afterwards are released
+    in the background so the slots go back to the pool.
+
+    Args:
+        candidates (list[Candidate]): Candidates to race, best first
+        attempt (Callable[[Candidate], Hold]): Places a hold, raising if the candidate was taken
+        release (Callable[[Hold], None]): Gives up a hold that lost the race
+
+    Returns:
+        tuple[Candidate, Hold]: The winning candidate and its hold
+
+    Raises:
+        ValueError: If every attempt failed
+    """
+    if not candidates:
+        raise ValueError("No candidates to race")
+
+    def release_loser(future: Future) -> None:
+        if future.exception() is not None:
+            return
+        try:
+            release(future.result())
+        except Exception as e:
+            logger.warning(f"Could not release losing hold: {e}")
+
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
+    # each attempt runs in a copy of the caller's context so profile settings carry over
+    futures = {
+        executor.submit(copy_context().run, attempt, candidate): candidate
+        for candidate in candidates
+    }
+    winner: Optional[Future] = None
+
+    try:
+        for future in as_completed(futures):
+            error = future.exception()
+            if error is None:
+                winner = future
+                break
+            logger.info(f"Hold attempt failed: {error}")
+    finally:
+        for future in futures:
+            if future is not winner:
+                future.add_done_callback(release_loser)
+        executor.shutdown(wait=False)
+
+    if winner is None:
+        raise ValueError(f"All {len(candidates)} candidates were taken")
+
+    return futures[winner], winner.result()
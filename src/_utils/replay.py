@@ -0,0 +1,215 @@
+import argparse
+import base64
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+from urllib.parse import urlparse
+from prometheus_client import REGISTRY
+from src._utils.env import settings
+from src._utils.logger import setup_logger
+
+logger = setup_logger()
+
+STEPS = [
+    "login",
+    "calendar",
+    "availability",
+    "selection",
+    "questions",
+    "confirm",
+    "checkout",
+]
+
+
+class RecordedResponse(NamedTuple):
+    status: int
+    content_type: str
+    body: bytes
+
+
+class HarReplay:
+    """Responses from a recorded session (HAR file), looked up by method and path."""
+
+    def __init__(self, path: str):
+        with open(path) as f:
+            entries = json.load(f)["log"]["entries"]
+
+        self.responses: dict[tuple[str, str], RecordedResponse] = {}
+        self.availability: Optional[dict] = None
+
+        for entry in entries:
+            request, response = entry["request"], entry["response"]
+            content = response.get("content", {})
+            if response["status"] <= 0 or "text" not in content:
+                continue
+
+            body = content["text"].encode()
+            if content.get("encoding") == "base64":
+                body = base64.b64decode(body)
+
+            route = urlparse(request["url"]).path
+            # the first recorded response wins, that's what the flow saw on its way in
+            self.responses.setdefault(
+                (request["method"], route),
+                RecordedResponse(
+                    response["status"], content.get("mimeType", "text/html"), body
+                ),
+            )
+
+            if self.availability is None and route.endswith(
+                "/quickreservation/availability"
+            ):
+                self.availability = json.loads(body)["body"]
+
+    def lookup(self, method: str, path: str) -> Optional[RecordedResponse]:
+        return self.responses.get((method, urlparse(path).path))
+
+
+class RunTiming(NamedTuple):
+    success: bool
+    total_ms: float
+    step_ms: dict[str, float]
+    error: Optional[str]
+
+
+def _step_seconds() -> dict[str, float]:
+    return {
+        step: REGISTRY.get_sample_value(
+            "sf_rec_step_duration_seconds_sum", {"step": step}
+        )
+        or 0.0
+        for step in STEPS
+    }
+
+
+def benchmark(
+    runs: int,
+    har_path: Optional[str] = None,
+    latency_ms: float = 0,
+    contention_rate: float = 0,
+    contention_times: Optional[list[str]] = None,
+) -> list[RunTiming]:
+    """
+    Run the full main() pipeline against the stub server and log end-to-end and per-step
+    timings. Every run starts from a fresh facility group, so results are repeatable.
+
+    Args:
+        runs (int): Number of runs
+        har_path (Optional[str]): A recorded session to replay pages and facility data from
+        latency_ms (float): Server-side latency added to every stub response
+        contention_rate (float): Slots taken by other bookers per second, mid-flow
+        contention_times (Optional[list[str]]): Limit contention to these times
+
+    Returns:
+        list[RunTiming]: One timing per run
+    """
+    # the stub server imports this module, and it shouldn't pull in the booking flow
+    from main import main
+    from src._utils.availability_client import LatencyStats
+    from src._utils.stub_server import (
+        StubServer,
+        StubState,
+        start_contention,
+        start_stub_server,
+        stub_session_json,
+    )
+
+    replay = HarReplay(har_path) if har_path else None
+
+    def fresh_state() -> StubState:
+        if replay and replay.availability:
+            return StubState.from_availability(replay.availability)
+        return StubState()
+
+    server: StubServer = start_stub_server(
+        state=fresh_state(), latency_ms=latency_ms, replay=replay
+    )
+    if contention_rate:
+        start_contention(server, contention_rate, contention_times)
+
+    session_cache = Path(tempfile.mkdtemp()) / "session_cache.json"
+    settings.base_url = server.base_url
+    settings.session_cache_path = str(session_cache)
+    settings.replay_har_path = har_path
+    settings.history_enabled = False
+
+    timings: list[RunTiming] = []
+    for run in range(1, runs + 1):
+        server.state = fresh_state()
+        session_cache.write_text(stub_session_json(server.base_url))
+
+        before = _step_seconds()
+        started = time.perf_counter()
+        error = None
+        try:
+            main()
+        except Exception as e:
+            error = str(e)
+        total_ms = (time.perf_counter() - started) * 1000
+        after = _step_seconds()
+
+        timing = RunTiming(
+            success=error is None,
+            total_ms=total_ms,
+            step_ms={
+                step: (after[step] - before[step]) * 1000
+                for step in STEPS
+                if after[step] > before[step]
+            },
+            error=error,
+        )
+        timings.append(timing)
+
+        steps = ", ".join(f"{step}={ms:.0f}ms" for step, ms in timing.step_ms.items())
+        status = "ok" if timing.success else f"failed: {timing.error}"
+        logger.info(f"Run {run}/{runs}: {total_ms:.0f}ms ({steps}) {status}")
+
+    server.shutdown()
+
+    totals = LatencyStats()
+    for timing in timings:
+        if timing.success:
+            totals.record(timing.total_ms)
+    logger.info(
+        f"{sum(timing.success for timing in timings)}/{runs} runs succeeded, end-to-end {totals.summary()}"
+    )
+    for step in STEPS:
+        samples = [timing.step_ms[step] for timing in timings if step in timing.step_ms]
+        if samples:
+            logger.info(f"{step}: median {statistics.median(samples):.0f}ms")
+
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the booking pipeline against the stub server"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--har", help="recorded session to replay (see RECORD_HAR_PATH)"
+    )
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument(
+        "--contention-rate",
+        type=float,
+        default=0,
+        help="slots taken by other bookers per second",
+    )
+    parser.add_argument(
+        "--contention-times",
+        nargs="*",
+        help="only take slots at these times, e.g. 20:00:00",
+    )
+    args = parser.parse_args()
+
+    benchmark(
+        args.runs,
+        args.har,
+        args.latency_ms,
+        args.contention_rate,
+        args.contention_times,
+    )
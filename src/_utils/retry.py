@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+import requests
+from playwright.sync_api import Error as PlaywrightError
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from src._utils.env import settings
+from src._utils.flight_recorder import active_recorder
+from src._utils.logger import setup_logger
+
+logger = setup_logger()
+
+T = TypeVar("T")
+
+# Playwright errors worth retrying: network hiccups and navigations racing the step
+TRANSIENT_PLAYWRIGHT_ERRORS = (
+    "net::ERR_",
+    "Execution context was destroyed",
+    "Element is not attached to the DOM",
+    "Navigation failed because page was closed",
+)
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Whether retrying the step that raised an error could succeed. Timeouts, dropped
+    connections and 5xx/429 responses are transient; everything else (no fields
+    available, bad credentials, a rejected payment) is fatal.
+
+    Args:
+        error (Exception): The error a step raised
+
+    Returns:
+        bool: True if the step should be retried
+    """
+    if isinstance(error, PlaywrightTimeoutError):
+        return True
+    if isinstance(error, PlaywrightError):
+        return any(message in str(error) for message in TRANSIENT_PLAYWRIGHT_ERRORS)
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500 or error.response.status_code == 429
+
+    return False
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Jittered exponential backoff before a retry, capped at four times retry_delay.
+
+    Args:
+        attempt (int): The retry about to be made, starting at 1
+
+    Returns:
+        float: Seconds to wait
+    """
+    ceiling = min(settings.retry_delay * 2 ** (attempt - 1), settings.retry_delay * 4)
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def run_step(name: str, step: Callable[[], T]) -> T:
+    """
+    Run a checkpointed step, retrying only this step on transient errors, up to
+    max_retries times. The step is expected to pick up from the live page or session
+    rather than start the run over.
+
+    Args:
+        name (str): The step name, for logging
+        step (Callable[[], T]): The step to run
+
+    Returns:
+        T: The step's result
+
+    Raises:
+        Exception: The step's error, once it is fatal or retries are exhausted
+    """
+    attempt = 0
+    while True:
+        try:
+            return step()
+        except Exception as e:
+            attempt += 1
+            recorder = active_recorder()
+            if attempt > settings.max_retries or not is_transient(e):
+                if recorder:
+                    recorder.capture(name)
+                raise
+
+            if recorder:
+                recorder.event("retry", name, str(e))
+            time.sleep(_retry_delay(name, e, attempt))
+
+
+async def run_step_async(name: str, step: Callable[[], Awaitable[T]]) -> T:
+    """
+    Async version of run_step.
+
+    Args:
+        name (str): The step name, for logging
+        step (Callable[[], Awaitable[T]]): Creates the step's coroutine for each attempt
+
+    Returns:
+        T: The step's result
+
+    Raises:
+        Exception: The step's error, once it is fatal or retries are exhausted
+    """
+    attempt = 0
+    while True:
+        try:
+            return await step()
+        except Exception as e:
+            attempt += 1
+            recorder = active_recorder()
+            if attempt > settings.max_retries or not is_transient(e):
+                if recorder:
+                    await recorder.capture_async(name)
+                raise
+
+            if recorder:
+                recorder.event("retry", name, str(e))
+            await asyncio.sleep(_retry_delay(name, e, attempt))
+
+
+def _retry_delay(name: str, error: Exception, attempt: int) -> float:
+    delay = backoff_delay(attempt)
+    logger.warning(
+        f"{name} failed ({error}), retrying in {delay:.1f}s ({attempt}/{settings.max_retries})"
+    )
+    return delay
@@ -0,0 +1,172 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from typing import Callable, NamedTuple, Optional
+from src._utils.availability_client import AvailabilityClient
+from src._utils.date_utils import calculate_request_dates
+from src._utils.env import settings
+from src._utils.field_utils import AvailabilityIndex, Candidate, preferred_candidates
+from src._utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class ScanTarget(NamedTuple):
+    request_date: str
+    facility_group_id: int
+
+
+class ScannedCandidate(NamedTuple):
+    """A ranked field/time block, along with the date and facility group it is in."""
+
+    target: ScanTarget
+    candidate: Candidate
+
+    @property
+    def request_date(self) -> str:
+        return self.target.request_date
+
+    @property
+    def facility_group_id(self) -> int:
+        return self.target.facility_group_id
+
+    @property
+    def resource_name(self) -> str:
+        return self.candidate.resource_name
+
+    @property
+    def start_time(self) -> str:
+        return self.candidate.start_time
+
+
+def scan_targets() -> list[ScanTarget]:
+    """
+    Every date and facility group the configured fallback plan accepts, most preferred
+    first: the desired facility group before the alternates, and earlier dates before later
+    ones within each.
+
+    Returns:
+        list[ScanTarget]: The scan matrix
+    """
+    dates = calculate_request_dates(settings.scan_occurrences)
+    facility_group_ids = [settings.facility_group_id, *settings.alt_facility_group_ids]
+
+    return [
+        ScanTarget(request_date, facility_group_id)
+        for facility_group_id in facility_group_ids
+        for request_date in dates
+    ]
+
+
+def merge_candidates(
+    candidates: dict[ScanTarget, list[Candidate]],
+    targets: list[ScanTarget],
+    limit: Optional[int] = None,
+) -> list[ScannedCandidate]:
+    """
+    Merge the candidates of every target into one ranking. Targets are ranked in order,
+    so a less preferred date or facility group is only used once the better ones have
+    nothing free; within a target, candidates keep their own ranking.
+
+    Args:
+        candidates (dict[ScanTarget, list[Candidate]]): Ranked candidates of each target
+        targets (list[ScanTarget]): Targets, most preferred first
+        limit (Optional[int]): Maximum number of candidates to return
+
+    Returns:
+        list[ScannedCandidate]: Merged candidates, best first
+    """
+    merged = [
+        ScannedCandidate(target, candidate)
+        for target in targets
+        for candidate in candidates.get(target, [])
+    ]
+
+    return merged[:limit] if limit is not None else merged
+
+
+def scan_candidates(
+    client: AvailabilityClient,
+    targets: list[ScanTarget],
+    rank: Callable[[AvailabilityIndex], list[Candidate]] = preferred_candidates,
+) -> dict[ScanTarget, list[Candidate]]:
+    """
+    Fetch availability for every target at once and rank each target's free fields.
+    Fetches run on a pool of up to scan_workers threads sharing the client's authenticated
+    session, so with enough workers the whole scan takes about as long as its slowest request.
+    A target that fails to load is logged and left out rather than failing the scan.
+
+    Args:
+        client (AvailabilityClient): Client of the authenticated session
+        targets (list[ScanTarget]): Dates and facility groups to scan
+        rank (Callable[[AvailabilityIndex], list[Candidate]]): Ranks the free fields of one
+            response, defaults to the configured preferences
+
+    Returns:
+        dict[ScanTarget, list[Candidate]]: Ranked candidates of each target that loaded
+
+    Raises:
+        Exception: The first target's error, if every target failed
+    """
+    started = time.perf_counter()
+
+    def fetch(target: ScanTarget) -> list[Candidate]:
+        response = client.fetch(target.request_date, target.facility_group_id)
+        return rank(AvailabilityIndex(response))
+
+    candidates: dict[ScanTarget, list[Candidate]] = {}
+    errors: dict[ScanTarget, BaseException] = {}
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(settings.scan_workers, len(targets)))
+    ) as executor:
+        # each fetch runs in a copy of the caller's context so profile settings carry over
+        futures = {
+            executor.submit(copy_context().run, fetch, target): target
+            for target in targets
+        }
+        for future in as_completed(futures):
+            target = futures[future]
+            error = future.exception()
+            if error is None:
+                candidates[target] = future.result()
+            else:
+                errors[target] = error
+                logger.warning(
+                    f"Could not scan facility group {target.facility_group_id} on {target.request_date}: {error}"
+                )
+
+    if not candidates:
+        raise errors[targets[0]]
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    free = sum(len(ranked) for ranked in candidates.values())
+    logger.info(
+        f"Scanned {len(candidates)}/{len(targets)} dates and facility groups in {elapsed_ms:.0f}ms, {free} candidates"
+    )
+
+    return candidates
+
+
+def scan(
+    client: AvailabilityClient,
+    targets: Optional[list[ScanTarget]] = None,
+    limit: Optional[int] = None,
+) -> list[ScannedCandidate]:
+    """
+    Scan every target at once (see scan_candidates) and rank the free fields across all of them.
+
+    Args:
+        client (AvailabilityClient): Client of the authenticated session
+        targets (Optional[list[ScanTarget]]): Dates and facility groups to scan, defaults to
+            scan_targets()
+        limit (Optional[int]): Maximum number of candidates to return
+
+    Returns:
+        list[ScannedCandidate]: Merged candidates, best first
+
+    Raises:
+        Exception: The first target's error, if every target failed
+    """
+    targets = targets or scan_targets()
+    return merge_candidates(scan_candidates(client, targets), targets, limit)
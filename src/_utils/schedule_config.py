@@ -0,0 +1,85 @@
+import os
+from typing import NamedTuple, Optional
+from zoneinfo import ZoneInfo
+from dotenv import dotenv_values
+from src._utils.constants import WEEKDAY_MAP
+
+# Values pydantic accepts as true for a bool setting
+TRUE_VALUES = {"1", "true", "t", "yes", "y", "on"}
+
+
+class ScheduleConfig(NamedTuple):
+    """
+    The few settings the scheduler needs between runs. Read straight from the environment
+    and .env rather than through Settings, so the idle scheduler doesn't load pydantic.
+    Defaults match Settings.
+    """
+
+    # None for a daily schedule
+    weekday: Optional[int]
+    time: str
+    timezone: str
+    spin_ms: int
+    armed_mode: bool
+    armed_lead_minutes: int
+    worker_lead_seconds: int
+    worker_timeout_minutes: int
+    watch_enabled: bool
+    metrics_enabled: bool
+    metrics_port: int
+
+    @property
+    def tzinfo(self) -> ZoneInfo:
+        return ZoneInfo(self.timezone)
+
+
+def load_schedule_config(env_file: str = ".env") -> ScheduleConfig:
+    """
+    Load the scheduler's settings from the environment, falling back to the .env file.
+    Names are case-insensitive, as with Settings.
+
+    Args:
+        env_file (str): Path to the .env file
+
+    Returns:
+        ScheduleConfig: The scheduler's settings
+
+    Raises:
+        ValueError: If the worker would start after it has to calibrate the clock
+    """
+    values = {
+        name.upper(): value
+        for name, value in {**dotenv_values(env_file), **os.environ}.items()
+        if value is not None
+    }
+
+    def get(name: str, default: str) -> str:
+        return values.get(name, default).strip()
+
+    # checked here too, so a bad lead fails at startup rather than in the first worker
+    worker_lead_seconds = int(get("WORKER_LEAD_SECONDS", "60"))
+    calibration_lead_seconds = int(get("CLOCK_CALIBRATION_LEAD_SECONDS", "30"))
+    if (
+        get("CLOCK_CALIBRATION_ENABLED", "true").lower() in TRUE_VALUES
+        and worker_lead_seconds <= calibration_lead_seconds
+    ):
+        raise ValueError(
+            f"WORKER_LEAD_SECONDS ({worker_lead_seconds}) must be greater than "
+            f"CLOCK_CALIBRATION_LEAD_SECONDS ({calibration_lead_seconds})"
+        )
+
+    return ScheduleConfig(
+        weekday=WEEKDAY_MAP[get("SCHEDULE_WEEKDAY", "WEDNESDAY").upper()]
+        if get("SCHEDULE_FREQUENCY", "WEEKLY").upper() == "WEEKLY"
+        else None,
+        time=get("SCHEDULE_TIME", "10:00"),
+        timezone=get("TIMEZONE", "America/Los_Angeles"),
+        spin_ms=int(get("SCHEDULER_SPIN_MS", "50")),
+        armed_mode=get("ARMED_MODE", "false").lower() in TRUE_VALUES,
+        armed_lead_minutes=int(get("ARMED_LEAD_MINUTES", "5")),
+        worker_lead_seconds=worker_lead_seconds,
+        worker_timeout_minutes=int(get("WORKER_TIMEOUT_MINUTES", "15")),
+        watch_enabled=get("WATCH_ENABLED", "false").lower() in TRUE_VALUES,
+        metrics_enabled=get("METRICS_ENABLED", "true").lower() in TRUE_VALUES,
+        metrics_port=int(get("METRICS_PORT", "9091")),
+    )
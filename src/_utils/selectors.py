@@ -0,0 +1,105 @@
+# Selectors and page scripts shared by the sync and async booking flows.
+# All selectors are from using the dev tools -> Super ugly
+
+EMAIL_INPUT = "#main-content-body > div.layout__container--default.an-main__wrapper > div.an-module-container.module-sign > div > div > div > div:nth-child(1) > div.input-group.input-group--m.input-group--ng.intput__clear--detault > input"
+PASSWORD_INPUT = "#main-content-body > div.layout__container--default.an-main__wrapper > div.an-module-container.module-sign > div > div > div > div:nth-child(2) > div.input-group.input-group--m.input-group--ng.intput__clear--detault > input"
+
+ACTIVITY_DROPDOWN = "#main-content-body > div > div.an-module-container > div > div > div.modal-wrap > div.modal.is-open.quick-need-to-answer > section > div.modal-body > div.enroll-question > div.an-survey > fieldset > div > div:nth-child(1) > fieldset > div > div.afx-col.question-answer-container.enroll-question-answer > div > div > div.dropdown__button.input__field"
+POLICY_QUESTION_DROPDOWNS = [
+    "#main-content-body > div > div.an-module-container > div > div > div.modal-wrap > div.modal.is-open.quick-need-to-answer > section > div.modal-body > div.enroll-question > div.an-survey > fieldset > div > div:nth-child(2) > fieldset > div > div.afx-col.question-answer-container.enroll-question-answer > div > div > div.dropdown__button.input__field",
+    "#main-content-body > div > div.an-module-container > div > div > div.modal-wrap > div.modal.is-open.quick-need-to-answer > section > div.modal-body > div.enroll-question > div.an-survey > fieldset > div > div:nth-child(3) > fieldset > div > div.afx-col.question-answer-container.enroll-question-answer > div > div > div.dropdown__button.input__field",
+    "#main-content-body > div > div.an-module-container > div > div > div.modal-wrap > div.modal.is-open.quick-need-to-answer > section > div.modal-body > div.enroll-question > div.an-survey > fieldset > div > div:nth-child(4) > fieldset > div > div.afx-col.question-answer-container.enroll-question-answer > div > div > div.dropdown__button.input__field",
+    "#main-content-body > div > div.an-module-container > div > div > div.modal-wrap > div.modal.is-open.quick-need-to-answer > section > div.modal-body > div.enroll-question > div.an-survey > fieldset > div > div:nth-child(5) > fieldset > div > div.afx-col.question-answer-container.enroll-question-answer > div > div > div.dropdown__button.input__field",
+]
+WAIVER_CHECKBOX = "label:has-text('I have read and agree to ATHLETIC FIELD TERMS AND CONDITIONS') input[type='checkbox']"
+WAIVER_LABEL_TEXT = "I have read and agree to"
+
+SIGNIN_BUTTON = ".btn-super"
+CALENDAR_INPUT = ".filter-section__date-time input"
+CALENDAR = ".an-calendar"
+RESERVATION_NAME_INPUT = "div.event-input .input-group__field"
+CONTINUE_BUTTON = ".booking-detail__btn--continue"
+QUESTIONS_MODAL = ".modal.is-open"
+MODAL_CONFIRM_BUTTON = ".modal-box .btn-strong"
+# a dropdown option, format with its title
+DROPDOWN_OPTION = "li[title='{}']"
+
+PAYMENT_IFRAME = "iframe[name='primaryPCIPaymentIframe']"
+PAY_BUTTON = ".pay__button"
+# inside the payment iframe
+CVV_INPUT = ".form-control"
+
+# True once the signed-in page's redux state holds the customer ID
+LOGGED_IN_SCRIPT = """() => {
+    try {
+        const nodes = window.__reduxInitialState.loginUser._root.entries[0][1]._root.nodes;
+        return nodes.some((node) => node.entry && node.entry[0] === "customerid");
+    } catch (e) {
+        return false;
+    }
+}"""
+
+# True once the calendar has re-rendered after paging to another month
+CALENDAR_CHANGED_SCRIPT = "([calendar, before]) => calendar.textContent !== before"
+
+# Answers every dropdown question in the open modal by its prompt and checks every waiver,
+# then reads the form back. Waits a frame after each click so the dropdown can re-render.
+FILL_QUESTIONS_SCRIPT = """async ({ rules, fallbacks, waiverText }) => {
+    const nextFrame = () => new Promise((resolve) => requestAnimationFrame(resolve));
+    const modal = document.querySelector(".modal.is-open");
+    const problems = [];
+    const filled = [];
+
+    for (const question of modal.querySelectorAll(".an-survey fieldset fieldset")) {
+        const container = question.querySelector(".enroll-question-answer");
+        const button = container && container.querySelector(".dropdown__button");
+        if (!button) {
+            continue;
+        }
+
+        const prompt = question.textContent.replace(container.textContent, "").trim();
+        button.click();
+        await nextFrame();
+
+        const options = [...button.parentElement.querySelectorAll("li[title]")];
+        const titles = options.map((option) => option.title);
+        const rule = rules.find(([text]) => prompt.toLowerCase().includes(text.toLowerCase()));
+        const answer = rule ? rule[1] : fallbacks.find((fallback) => titles.includes(fallback));
+        const option = options.find((option) => option.title === answer);
+        if (!option) {
+            problems.push(`No answer for "${prompt}" (options: ${titles.join(", ")})`);
+            continue;
+        }
+
+        option.click();
+        filled.push({ button, prompt, answer });
+    }
+    if (!filled.length && !problems.length) {
+        problems.push("No questions found");
+    }
+
+    const waivers = [...modal.querySelectorAll("label")]
+        .filter((label) => label.textContent.includes(waiverText))
+        .map((label) => label.querySelector("input[type='checkbox']"))
+        .filter(Boolean);
+    if (!waivers.length) {
+        problems.push("No waiver checkbox found");
+    }
+    for (const waiver of waivers) {
+        if (!waiver.checked) {
+            waiver.click();
+        }
+    }
+    await nextFrame();
+
+    for (const { button, prompt, answer } of filled) {
+        if (!button.textContent.includes(answer)) {
+            problems.push(`"${prompt}" shows "${button.textContent.trim()}" instead of "${answer}"`);
+        }
+    }
+    if (waivers.some((waiver) => !waiver.checked)) {
+        problems.push("Waiver is not checked");
+    }
+
+    return { answered: filled.length, waivers: waivers.length, problems };
+}"""
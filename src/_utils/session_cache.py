@@ -0,0 +1,140 @@
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Optional
+from playwright.sync_api import Page
+from pydantic import BaseModel, ValidationError
+from src._utils.api import fetch_availability
+from src._utils.date_utils import calculate_request_date
+from src._utils.env import settings
+from src._utils.logger import setup_logger
+from src._utils.utils import get_cookie_dict, get_csrf_token
+
+logger = setup_logger()
+
+
+class CachedSession(BaseModel):
+    storage_state: dict[str, Any]
+    csrf_token: str
+    cookies: dict[str, str]
+    customer_id: int
+    expires_at: datetime
+
+    @property
+    def is_expired(self) -> bool:
+        """Whether the entry has outlived its configured lifetime."""
+        return datetime.now() >= self.expires_at
+
+
+def load_session() -> Optional[CachedSession]:
+    """
+    Loads the cached authenticated session from disk.
+
+    Returns:
+        Optional[CachedSession]: The cached session, or None if missing, unreadable or expired
+    """
+    path = Path(settings.session_cache_path)
+    if not path.exists():
+        return None
+
+    try:
+        session = CachedSession.model_validate_json(path.read_text())
+    except (OSError, ValidationError) as e:
+        logger.warning(f"Ignoring unreadable session cache: {e}")
+        return None
+
+    if session.is_expired:
+        logger.info("Cached session expired")
+        return None
+
+    return session
+
+
+def capture_session(page: Page, customer_id: int) -> CachedSession:
+    """
+    Captures the page's authenticated state.
+
+    Args:
+        page (Page): Playwright page object, already logged in
+        customer_id (int): The customer's ID
+
+    Returns:
+        CachedSession: The captured session, expiring after the configured lifetime
+    """
+    return build_session(
+        dict(page.context.storage_state()),
+        get_csrf_token(page),
+        get_cookie_dict(page.context),
+        customer_id,
+    )
+
+
+def build_session(
+    storage_state: dict, csrf_token: str, cookies: dict[str, str], customer_id: int
+) -> CachedSession:
+    """
+    Builds a session from already extracted authenticated state.
+
+    Args:
+        storage_state (dict): The context's storage state
+        csrf_token (str): The CSRF token the SPA attaches to its REST calls
+        cookies (dict[str, str]): Cookie values keyed by name
+        customer_id (int): The customer's ID
+
+    Returns:
+        CachedSession: The session, expiring after the configured lifetime
+    """
+    return CachedSession(
+        storage_state=storage_state,
+        csrf_token=csrf_token,
+        cookies=cookies,
+        customer_id=customer_id,
+        expires_at=datetime.now()
+        + timedelta(minutes=settings.session_cache_ttl_minutes),
+    )
+
+
+def save_session(session: CachedSession) -> None:
+    """
+    Writes a session to the session cache.
+
+    Args:
+        session (CachedSession): The session to write
+    """
+    # cookies are credentials, so keep the file private to the user
+    path = Path(settings.session_cache_path)
+    path.touch(mode=0o600, exist_ok=True)
+    path.write_text(session.model_dump_json())
+
+
+def clear_session() -> None:
+    """Removes the cached session so the next run performs a full login."""
+    try:
+        os.remove(settings.session_cache_path)
+    except FileNotFoundError:
+        pass
+
+
+def probe_session(session: CachedSession) -> bool:
+    """
+    Checks that a cached session is still accepted by the server.
+    Uses the availability endpoint since the booking flow depends on it anyway.
+
+    Args:
+        session (CachedSession): The cached session to check
+
+    Returns:
+        bool: True if the server accepted the cached cookies and CSRF token
+    """
+    try:
+        response = fetch_availability(
+            cookies=session.cookies,
+            csrf_token=session.csrf_token,
+            request_date=calculate_request_date(),
+            customer_id=session.customer_id,
+        )
+    except Exception as e:
+        logger.info(f"Cached session probe failed: {e}")
+        return False
+
+    return "availability" in (response.get("body") or {})
@@ -0,0 +1,485 @@
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import urlparse
+from src._utils.logger import setup_logger
+from src._utils.replay import HarReplay
+
+logger = setup_logger()
+
+# Local stand-in for the ActiveCommunities REST API so the HTTP engine can run offline.
+# Point BASE_URL at http://127.0.0.1:<port>/sfrecpark to use it.
+BASE_PATH = "/sfrecpark"
+STUB_COOKIE_NAME = "JSESSIONID"
+STUB_COOKIE_VALUE = "stub-session"
+STUB_CSRF_TOKEN = "stub-csrf-token"
+STUB_CUSTOMER_ID = 1000
+
+CHECKOUT_HTML = """<!doctype html>
+<html><body>
+<iframe name="primaryPCIPaymentIframe" srcdoc="<input class='form-control' name='cvv'>"></iframe>
+<button class="pay__button" onclick="fetch('pay', {method: 'POST'}).then(() => location.href = 'confirmation')">Pay</button>
+</body></html>"""
+
+CONFIRMATION_HTML = "<!doctype html><html><body><h1>Receipt</h1></body></html>"
+
+
+class StubState:
+    """
+    In-memory facility group, holds and cart served by the stub. Every facility group and
+    date has the same fields and time slots but its own bookings, so batch and multi-group
+    runs don't collide with themselves.
+    """
+
+    def __init__(
+        self,
+        resource_count: int = 8,
+        field_prefix: str = "FIELD - Main",
+        time_slots: Optional[list[str]] = None,
+    ):
+        self.lock = threading.Lock()
+        self.time_slots = time_slots or [f"{hour:02d}:00:00" for hour in range(8, 22)]
+        self.resources = [
+            {"resource_id": index + 1, "resource_name": f"{field_prefix} {index + 1}"}
+            for index in range(resource_count)
+        ]
+        # (facility_group_id, reserve_date, resource_id, time)
+        self.booked: set[tuple[Any, Any, int, str]] = set()
+        # (resource_id, time) booked on every date and facility group, e.g. from a recording
+        self.always_booked: set[tuple[int, str]] = set()
+        # (facility_group_id, reserve_date) the bot has looked at, where contention books
+        self.requested: set[tuple[Any, Any]] = set()
+        self.holds: dict[int, dict[str, Any]] = {}
+        self.cart: list[int] = []
+        self.paid: list[int] = []
+        self.next_reservation_id = 1
+
+    @classmethod
+    def from_availability(cls, availability: dict) -> "StubState":
+        """
+        A facility group matching a recorded availability response body, with the slots
+        that were booked then still booked.
+        """
+        time_slots = availability["availability"]["time_slots"]
+        state = cls(resource_count=0, time_slots=time_slots)
+
+        for resource in availability["availability"]["resources"]:
+            state.resources.append(
+                {
+                    "resource_id": resource["resource_id"],
+                    "resource_name": resource["resource_name"],
+                }
+            )
+            state.always_booked |= {
+                (resource["resource_id"], time)
+                for detail, time in zip(resource["time_slot_details"], time_slots)
+                if detail["status"]
+            }
+
+        return state
+
+    def is_booked(
+        self, facility_group_id: Any, reserve_date: Any, resource_id: int, time: str
+    ) -> bool:
+        return (resource_id, time) in self.always_booked or (
+            facility_group_id,
+            reserve_date,
+            resource_id,
+            time,
+        ) in self.booked
+
+    def take_free_slot(self, times: Optional[list[str]] = None) -> None:
+        """
+        Book a random free slot on a date the bot has looked at, as another user would.
+        Before the bot's first availability request, the slot is taken on every date.
+        """
+        targets = list(self.requested) or [(None, None)]
+        free = [
+            (facility_group_id, reserve_date, resource["resource_id"], time)
+            for facility_group_id, reserve_date in targets
+            for resource in self.resources
+            for time in times or self.time_slots
+            if not self.is_booked(
+                facility_group_id, reserve_date, resource["resource_id"], time
+            )
+        ]
+        if not free:
+            return
+
+        facility_group_id, reserve_date, resource_id, time = random.choice(free)
+        if self.requested:
+            self.booked.add((facility_group_id, reserve_date, resource_id, time))
+        else:
+            self.always_booked.add((resource_id, time))
+
+    def availability(self, payload: dict) -> dict:
+        facility_group_id = payload.get("facility_group_id")
+        reserve_date = payload.get("reserve_date")
+        if reserve_date is not None:
+            self.requested.add((facility_group_id, reserve_date))
+
+        return {
+            "availability": {
+                "time_slots": self.time_slots,
+                "resources": [
+                    {
+                        **resource,
+                        "time_slot_details": [
+                            {
+                                "status": self.is_booked(
+                                    facility_group_id,
+                                    reserve_date,
+                                    resource["resource_id"],
+                                    time,
+                                )
+                            }
+                            for time in self.time_slots
+                        ],
+                    }
+                    for resource in self.resources
+                ],
+            }
+        }
+
+    def reserve(self, payload: dict) -> dict:
+        slots = {
+            (
+                payload.get("facility_group_id"),
+                payload.get("reserve_date"),
+                resource["resource_id"],
+                resource["start_time"],
+            )
+            for resource in payload["resources"]
+        }
+        if any(self.is_booked(*slot) for slot in slots):
+            raise ValueError("The selected time slot is no longer available")
+
+        self.booked |= slots
+        reservation_id = self.next_reservation_id
+        self.next_reservation_id += 1
+        self.holds[reservation_id] = {"slots": slots, "answered": False}
+
+        return {"reservation": {"reservation_id": reservation_id}}
+
+    def release(self, payload: dict) -> dict:
+        hold = self.holds.pop(payload["reservation_id"])
+        self.booked -= hold["slots"]
+        return {}
+
+    def questions(self) -> dict:
+        policy = {"answers": ["Yes", "No"]}
+        return {
+            "questions": [
+                {
+                    "question_id": 1,
+                    "prompt": "Activity",
+                    "answers": ["Baseball", "Soccer", "Softball"],
+                },
+                {"question_id": 2, "prompt": "Will you follow park rules?", **policy},
+                {"question_id": 3, "prompt": "Will you clean up after?", **policy},
+                {"question_id": 4, "prompt": "Is your group insured?", **policy},
+                {"question_id": 5, "prompt": "Are all players registered?", **policy},
+            ],
+            "waivers": [
+                {
+                    "waiver_id": 1,
+                    "title": "ATHLETIC FIELD TERMS AND CONDITIONS",
+                }
+            ],
+        }
+
+    def answer(self, payload: dict) -> dict:
+        if len(payload["answers"]) != len(self.questions()["questions"]):
+            raise ValueError("All questions must be answered")
+        if not payload["waiver_ids"]:
+            raise ValueError("The waiver must be accepted")
+
+        self.holds[payload["reservation_id"]]["answered"] = True
+        return {}
+
+    def confirm(self, payload: dict) -> dict:
+        reservation_id = payload["reservation_id"]
+        if not self.holds[reservation_id]["answered"]:
+            raise ValueError("Questions have not been answered")
+
+        self.cart.append(reservation_id)
+        return {"cart": {"reservation_ids": self.cart}}
+
+    def pay(self, payload: dict) -> dict:
+        self.paid.extend(self.cart)
+        self.cart = []
+        return {}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # keep-alive, like the real site, so pooled clients reuse connections
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes, don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+    server: "StubServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"stub: {format % args}")
+
+    def date_time_string(self, timestamp: Optional[float] = None) -> str:
+        # the Date header is read off the server's own, possibly skewed, clock
+        if timestamp is None:
+            timestamp = time.time() + self.server.clock_skew_ms / 1000
+        return super().date_time_string(timestamp)
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        if self.server.latency_ms:
+            time.sleep(self.server.latency_ms / 1000)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(
+        self, body: dict, response_code: str = "0000", message: str = "Successful"
+    ) -> None:
+        envelope = {
+            "headers": {"response_code": response_code, "response_message": message},
+            "body": body,
+        }
+        self._send(200, json.dumps(envelope).encode(), "application/json")
+
+    def _send_recorded(self) -> bool:
+        replay = self.server.replay
+        recorded = replay.lookup(self.command, self.path) if replay else None
+        if not recorded:
+            return False
+
+        self._send(recorded.status, recorded.body, recorded.content_type)
+        return True
+
+    def _is_authenticated(self) -> bool:
+        # a replayed session carries the recorded site's auth, which can't be checked
+        if self.server.replay:
+            return True
+
+        cookies = self.headers.get("Cookie", "")
+        return (
+            f"{STUB_COOKIE_NAME}={STUB_COOKIE_VALUE}" in cookies
+            and self.headers.get("x-csrf-token") == STUB_CSRF_TOKEN
+        )
+
+    def _route(self) -> str:
+        path = urlparse(self.path).path
+        return path[len(BASE_PATH) :] if path.startswith(BASE_PATH) else path
+
+    def do_HEAD(self) -> None:
+        self._send(200, b"", "text/html")
+
+    def do_GET(self) -> None:
+        route = self._route()
+        state = self.server.state
+
+        if route == "/checkout":
+            return self._send(200, CHECKOUT_HTML.encode(), "text/html")
+        if route == "/confirmation":
+            return self._send(200, CONFIRMATION_HTML.encode(), "text/html")
+        if not self._is_authenticated():
+            return self._send(401, b"", "text/plain")
+
+        if route == "/rest/reservation/quickreservation/questions":
+            with state.lock:
+                return self._send_json(state.questions())
+
+        if not self._send_recorded():
+            self._send(404, b"", "text/plain")
+
+    def do_POST(self) -> None:
+        route = self._route()
+        state = self.server.state
+
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        handlers = {
+            "/pay": state.pay,
+            "/rest/reservation/quickreservation/availability": state.availability,
+            "/rest/reservation/quickreservation/reserve": state.reserve,
+            "/rest/reservation/quickreservation/release": state.release,
+            "/rest/reservation/quickreservation/questions": state.answer,
+            "/rest/reservation/quickreservation/confirm": state.confirm,
+        }
+        if route not in handlers:
+            if not self._send_recorded():
+                self._send(404, b"", "text/plain")
+            return
+        if route != "/pay" and not self._is_authenticated():
+            return self._send(401, b"", "text/plain")
+
+        try:
+            with state.lock:
+                body = handlers[route](payload)
+        except KeyError as e:
+            # the recorded SPA's payloads differ from the HTTP engine's
+            if self._send_recorded():
+                return
+            return self._send_json({}, response_code="0001", message=str(e))
+        except ValueError as e:
+            return self._send_json({}, response_code="0001", message=str(e))
+
+        self._send_json(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        state: Optional[StubState] = None,
+        latency_ms: float = 0,
+        replay: Optional[HarReplay] = None,
+        clock_skew_ms: float = 0,
+    ):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.state = state or StubState()
+        self.latency_ms = latency_ms
+        self.replay = replay
+        self.clock_skew_ms = clock_skew_ms
+
+    @property
+    def base_url(self) -> str:
+        """Value to use for the BASE_URL setting to target this server."""
+        return f"http://127.0.0.1:{self.server_address[1]}{BASE_PATH}"
+
+
+def start_stub_server(
+    port: int = 0,
+    state: Optional[StubState] = None,
+    latency_ms: float = 0,
+    replay: Optional[HarReplay] = None,
+    clock_skew_ms: float = 0,
+) -> StubServer:
+    """
+    Start a stub server on a background thread.
+
+    Args:
+        port (int): Port to listen on, 0 picks a free one
+        state (Optional[StubState]): Facility group to serve, defaults to a fresh one
+        latency_ms (float): Delay added before every response
+        replay (Optional[HarReplay]): Recorded session to serve pages and unknown routes from
+        clock_skew_ms (float): How far the server's clock (its Date headers) runs ahead of
+            the local one, negative when behind
+
+    Returns:
+        StubServer: The running server, call shutdown() to stop it
+    """
+    server = StubServer(port, state, latency_ms, replay, clock_skew_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_contention(
+    server: StubServer, rate: float, times: Optional[list[str]] = None
+) -> None:
+    """
+    Have other bookers take free slots while the bot runs.
+
+    Args:
+        server (StubServer): The server whose facility group to book
+        rate (float): Slots taken per second
+        times (Optional[list[str]]): Only take slots at these times
+    """
+
+    def contend() -> None:
+        while True:
+            time.sleep(random.expovariate(rate))
+            state = server.state
+            with state.lock:
+                state.take_free_slot(times)
+
+    threading.Thread(target=contend, daemon=True).start()
+
+
+def stub_session_json(base_url: str, ttl_minutes: int = 60) -> str:
+    """
+    A session cache entry the stub accepts, so the HTTP engine can skip the browser login.
+
+    Args:
+        base_url (str): The stub server's base URL
+        ttl_minutes (int): How long the entry stays valid
+
+    Returns:
+        str: JSON for the session cache file
+    """
+    hostname = urlparse(base_url).hostname
+    cookie = {
+        "name": STUB_COOKIE_NAME,
+        "value": STUB_COOKIE_VALUE,
+        "domain": hostname,
+        "path": "/",
+        "expires": -1,
+        "httpOnly": False,
+        "secure": False,
+        "sameSite": "Lax",
+    }
+    return json.dumps(
+        {
+            "storage_state": {"cookies": [cookie], "origins": []},
+            "csrf_token": STUB_CSRF_TOKEN,
+            "cookies": {STUB_COOKIE_NAME: STUB_COOKIE_VALUE},
+            "customer_id": STUB_CUSTOMER_ID,
+            "expires_at": (datetime.now() + timedelta(minutes=ttl_minutes)).isoformat(),
+        }
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve a local stub of the booking API"
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--resources", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument(
+        "--clock-skew-ms",
+        type=float,
+        default=0,
+        help="run the server's clock (Date headers) this far ahead of the local one",
+    )
+    parser.add_argument(
+        "--contention-rate",
+        type=float,
+        default=0,
+        help="slots taken by other bookers per second",
+    )
+    parser.add_argument(
+        "--replay-har",
+        metavar="PATH",
+        help="serve pages and facility data from a recorded session",
+    )
+    parser.add_argument(
+        "--write-session",
+        metavar="PATH",
+        help="write a session cache entry the stub accepts to PATH",
+    )
+    args = parser.parse_args()
+
+    replay = HarReplay(args.replay_har) if args.replay_har else None
+    state = (
+        StubState.from_availability(replay.availability)
+        if replay and replay.availability
+        else StubState(resource_count=args.resources)
+    )
+    server = StubServer(args.port, state, args.latency_ms, replay, args.clock_skew_ms)
+    if args.contention_rate:
+        start_contention(server, args.contention_rate)
+    if args.write_session:
+        with open(args.write_session, "w") as f:
+            f.write(stub_session_json(server.base_url))
+
+    logger.info(f"Stub server listening, set BASE_URL={server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,98 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+# Longest single sleep, so wall-clock adjustments (NTP, VM suspend) are picked up
+MAX_SLEEP_SECONDS = 30.0
+
+
+def localize(wall_time: datetime, tz: ZoneInfo) -> datetime:
+    """
+    Attach a timezone to a naive wall-clock time, resolving DST edge cases.
+    Times skipped by a spring-forward transition move forward by the gap (02:30 -> 03:30);
+    times repeated by a fall-back transition resolve to their first occurrence.
+
+    Args:
+        wall_time (datetime): Naive wall-clock time
+        tz (ZoneInfo): Timezone to interpret it in
+
+    Returns:
+        datetime: Timezone-aware datetime
+    """
+    aware = wall_time.replace(tzinfo=tz, fold=0)
+    # round-trip through UTC to normalize non-existent times
+    return datetime.fromtimestamp(aware.timestamp(), tz)
+
+
+def next_fire_time(
+    weekday: Optional[int],
+    time_of_day: str,
+    tz: ZoneInfo,
+    after: Optional[datetime] = None,
+) -> datetime:
+    """
+    Compute the next instant a daily or weekly schedule fires, in the given timezone.
+
+    Args:
+        weekday (Optional[int]): Day of the week (0 = Monday), or None for daily
+        time_of_day (str): Time in 24-hour format (e.g., "10:00" or "10:00:00")
+        tz (ZoneInfo): Timezone the schedule is defined in
+        after (Optional[datetime]): Find the first fire time strictly after this instant,
+            defaults to now
+
+    Returns:
+        datetime: Timezone-aware fire time
+    """
+    after = (after or datetime.now(timezone.utc)).astimezone(tz)
+    hour, minute, *rest = map(int, time_of_day.split(":"))
+    second = rest[0] if rest else 0
+
+    day = after.date()
+    while True:
+        if weekday is None or day.weekday() == weekday:
+            fire_at = localize(
+                datetime(day.year, day.month, day.day, hour, minute, second), tz
+            )
+            if fire_at > after:
+                return fire_at
+        day += timedelta(days=1)
+
+
+def shift(instant: datetime, delta: timedelta) -> datetime:
+    """Shift an aware instant by elapsed (not wall-clock) time, across DST changes."""
+    return (instant.astimezone(timezone.utc) + delta).astimezone(instant.tzinfo)
+
+
+def seconds_until(target: datetime) -> float:
+    """Seconds from now until target; naive targets are taken as local time."""
+    return (target - datetime.now(target.tzinfo)).total_seconds()
+
+
+def ms_since(instant: datetime) -> float:
+    """Milliseconds elapsed since an instant; naive instants are taken as local time."""
+    return -seconds_until(instant) * 1000
+
+
+def sleep_until_precise(target: datetime, spin_ms: float = 50) -> float:
+    """
+    Block until target with millisecond precision. Sleeps in bounded chunks against the
+    wall clock until the last spin_ms, then busy-waits on the monotonic clock.
+
+    Args:
+        target (datetime): The instant to wake at
+        spin_ms (float): Length of the final busy-wait window
+
+    Returns:
+        float: Fire jitter in milliseconds (positive when late)
+    """
+    spin_seconds = spin_ms / 1000
+
+    while (remaining := seconds_until(target)) > spin_seconds:
+        time.sleep(min(remaining - spin_seconds, MAX_SLEEP_SECONDS))
+
+    deadline = time.perf_counter() + seconds_until(target)
+    while time.perf_counter() < deadline:
+        pass
+
+    return ms_since(target)
@@ -1,4 +1,116 @@
-from playwright.sync_api import Page
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from playwright.async_api import Browser as AsyncBrowser
+from playwright.async_api import BrowserContext as AsyncBrowserContext
+from playwright.sync_api import Browser, BrowserContext, Page, sync_playwright
+from src._utils.api import RESERVE_PATH
+from src._utils.env import settings
+from src._utils.flight_recorder import active_recorder
+from src._utils.metrics import note_request
+from src._utils.network import apply_request_filter, apply_request_filter_async
+
+
+@contextmanager
+def open_browser(browser: Optional[Browser] = None) -> Iterator[Browser]:
+    """
+    Provides a browser for a run: the given shared one, or a freshly launched one
+    that is closed afterwards.
+
+    Args:
+        browser (Optional[Browser]): A browser shared by the caller
+
+    Yields:
+        Browser: Playwright browser object
+    """
+    if browser:
+        yield browser
+        return
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=settings.headless)
+        try:
+            yield browser
+        finally:
+            browser.close()
+
+
+def track_holds(context: Any) -> list[Any]:
+    """
+    Collect the responses to the hold requests a context's pages make, so a worker that
+    stands down can release what it selected. Works with sync and async contexts.
+
+    Args:
+        context (Any): A sync or async BrowserContext
+
+    Returns:
+        list[Any]: The responses so far, appended to as holds are placed
+    """
+    responses: list[Any] = []
+    context.on(
+        "response",
+        lambda response: (
+            responses.append(response) if RESERVE_PATH in response.url else None
+        ),
+    )
+    return responses
+
+
+def new_context(
+    browser: Browser, storage_state: Optional[dict] = None
+) -> BrowserContext:
+    """
+    Opens a browser context with the request filter applied.
+
+    Args:
+        browser (Browser): Playwright browser object
+        storage_state (Optional[dict]): Cookies and local storage to start the context with
+
+    Returns:
+        BrowserContext: The new context
+    """
+    context = browser.new_context(storage_state=storage_state, **_har_options())  # type: ignore
+    context.once("request", lambda request: note_request())
+    recorder = active_recorder()
+    if recorder:
+        recorder.attach(context)
+    apply_request_filter(context)
+    if settings.replay_har_path:
+        context.route_from_har(settings.replay_har_path, not_found="fallback")
+    return context
+
+
+async def new_context_async(
+    browser: AsyncBrowser, storage_state: Optional[dict] = None
+) -> AsyncBrowserContext:
+    """
+    Opens an async browser context with the request filter applied.
+
+    Args:
+        browser (AsyncBrowser): Async Playwright browser object
+        storage_state (Optional[dict]): Cookies and local storage to start the context with
+
+    Returns:
+        AsyncBrowserContext: The new context
+    """
+    context = await browser.new_context(
+        storage_state=storage_state,  # type: ignore
+        **_har_options(),
+    )
+    context.once("request", lambda request: note_request())
+    recorder = active_recorder()
+    if recorder:
+        recorder.attach(context)
+    await apply_request_filter_async(context)
+    if settings.replay_har_path:
+        await context.route_from_har(settings.replay_har_path, not_found="fallback")
+    return context
+
+
+def _har_options() -> dict:
+    # embed bodies so the recording can be replayed on its own
+    if not settings.record_har_path:
+        return {}
+    return {"record_har_path": settings.record_har_path, "record_har_content": "embed"}
 
 
 # Extractions
@@ -15,12 +127,70 @@ def get_customer_id(page: Page) -> int:
     Raises:
         ValueError: If the customer ID cannot be found
     """
-    nodes = page.evaluate("window.__reduxInitialState")["loginUser"]["_root"][
-        "entries"
-    ][0][1]["_root"]["nodes"]
+    return parse_customer_id(page.evaluate("window.__reduxInitialState"))
+
+
+def parse_customer_id(redux_state: dict) -> int:
+    """
+    Finds the customer ID in the SPA's Redux state.
+
+    Args:
+        redux_state (dict): The page's window.__reduxInitialState
+
+    Returns:
+        int: The customer ID from the user's account
+
+    Raises:
+        ValueError: If the customer ID cannot be found
+    """
+    nodes = redux_state["loginUser"]["_root"]["entries"][0][1]["_root"]["nodes"]
 
     for node in nodes:
         if "entry" in node and node["entry"][0] == "customerid":
             return node["entry"][1]
 
     raise ValueError("Could not find customer ID in page state")
+
+
+def get_csrf_token(page: Page) -> str:
+    """
+    Gets the CSRF token the SPA attaches to its REST calls.
+
+    Args:
+        page (Page): Playwright page object
+
+    Returns:
+        str: The CSRF token
+    """
+    return page.evaluate("window.__csrfToken")
+
+
+def get_cookie_dict(context: BrowserContext) -> dict[str, str]:
+    """
+    Gets the context's cookies as a name -> value dict usable by requests.
+
+    Args:
+        context (BrowserContext): Playwright browser context
+
+    Returns:
+        dict[str, str]: Cookie values keyed by name
+    """
+    return cookies_to_dict(context.cookies())
+
+
+def cookies_to_dict(cookies: list) -> dict[str, str]:
+    """
+    Turns Playwright cookies into a name -> value dict usable by requests.
+
+    Args:
+        cookies (list): Cookies as returned by BrowserContext.cookies
+
+    Returns:
+        dict[str, str]: Cookie values keyed by name
+    """
+    cookie_dict: dict[str, str] = {}
+    for cookie in cookies:
+        if "name" in cookie and "value" in cookie:
+            cookie_dict[cookie["name"]] = cookie["value"]
+
+    return cookie_dict
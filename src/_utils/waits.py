@@ -0,0 +1,72 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from src._utils.env import settings
+
+# Timeout budget per wait, in milliseconds; override with WAIT_TIMEOUTS_MS
+DEFAULT_WAIT_TIMEOUTS_MS = {
+    "login": 15000,
+    "calendar": 5000,
+    "date": 10000,
+    "field": 5000,
+    "questions": 10000,
+    "confirm": 20000,
+    "checkout": 30000,
+}
+
+
+class StepReport:
+    """How long each readiness wait of a run actually took."""
+
+    def __init__(self):
+        self.waits: list[tuple[str, float]] = []
+
+    def record(self, name: str, waited_ms: float) -> None:
+        self.waits.append((name, waited_ms))
+
+    @property
+    def total_ms(self) -> float:
+        return sum(waited_ms for _, waited_ms in self.waits)
+
+    def summary(self) -> str:
+        steps = ", ".join(f"{name}={waited_ms:.0f}ms" for name, waited_ms in self.waits)
+        return f"{steps or 'no waits'} (total {self.total_ms:.0f}ms)"
+
+
+_active_report: ContextVar[Optional[StepReport]] = ContextVar(
+    "active_report", default=None
+)
+
+
+def start_step_report() -> StepReport:
+    """Start collecting waits for a run in the current context."""
+    report = StepReport()
+    _active_report.set(report)
+    return report
+
+
+def wait_timeout(name: str) -> int:
+    """Timeout budget for a wait, in milliseconds."""
+    return settings.wait_timeouts_ms.get(name, DEFAULT_WAIT_TIMEOUTS_MS[name])
+
+
+@contextmanager
+def timed_wait(name: str) -> Iterator[int]:
+    """
+    Time a readiness wait and add it to the run's step report.
+
+    Args:
+        name (str): The wait's name, also used to look up its timeout budget
+
+    Yields:
+        int: The wait's timeout budget in milliseconds
+    """
+    started = time.perf_counter()
+    try:
+        yield wait_timeout(name)
+    finally:
+        waited_ms = (time.perf_counter() - started) * 1000
+        report = _active_report.get()
+        if report:
+            report.record(name, waited_ms)
@@ -0,0 +1,99 @@
+import random
+from typing import Dict, List
+from src._utils.field_utils import AvailabilityIndex, Candidate, preferred_candidates
+
+
+def free_masks(index: AvailabilityIndex) -> Dict[int, int]:
+    """Free-slot bitmask of every resource in a response, by resource id."""
+    return dict(zip(index.resource_ids, index.free_masks))
+
+
+def opened_slots(previous: Dict[int, int], index: AvailabilityIndex) -> Dict[int, int]:
+    """
+    Slots that turned free since the previous response, one XOR per resource.
+
+    Args:
+        previous (Dict[int, int]): free_masks of the previous response
+        index (AvailabilityIndex): Index of the new response
+
+    Returns:
+        Dict[int, int]: Bitmask of newly free slots by resource position, only for
+            resources that have any
+    """
+    opened: Dict[int, int] = {}
+    for position, (resource_id, free_mask) in enumerate(
+        zip(index.resource_ids, index.free_masks)
+    ):
+        newly_free = free_mask & ~previous.get(resource_id, 0)
+        if newly_free:
+            opened[position] = newly_free
+
+    return opened
+
+
+def opened_candidates(
+    index: AvailabilityIndex, opened: Dict[int, int]
+) -> List[Candidate]:
+    """
+    Rank the configured preferences against a response, keeping only candidates whose
+    block includes a newly opened slot. Nothing is ranked when nothing opened, which is
+    almost every poll.
+
+    Args:
+        index (AvailabilityIndex): Index of the response
+        opened (Dict[int, int]): Newly free slots, from opened_slots
+
+    Returns:
+        List[Candidate]: Ranked candidates that just became bookable
+    """
+    if not opened:
+        return []
+
+    positions = {
+        resource_id: position for position, resource_id in enumerate(index.resource_ids)
+    }
+    candidates = []
+    for candidate in preferred_candidates(index):
+        newly_free = opened.get(positions[candidate.resource_id], 0)
+        block = sum(1 << index.slot_positions[time] for time in candidate.times)
+        if newly_free & block:
+            candidates.append(candidate)
+
+    return candidates
+
+
+class AdaptiveInterval:
+    """
+    Polling cadence that tightens while availability is moving and relaxes while it
+    isn't: back to the minimum after any change, then growing by factor on every quiet
+    poll up to the maximum. Failures double the interval. Each delay gets ±10% jitter so
+    polls don't fall into a fixed pattern.
+    """
+
+    def __init__(self, minimum: float, maximum: float, factor: float = 1.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.current = minimum
+
+    def next(self, changed: bool) -> float:
+        """
+        Seconds to wait before the next poll.
+
+        Args:
+            changed (bool): Whether the last poll saw any slot change
+
+        Returns:
+            float: The delay
+        """
+        if changed:
+            self.current = self.minimum
+        else:
+            self.current = min(self.maximum, self.current * self.factor)
+
+        return self.current * random.uniform(0.9, 1.1)
+
+    def failed(self) -> float:
+        """Seconds to wait after a failed poll."""
+        self.current = min(self.maximum, self.current * 2)
+        return self.current * random.uniform(0.9, 1.1)
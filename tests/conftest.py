@@ -0,0 +1,35 @@
+import os
+
+# required settings, so Settings loads without a .env
+for name, value in {
+    "SF_REC_EMAIL": "test@example.com",
+    "SF_REC_PASSWORD": "password",
+    "DESIRED_FIELD_STARTS_WITH": "FIELD - Main",
+    "SPORT": "Soccer",
+    "RESERVATION_NAME": "Test Club",
+    "CVV": "123",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest  # noqa: E402
+from src._utils.env import settings  # noqa: E402
+from src._utils.stub_server import StubServer, start_stub_server  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def offline_settings(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    """Keep every test's files in its own folder and off the real site."""
+    monkeypatch.setattr(settings, "history_enabled", False)
+    monkeypatch.setattr(
+        settings, "facility_cache_path", str(tmp_path / "facility.json")
+    )
+    monkeypatch.setattr(settings, "coordination_path", str(tmp_path / "leases.db"))
+    monkeypatch.setattr(settings, "flight_recorder_enabled", False)
+
+
+@pytest.fixture
+def stub(monkeypatch: pytest.MonkeyPatch) -> StubServer:
+    server = start_stub_server()
+    monkeypatch.setattr(settings, "base_url", server.base_url)
+    yield server
+    server.shutdown()
@@ -0,0 +1,64 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from src._utils.clock import calibrate
+from src._utils.env import Settings, default_settings, settings
+from src._utils.schedule_config import load_schedule_config
+from src._utils.stub_server import StubServer, start_stub_server
+
+SKEW_MS = 1500
+
+
+@pytest.fixture
+def skewed_stub(monkeypatch: pytest.MonkeyPatch) -> StubServer:
+    server = start_stub_server(clock_skew_ms=SKEW_MS)
+    monkeypatch.setattr(settings, "base_url", server.base_url)
+    yield server
+    server.shutdown()
+
+
+def test_calibrate_measures_the_server_clock_skew(
+    monkeypatch: pytest.MonkeyPatch, skewed_stub: StubServer
+) -> None:
+    monkeypatch.setattr(settings, "clock_calibration_samples", 4)
+
+    offset = calibrate()
+
+    assert offset.samples == 4
+    assert abs(offset.offset_ms - SKEW_MS) <= offset.uncertainty_ms + 5
+    # aimed samples narrow the interval well below the Date header's one second
+    assert offset.uncertainty_ms < 250
+
+
+def test_calibrate_stops_at_its_deadline(
+    monkeypatch: pytest.MonkeyPatch, skewed_stub: StubServer
+) -> None:
+    monkeypatch.setattr(settings, "clock_calibration_samples", 10)
+    started = time.monotonic()
+
+    offset = calibrate(deadline=datetime.now() + timedelta(seconds=0.3))
+
+    assert time.monotonic() - started < 1
+    assert 1 <= offset.samples < 10
+    assert abs(offset.offset_ms - SKEW_MS) <= offset.uncertainty_ms + 5
+
+
+def test_worker_lead_must_exceed_calibration_lead(
+    monkeypatch: pytest.MonkeyPatch, tmp_path
+) -> None:
+    with pytest.raises(ValueError, match="WORKER_LEAD_SECONDS"):
+        Settings(
+            **{
+                **default_settings.model_dump(),
+                "worker_lead_seconds": 5,
+                "clock_calibration_lead_seconds": 5,
+            }
+        )
+
+    monkeypatch.setenv("WORKER_LEAD_SECONDS", "5")
+    monkeypatch.setenv("CLOCK_CALIBRATION_LEAD_SECONDS", "5")
+    with pytest.raises(ValueError, match="WORKER_LEAD_SECONDS"):
+        load_schedule_config(str(tmp_path / ".env"))
+
+    monkeypatch.setenv("CLOCK_CALIBRATION_ENABLED", "false")
+    assert load_schedule_config(str(tmp_path / ".env")).worker_lead_seconds == 5
@@ -0,0 +1,78 @@
+import time
+import pytest
+from src._utils.date_utils import calculate_request_date, calculate_request_dates
+from src._utils.env import settings
+from src._utils.http_engine import HttpBookingEngine
+from src._utils.stub_server import (
+    STUB_COOKIE_NAME,
+    STUB_COOKIE_VALUE,
+    STUB_CSRF_TOKEN,
+    STUB_CUSTOMER_ID,
+    StubServer,
+)
+
+
+@pytest.fixture
+def engine(stub: StubServer) -> HttpBookingEngine:
+    engine = HttpBookingEngine(
+        {STUB_COOKIE_NAME: STUB_COOKIE_VALUE}, STUB_CSRF_TOKEN, STUB_CUSTOMER_ID
+    )
+    yield engine
+    engine.close()
+
+
+def test_book_puts_the_desired_slot_in_the_cart(
+    stub: StubServer, engine: HttpBookingEngine
+) -> None:
+    reservation_id = engine.book(calculate_request_date())
+
+    assert stub.state.cart == [reservation_id]
+    (hold,) = stub.state.holds.values()
+    assert {time for _, _, _, time in hold["slots"]} == {settings.desired_time_military}
+
+
+def test_racing_holds_keeps_one_and_releases_the_rest(
+    monkeypatch: pytest.MonkeyPatch, stub: StubServer, engine: HttpBookingEngine
+) -> None:
+    monkeypatch.setattr(settings, "race_candidates", 3)
+
+    reservation_id = engine.book(calculate_request_date())
+
+    # losing holds are released in the background
+    deadline = time.monotonic() + 5
+    while len(stub.state.holds) > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert list(stub.state.holds) == [reservation_id]
+    assert len(stub.state.booked) == 1
+
+
+def test_batch_reports_items_that_failed(
+    monkeypatch: pytest.MonkeyPatch, stub: StubServer, engine: HttpBookingEngine
+) -> None:
+    monkeypatch.setattr(settings, "batch_occurrences", 2)
+    first, second = calculate_request_dates(2)
+    # the second date is sold out
+    stub.state.booked |= {
+        (settings.facility_group_id, second, resource["resource_id"], time)
+        for resource in stub.state.resources
+        for time in stub.state.time_slots
+    }
+
+    results = engine.book_batch([first, second])
+
+    assert [result.request_date for result in results] == [first, second]
+    assert results[0].success and not results[1].success
+    assert stub.state.cart == [results[0].reservation_id]
+
+
+def test_failed_confirm_releases_the_hold(
+    stub: StubServer, engine: HttpBookingEngine
+) -> None:
+    def lost() -> None:
+        raise ValueError("lease lost")
+
+    engine.fence = lost
+    with pytest.raises(ValueError, match="lease lost"):
+        engine.book(calculate_request_date())
+
+    assert stub.state.holds == {} and stub.state.cart == []
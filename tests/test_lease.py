@@ -0,0 +1,45 @@
+import time
+import pytest
+from src._utils.lease import LeaseGuard, SqliteLeaseCoordinator, run_demo
+
+TTL_SECONDS = 0.5
+
+
+def test_standby_takes_over_from_a_stalled_leader(tmp_path) -> None:
+    # the stalled leader holds token 1 and has to be fenced off when it resumes
+    ((holder, token),) = run_demo(
+        str(tmp_path / "leases.db"), 3, TTL_SECONDS, stall=True
+    )
+
+    assert not holder.startswith("worker-0:")
+    assert token > 1
+
+
+def test_ambiguous_payment_is_not_repeated(tmp_path) -> None:
+    # the leader fails after its payment went out, so nobody may take over
+    ((holder, token),) = run_demo(
+        str(tmp_path / "leases.db"), 3, TTL_SECONDS, stall=False, ambiguous=True
+    )
+
+    assert holder.startswith("worker-0:")
+    assert token == 1
+
+
+def test_commit_fails_once_the_lease_was_taken_over(tmp_path) -> None:
+    coordinator = SqliteLeaseCoordinator(str(tmp_path / "leases.db"))
+    stale = LeaseGuard(
+        coordinator, coordinator.acquire("booking", "a", TTL_SECONDS), TTL_SECONDS
+    )
+    stale._stopped.set()
+    time.sleep(TTL_SECONDS * 1.5)
+    current = LeaseGuard(
+        coordinator, coordinator.acquire("booking", "b", TTL_SECONDS), TTL_SECONDS
+    )
+
+    with pytest.raises(ValueError, match="taken over"):
+        stale.commit()
+
+    current.commit()
+    current.stop(completed=False)
+    assert coordinator.is_complete("booking")
+    assert coordinator.acquire("booking", "c", TTL_SECONDS) is None
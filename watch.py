@@ -0,0 +1,198 @@
+import time
+from typing import Optional
+from playwright.sync_api import Browser
+from main import checkout_held, http_session
+from src._utils.date_utils import calculate_request_dates
+from src._utils.env import settings
+from src._utils.field_utils import AvailabilityIndex, Candidate
+from src._utils.flight_recorder import flight_recording
+from src._utils.http_engine import HttpBookingEngine
+from src._utils.lease import booking_lease_name, exclusive_booking
+from src._utils.logger import setup_logger
+from src._utils.metrics import track_run
+from src._utils.scanner import ScannedCandidate, ScanTarget
+from src._utils.session_cache import CachedSession
+from src._utils.watch import (
+    AdaptiveInterval,
+    free_masks,
+    opened_candidates,
+    opened_slots,
+)
+
+logger = setup_logger()
+
+# Consecutive failed polls after which the session is assumed expired and renewed
+RELOGIN_AFTER_FAILURES = 3
+
+
+def watch_targets() -> list[ScanTarget]:
+    """
+    Dates to watch for cancellations: watch_dates, or the next watch_occurrences
+    occurrences of the desired date.
+
+    Returns:
+        list[ScanTarget]: The targets, in the configured facility group
+    """
+    dates = settings.watch_dates or calculate_request_dates(settings.watch_occurrences)
+    return [ScanTarget(date, settings.facility_group_id) for date in dates]
+
+
+def scheduled_dates() -> set[str]:
+    """
+    Dates the scheduled run books, as of now. Without coordination the watcher leaves
+    them alone, since nothing would stop both from paying for the same slot.
+
+    Returns:
+        set[str]: Dates in YYYY-MM-DD format, empty with coordination enabled
+    """
+    if settings.coordination_enabled:
+        return set()
+
+    return set(calculate_request_dates(settings.batch_occurrences))
+
+
+def book_opened(
+    engine: HttpBookingEngine,
+    session: CachedSession,
+    target: ScanTarget,
+    candidates: list[Candidate],
+    browser: Optional[Browser] = None,
+) -> bool:
+    """
+    Book a slot that just opened: hold it over REST right away, then check out. With
+    coordination enabled, only the worker holding the date's lease holds and confirms.
+
+    Args:
+        engine (HttpBookingEngine): Engine of the watch session
+        session (CachedSession): The watch session
+        target (ScanTarget): The date the slots opened on
+        candidates (list[Candidate]): The opened candidates, best first
+        browser (Optional[Browser]): A shared browser to check out with
+
+    Returns:
+        bool: True if this worker booked it
+    """
+    try:
+        with (
+            flight_recording(),
+            track_run(),
+            exclusive_booking(name=booking_lease_name(target.request_date)) as lease,
+        ):
+            if lease is None:
+                logger.info(
+                    f"Another worker has the booking on {target.request_date}, standing down"
+                )
+                return False
+
+            engine.fence = lease.check
+            reservation_id = engine.book_candidates(
+                [ScannedCandidate(target, candidate) for candidate in candidates]
+            )
+            checkout_held(engine, session, [reservation_id], lease, browser)
+            return True
+    except Exception as e:
+        logger.error(
+            f"Could not book the slot that opened on {target.request_date}: {e}"
+        )
+        return False
+    finally:
+        engine.fence = None
+
+
+def watch(browser: Optional[Browser] = None) -> None:
+    """
+    Watch dates for cancellations on one authenticated session and book a desired slot
+    as soon as it opens. A date's first poll is only its baseline; each later poll is
+    diffed against the previous one, so only slots that just turned free are ranked. A
+    slot whose booking fails stays opened, so it is retried on the next poll for as long
+    as it is free. The cadence tightens to watch_min_interval_seconds while availability is
+    moving and relaxes towards watch_max_interval_seconds while it isn't. A date stops
+    being watched once it is booked, and is skipped while the scheduled run books it
+    (see scheduled_dates).
+
+    Args:
+        browser (Optional[Browser]): A shared browser to log in and check out with
+    """
+    targets = watch_targets()
+    interval = AdaptiveInterval(
+        settings.watch_min_interval_seconds, settings.watch_max_interval_seconds
+    )
+    masks: dict[ScanTarget, dict[int, int]] = {}
+    skipped: set[str] = set()
+    failures = 0
+
+    session = http_session(browser)
+    engine = HttpBookingEngine.from_session(session)
+    logger.info(
+        f"Watching {', '.join(target.request_date for target in targets)} for cancellations"
+    )
+    try:
+        while targets:
+            changed = False
+            skipping = scheduled_dates() & {target.request_date for target in targets}
+            if skipping != skipped:
+                skipped = skipping
+                if skipped:
+                    logger.info(
+                        f"Leaving {', '.join(sorted(skipped))} to the scheduled run, "
+                        "enable coordination to watch it too"
+                    )
+            try:
+                for target in list(targets):
+                    if target.request_date in skipped:
+                        # a fresh baseline once the date is watched again
+                        masks.pop(target, None)
+                        continue
+
+                    index = AvailabilityIndex(
+                        engine.availability.fetch(
+                            target.request_date, target.facility_group_id
+                        )
+                    )
+                    previous = masks.get(target)
+                    masks[target] = free_masks(index)
+                    if previous is None:
+                        # slots free before the watch saw the date didn't just open
+                        continue
+                    changed |= masks[target] != previous
+
+                    candidates = opened_candidates(index, opened_slots(previous, index))
+                    if not candidates:
+                        continue
+
+                    logger.info(
+                        f"Opened on {target.request_date}: "
+                        + ", ".join(
+                            f"{candidate.resource_name} at {candidate.start_time}"
+                            for candidate in candidates
+                        )
+                    )
+                    if not settings.watch_book:
+                        continue
+                    if book_opened(engine, session, target, candidates, browser):
+                        targets.remove(target)
+                        del masks[target]
+                    else:
+                        # still unbooked, so the next poll sees the slot open again
+                        masks[target] = previous
+            except Exception as e:
+                failures += 1
+                logger.warning(f"Watch poll failed ({failures} in a row): {e}")
+                if failures >= RELOGIN_AFTER_FAILURES:
+                    engine.close()
+                    session = http_session(browser)
+                    engine = HttpBookingEngine.from_session(session)
+                    failures = 0
+                time.sleep(interval.failed())
+                continue
+
+            failures = 0
+            time.sleep(interval.next(changed))
+    finally:
+        engine.close()
+
+    logger.info("Every watched date is booked")
+
+
+if __name__ == "__main__":
+    watch()
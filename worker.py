@@ -0,0 +1,151 @@
+import argparse
+import json
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+from playwright.sync_api import Browser
+from main import main
+from runner import run_profiles
+from src._utils.clock import calibrate
+from src._utils.env import settings
+from src._utils.logger import setup_logger
+from src._utils.metrics import first_request_ms, mark_fired, observe_fire_jitter
+from src._utils.timing import shift, sleep_until_precise
+from src._utils.utils import open_browser
+
+logger = setup_logger()
+
+# Time left between calibrating and firing, for the measured offset to move the fire
+# time earlier
+CALIBRATION_MARGIN_SECONDS = 1.0
+
+
+def job(
+    release_at: Optional[datetime] = None, browser: Optional[Browser] = None
+) -> None:
+    """
+    Run the reservation bot.
+
+    Args:
+        release_at (Optional[datetime]): The release instant, in armed mode
+        browser (Optional[Browser]): A browser launched ahead of the run
+
+    Raises:
+        RuntimeError: If any profile failed
+    """
+    logger.info("Starting reservation bot...")
+    if Path(settings.profiles_path).exists():
+        results = run_profiles(release_at=release_at)
+        if not all(result.success for result in results):
+            raise RuntimeError(
+                f"{sum(not result.success for result in results)} of {len(results)} profiles failed"
+            )
+    else:
+        main(release_at=release_at, browser=browser)
+    logger.info("Reservation bot completed successfully")
+
+
+def align_to_server_clock(
+    fire_at: datetime, release_at: Optional[datetime]
+) -> tuple[datetime, Optional[datetime]]:
+    """
+    Measure the booking site's clock offset shortly before a run and move its fire time
+    (and release instant) to when the server's clock reads them. Sampling stops
+    CALIBRATION_MARGIN_SECONDS before the fire time, however many samples it got. Falls
+    back to the local clock if calibration fails.
+
+    Args:
+        fire_at (datetime): The scheduled fire time
+        release_at (Optional[datetime]): The release instant, in armed mode
+
+    Returns:
+        tuple[datetime, Optional[datetime]]: The instants in local clock time
+    """
+    calibrate_at = shift(
+        fire_at, -timedelta(seconds=settings.clock_calibration_lead_seconds)
+    )
+    sleep_until_precise(calibrate_at, settings.scheduler_spin_ms)
+
+    try:
+        offset = calibrate(
+            deadline=shift(fire_at, -timedelta(seconds=CALIBRATION_MARGIN_SECONDS))
+        )
+    except Exception as e:
+        logger.warning(f"Clock calibration failed, firing on the local clock: {e}")
+        return fire_at, release_at
+
+    fire_at = offset.to_local(fire_at)
+    release_at = offset.to_local(release_at) if release_at else None
+    logger.info(f"Firing at {fire_at.isoformat()} local time to match the server clock")
+
+    return fire_at, release_at
+
+
+def run(fire_at: datetime, release_at: Optional[datetime], report_fd: int) -> None:
+    """
+    Warm up, wait for the fire time and run the job, reporting to the scheduler over a pipe:
+    a "ready" message once the browser is launched, then a "result".
+
+    Args:
+        fire_at (datetime): When to run the job
+        release_at (Optional[datetime]): The release instant, in armed mode
+        report_fd (int): Write end of the scheduler's report pipe
+    """
+    with open(report_fd, "w", buffering=1) as report, ExitStack() as stack:
+        # profiles launch their own CDP-enabled browser
+        browser: Optional[Browser] = None
+        launch_started = time.perf_counter()
+        if not Path(settings.profiles_path).exists():
+            try:
+                browser = stack.enter_context(open_browser())
+            except Exception as e:
+                logger.warning(f"Could not launch the browser ahead of the run: {e}")
+        launched_ms = (time.perf_counter() - launch_started) * 1000
+
+        report.write(json.dumps({"event": "ready", "launch_ms": launched_ms}) + "\n")
+
+        if settings.clock_calibration_enabled:
+            fire_at, release_at = align_to_server_clock(fire_at, release_at)
+
+        jitter_ms = sleep_until_precise(fire_at, settings.scheduler_spin_ms)
+        mark_fired()
+        observe_fire_jitter(jitter_ms)
+
+        error = None
+        try:
+            job(release_at, browser)
+        except Exception as e:
+            logger.error(f"Error in reservation bot: {e}")
+            error = str(e)
+
+        report.write(
+            json.dumps(
+                {
+                    "event": "result",
+                    "success": error is None,
+                    "error": error,
+                    "jitter_ms": jitter_ms,
+                    "first_request_ms": first_request_ms(),
+                }
+            )
+            + "\n"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run one scheduled booking, spawned by the scheduler"
+    )
+    parser.add_argument("--plan", required=True, help="JSON run plan")
+    parser.add_argument("--report-fd", type=int, required=True)
+    args = parser.parse_args()
+
+    plan = json.loads(args.plan)
+    release_at = plan.get("release_at")
+    run(
+        datetime.fromisoformat(plan["fire_at"]),
+        datetime.fromisoformat(release_at) if release_at else None,
+        args.report_fd,
+    )